@@ -1,5 +1,5 @@
-from .models import *
-from .files import *
-
 __author__ = "Sam Ireland"
 __version__ = "0.11.1"
+
+from .models import *
+from .files import *
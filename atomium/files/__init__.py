@@ -1 +1,3 @@
-from .utilities import open, fetch, fetch_over_ssh
+from .utilities import open, fetch, fetch_many, fetch_over_ssh
+from .utilities import fetch_many_over_ssh, close_ssh_sessions
+from .utilities import iter_models, iter_atoms, open_many, walk_files
@@ -0,0 +1,206 @@
+"""Contains functions for keeping parsed structure files in an on-disk cache,
+so that files which are opened repeatedly don't need to be parsed every
+time, and for keeping downloaded files so that they needn't be downloaded
+again."""
+
+import os
+import gc
+import time
+import pickle
+import hashlib
+import tempfile
+from .. import __version__
+
+CACHE_SIZE = 2 ** 30
+CACHE_HEADER = "atomium {} cache\n".format(__version__).encode()
+
+def cache_key(filestring, *options):
+    """Creates the key under which the parsed form of some file contents is
+    cached. The key is a hash of the contents, the version of atomium doing the
+    parsing, and any other options which affect the parsed result - so that a
+    new version of atomium never loads something an older one stored.
+
+    :param str filestring: The contents of the file.
+    :param \*options: Anything else the parsed result depends on.
+    :rtype: ``str``"""
+
+    hasher = hashlib.sha256(filestring.encode())
+    hasher.update(repr((__version__,) + options).encode())
+    return hasher.hexdigest()
+
+
+def cache_path(cache_dir, key):
+    """Returns the location of the cache entry with a given key.
+
+    :param str cache_dir: The cache directory.
+    :param str key: The entry's key.
+    :rtype: ``str``"""
+
+    return os.path.join(cache_dir, key + ".pickle")
+
+
+def load_from_cache(cache_dir, key):
+    """Loads the object stored under a given key in a cache directory, or
+    returns ``None`` if there is no such entry (or if it can't be read). Loading
+    an entry marks it as recently used, by updating its modification time.
+
+    Entries are pickles, and unpickling can run arbitrary code, so a cache
+    directory must only be writable by users who are trusted. Entries which
+    don't start with the header this version of atomium writes
+    (``CACHE_HEADER``) are never unpickled, so that stray files and entries
+    from other versions are ignored - but this is not a defence against
+    someone deliberately writing a malicious entry.
+
+    :param str cache_dir: The cache directory.
+    :param str key: The entry's key.
+    :returns: The stored object, or ``None``."""
+
+    path = cache_path(cache_dir, key)
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(CACHE_HEADER)) != CACHE_HEADER: return None
+            obj = pickle.load(f)
+    except Exception: return None
+    finally:
+        if enabled: gc.enable()
+    try:
+        os.utime(path)
+    except OSError: pass
+    return obj
+
+
+def save_to_cache(cache_dir, key, obj, max_size=CACHE_SIZE):
+    """Stores an object in a cache directory under a given key, and then evicts
+    the least recently used entries until the cache is no bigger than its
+    maximum size. The object is pickled after a header (``CACHE_HEADER``)
+    identifying the version of atomium that wrote it.
+
+    The object is written to a temporary file first, which is then moved into
+    place in one step (see :py:func:`.write_entry`), so that other processes
+    using the same directory never see a partially written entry.
+
+    :param str cache_dir: The cache directory - it will be created if needed.
+    :param str key: The entry's key.
+    :param obj: The object to store.
+    :param int max_size: The maximum size of the cache in bytes."""
+
+    def write(f):
+        f.write(CACHE_HEADER)
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+    if write_entry(cache_dir, cache_path(cache_dir, key), write):
+        evict_from_cache(cache_dir, max_size)
+
+
+def download_path(cache_dir, url):
+    """Returns the location of the downloaded copy of a URL in a cache
+    directory.
+
+    :param str cache_dir: The cache directory.
+    :param str url: The URL that was downloaded.
+    :rtype: ``str``"""
+
+    key = hashlib.sha256(url.encode()).hexdigest()
+    return os.path.join(cache_dir, key + ".download")
+
+
+def load_download(cache_dir, url, max_age=None):
+    """Returns the contents of a URL from a cache directory, or ``None`` if it
+    hasn't been downloaded there (or if the download is too old). Loading a
+    download marks it as recently used by updating its access time - its
+    modification time remains the time it was downloaded.
+
+    :param str cache_dir: The cache directory.
+    :param str url: The URL to look for.
+    :param int max_age: If given, downloads older than this many seconds are\
+    ignored.
+    :rtype: ``str``"""
+
+    path = download_path(cache_dir, url)
+    try:
+        stat = os.stat(path)
+        if max_age is not None and time.time() - stat.st_mtime > max_age:
+            return None
+        with open(path, "rb") as f:
+            filestring = f.read().decode()
+        os.utime(path, (time.time(), stat.st_mtime))
+    except OSError: return None
+    return filestring
+
+
+def save_download(cache_dir, url, filestring, max_size=CACHE_SIZE,
+                  max_age=None):
+    """Stores the contents of a URL in a cache directory, and then evicts
+    downloads which are too old, followed by the least recently used ones,
+    until the cache is no bigger than its maximum size. As with parsed files,
+    the contents are moved into place in one step.
+
+    :param str cache_dir: The cache directory - it will be created if needed.
+    :param str url: The URL that was downloaded.
+    :param str filestring: The contents of the URL.
+    :param int max_size: The maximum size of the cache in bytes.
+    :param int max_age: The age in seconds after which downloads expire."""
+
+    if write_entry(cache_dir, download_path(cache_dir, url), lambda f:
+     f.write(filestring.encode())):
+        evict_from_cache(cache_dir, max_size, ".download", max_age)
+
+
+def write_entry(cache_dir, path, write):
+    """Writes a cache entry by passing a temporary file in the cache directory
+    to a function, and then moving the file to the entry's location in one
+    step. Returns ``False`` if the entry couldn't be written - for any reason,
+    including the function failing - in which case the temporary file is
+    deleted. A new cache directory is only readable and writable by the
+    current user, as are the entries written to it.
+
+    :param str cache_dir: The cache directory - it will be created if needed.
+    :param str path: The location of the entry.
+    :param function write: A function which writes to a binary file object.
+    :rtype: ``bool``"""
+
+    os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    handle, temp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as f:
+            write(f)
+        os.replace(temp_path, path)
+    except Exception:
+        try:
+            os.remove(temp_path)
+        except OSError: pass
+        return False
+    return True
+
+
+def evict_from_cache(cache_dir, max_size, suffix=".pickle", max_age=None):
+    """Deletes the least recently used entries in a cache directory until the
+    entries take up no more than a given number of bytes. Entries which
+    another process deletes first are skipped.
+
+    :param str cache_dir: The cache directory.
+    :param int max_size: The maximum size of the cache in bytes.
+    :param str suffix: The file ending of the kind of entry to evict.
+    :param int max_age: If given, entries last modified more than this many\
+    seconds ago are deleted regardless of the cache's size."""
+
+    entries, now = [], time.time()
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith(suffix):
+            try:
+                stat = entry.stat()
+            except OSError: continue
+            if max_age is not None and now - stat.st_mtime > max_age:
+                try:
+                    os.remove(entry.path)
+                except OSError: pass
+            else:
+                entries.append((stat.st_atime, stat.st_size, entry.path))
+    total = sum(entry[1] for entry in entries)
+    for atime, size, path in sorted(entries):
+        if total <= max_size: break
+        try:
+            os.remove(path)
+        except OSError: pass
+        total -= size
@@ -1,7 +1,7 @@
 """Contains the code for dealing with and defining atomium data dictionaries."""
 
-from copy import deepcopy
-from itertools import groupby
+from collections import OrderedDict
+from collections.abc import MutableSequence
 from .file import File
 from ..models import *
 from ..models.data import CODES, BONDS
@@ -18,20 +18,52 @@ def generate_higher_structures(models):
         for atom in model["atoms"]:
             if atom["chain_id"] not in chain_ids:
                 chain_ids.append(atom["chain_id"])
-                chain = deepcopy(CHAIN_DICT)
-                chain["id"] = atom["chain_id"]
-                model["chains"].append(chain)
+                model["chains"].append(new_chain_dict(id=atom["chain_id"]))
             if (atom["polymer"] and residue_id != atom["full_res_id"]) or\
              (not atom["polymer"] and ligand_id != atom["full_res_id"]):
                 if atom["polymer"]:
                     residue_id = atom["full_res_id"]
                 else:
                     ligand_id = atom["full_res_id"]
-                het = deepcopy(RESIDUE_DICT)
-                het["id"] = atom["full_res_id"]
-                het["name"] = atom["residue_name"]
-                het["chain_id"] = atom["chain_id"]
-                model["residues" if atom["polymer"] else "ligands"].append(het)
+                model["residues" if atom["polymer"] else "ligands"].append(
+                 new_residue_dict(
+                  id=atom["full_res_id"], name=atom["residue_name"],
+                  chain_id=atom["chain_id"]
+                 )
+                )
+
+
+def atom_filter(chains=None, water=True, hydrogens=True, altloc=None):
+    """Creates a function which decides whether an atom record should be kept,
+    from the raw values in the record itself, so that no dictionary needs to
+    be made for atoms which aren't wanted. The function takes the record's
+    chain ID, residue name, element, alternate location and residue (any value
+    unique to the record's residue) and returns ``True`` or ``False``. If every
+    atom would be kept, ``None`` is returned instead of a function.
+
+    Alternate locations can be a specific location ID, in which case atoms
+    with other IDs are discarded, or ``'first'``, in which case each residue
+    keeps the alternate location it lists first.
+
+    :param chains: The IDs of the chains to keep.
+    :param bool water: If ``False``, water molecules are discarded.
+    :param bool hydrogens: If ``False``, hydrogen atoms are discarded.
+    :param str altloc: The alternate location to keep.
+    :rtype: ``function``"""
+
+    if chains is None and water and hydrogens and altloc is None: return None
+    chains = None if chains is None else set(chains)
+    first_altlocs = {}
+    def keep(chain_id, residue_name, element, alt_loc, residue):
+        if chains is not None and chain_id not in chains: return False
+        if not water and residue_name in WATER_NAMES: return False
+        if not hydrogens and element in HYDROGEN_ELEMENTS: return False
+        if alt_loc and altloc is not None:
+            if altloc == "first":
+                return first_altlocs.setdefault(residue, alt_loc) == alt_loc
+            return alt_loc == altloc
+        return True
+    return keep
 
 
 def data_dict_to_file(d):
@@ -46,44 +78,108 @@ def data_dict_to_file(d):
         if key != "models":
             for key2, value2 in value.items():
                 setattr(file_, "_" + key2, value2)
-    file_._models = [model_dict_to_model(m) for m in d["models"]]
+    file_._models = ModelList(d["models"])
     return file_
 
 
+class ModelList(MutableSequence):
+    """The models of a :py:class:`.File`, which are only created from their
+    model dictionaries when they are first accessed. Getting the first model
+    of a file with many models therefore costs only as much as creating that
+    one model. Once created, a model's dictionary is discarded and the same
+    model is returned each time.
+
+    It otherwise behaves like a list of models - it can be indexed, sliced,
+    iterated over, changed, and compared with lists.
+
+    :param list model_dicts: The model dictionaries to create models from."""
+
+    def __init__(self, model_dicts):
+        self._dicts = list(model_dicts)
+        self._models = [None] * len(self._dicts)
+
+
+    def __repr__(self):
+        return "<ModelList ({} model{}, {} created)>".format(
+         len(self), "" if len(self) == 1 else "s",
+         sum(model is not None for model in self._models)
+        )
+
+
+    def __len__(self):
+        return len(self._models)
+
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        model = self._models[index]
+        if model is None:
+            model = model_dict_to_model(self._dicts[index])
+            self._models[index], self._dicts[index] = model, None
+        return model
+
+
+    def __setitem__(self, index, model):
+        if isinstance(index, slice):
+            model = list(model)
+            self._models[index] = model
+            self._dicts[index] = [None] * len(model)
+        else:
+            self._models[index], self._dicts[index] = model, None
+
+
+    def __delitem__(self, index):
+        del self._models[index]
+        del self._dicts[index]
+
+
+    def __eq__(self, other):
+        if isinstance(other, (ModelList, list)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+
+    def insert(self, index, model):
+        self._models.insert(index, model)
+        self._dicts.insert(index, None)
+
+
+
 def model_dict_to_model(m):
     """Takes an atomium model dictionary, and turns it into a :py:class:`.Model`
-    object.
+    object. The structures are assembled with a :py:class:`.ModelBuilder`, in
+    one pass over the atom dictionaries.
 
     :param dict m: The dictionary to read.
     :rtype: ``Model``"""
 
-    atoms = [atom_dict_to_atom(a) for a in m["atoms"]]
-    model = Model(*atoms)
+    builder = ModelBuilder()
     if m["chains"]:
-        atom_dicts = sorted(m["atoms"], key=lambda a: a["chain_id"])
-        chains = [list(group[1]) for group in
-         groupby(atom_dicts, key=lambda a: a["chain_id"])]
-        res_dict = {res["id"]: res for res in m["residues"]}
-        lig_dict = {lig["id"]: lig for lig in m["ligands"]}
-        for chain in chains:
-            hets = [list(group[1]) for group in
-             groupby(chain, key=lambda a: a["full_res_id"])]
-            residue_objects, ligand_objects = [], []
-            for het in hets:
-                try:
-                    d = res_dict[het[0]["full_res_id"]]
-                    residue_objects.append(create_het(het, d, model))
-                except KeyError:
-                    d = lig_dict[het[0]["full_res_id"]]
-                    ligand_objects.append(create_het(het, d, model))
-            for res1, res2 in zip(residue_objects[:-1], residue_objects[1:]):
-                res1.next = res2
-            c_dict = [c for c in m["chains"] if c["id"] == chain[0]["chain_id"]][0]
-            rep = "".join([CODES.get(res, "X") for res in c_dict["full_sequence"]])
-            Chain(*(residue_objects + ligand_objects), id=c_dict["id"], rep=rep)
-    for a in model.atoms():
-        if not a.residue and not a.ligand and a.name:
-            model.remove(a)
+        names = {lig["id"]: lig["name"] for lig in m["ligands"]}
+        names.update({res["id"]: res["name"] for res in m["residues"]})
+        for chain in m["chains"]:
+            builder.add_chain(chain["id"], rep="".join(
+             [CODES.get(res, "X") for res in chain["full_sequence"]]
+            ))
+        hets = OrderedDict()
+        for atom_dict in m["atoms"]:
+            try:
+                hets[atom_dict["full_res_id"]].append(atom_dict)
+            except KeyError: hets[atom_dict["full_res_id"]] = [atom_dict]
+        for het_id, het_atom_dicts in hets.items():
+            chain_id = het_atom_dicts[0]["chain_id"]
+            polymer = het_atom_dicts[0]["polymer"]
+            for atom_dict in het_atom_locations(het_atom_dicts):
+                builder.add_atom(
+                 atom_dict_to_atom(atom_dict), chain_id, het_id,
+                 names[het_id], polymer
+                )
+    else:
+        for atom_dict in m["atoms"]:
+            if not atom_dict["name"]:
+                builder.add_atom(atom_dict_to_atom(atom_dict))
+    model = builder.build()
     bond_atoms(model, m["connections"])
     return model
 
@@ -102,25 +198,22 @@ def atom_dict_to_atom(atom_dict):
     )
 
 
-def create_het(het_atom_dicts, het_dict, model):
-    """Creates either a :py:class:`.Residue` or :py:class:`.Ligand` from the
-    relevant dictionary, as well as a source of atom dictionaries and a
-    :py:class:`.Model` to update.
+def het_atom_locations(het_atom_dicts):
+    """Takes the atom dictionaries of a residue or ligand and returns those
+    which should become atoms. If some of the atoms have alternate locations
+    and partial occupancy, only the first alternate location is used, along
+    with any atoms which have full occupancy or no alternate location.
 
-    :param dict het: The residue/ligand dictionary to read.
-    :param list atom_dicts: The list of atom dictionaries to look through.
-    :param Model model: The :py:class:`.Model` to update.
-    :rtype: ``Ligand`` or ``Residue``"""
+    :param list het_atom_dicts: The residue/ligand's atom dictionaries.
+    :rtype: ``list``"""
 
     alt_loc = None
     if any([atom["occupancy"] < 1 for atom in het_atom_dicts]):
         if any([atom["alt_loc"] for atom in het_atom_dicts]):
             alt_loc = sorted([atom["alt_loc"]
              for atom in het_atom_dicts if atom["alt_loc"]])[0]
-    atoms = [model.atom(a["id"]) for a in het_atom_dicts if a["occupancy"] == 1
+    return [a for a in het_atom_dicts if a["occupancy"] == 1
      or a["alt_loc"] is None or a["alt_loc"] == alt_loc]
-    Het = Residue if het_atom_dicts[0]["polymer"] else Ligand
-    return Het(*atoms, id=het_dict["id"], name=het_dict["name"])
 
 
 def bond_atoms(model, connections):
@@ -129,27 +222,49 @@ def bond_atoms(model, connections):
     :param Model model: The ``Model`` to be connected up.
     :param list connections: The list of connections to use."""
 
-    make_intra_residue_bonds(model.residues(), BONDS)
+    make_intra_residue_bonds(model.residues(), BOND_TEMPLATES)
     make_inter_residue_bonds(model.residues())
     make_connections_bonds(model, connections)
 
 
-def make_intra_residue_bonds(residues, bonds):
+def compile_bond_templates(bonds):
+    """Takes a ``dict`` of residue names to atom names to the names of the
+    atoms they bond to, like ``BONDS``, and turns each residue's entry into a
+    list of the unique pairs of atom names which are bonded.
+
+    :param dict bonds: The reference ``dict``.
+    :rtype: ``dict``"""
+
+    templates = {}
+    for residue, atoms in bonds.items():
+        pairs = set()
+        for name, others in atoms.items():
+            for other in others:
+                if other != name: pairs.add(tuple(sorted((name, other))))
+        templates[residue] = sorted(pairs)
+    return templates
+
+
+def make_intra_residue_bonds(residues, templates):
     """Takes some :py:class:`.Residue` objects and bonds together its atoms
-    internally, using a ``dict`` and the residue names as a reference.
+    internally, using compiled bond templates and the residue names as a
+    reference.
 
     :param residues: A collection of Residues.
-    :param dict d: The reference ``dict``"""
+    :param dict templates: The compiled reference ``dict``."""
 
     for residue in residues:
-        res_ref = bonds.get(residue.name)
-        if res_ref:
+        pairs = templates.get(residue.name)
+        if pairs:
+            atoms = {}
             for atom in residue.atoms():
-                atom_ref = res_ref.get(atom.name)
-                if atom_ref:
-                    for atom2 in residue.atoms():
-                        if atom2.name in atom_ref:
-                            atom.bond_to(atom2)
+                try:
+                    atoms[atom.name].append(atom)
+                except KeyError: atoms[atom.name] = [atom]
+            for name1, name2 in pairs:
+                for atom1 in atoms.get(name1, ()):
+                    for atom2 in atoms.get(name2, ()):
+                        atom1.bond_to(atom2)
 
 
 def make_inter_residue_bonds(residues):
@@ -174,19 +289,21 @@ def make_connections_bonds(model, connections):
     :param Model model: A Model to connect up.
     :param list connections: The connections list from a data dictionary"""
 
+    atoms = {atom.id: atom for atom in model.atoms()}
     for connection in connections:
-        try:
-            connection["bond_to"].remove(connection["atom"])
-        except: pass
-        atom = model.atom(id=connection["atom"])
+        atom = atoms.get(connection["atom"])
         if atom:
             for other in connection["bond_to"]:
-                other_atom = model.atom(id=other)
-                if other_atom:
+                other_atom = atoms.get(other)
+                if other_atom and other_atom is not atom:
                     atom.bond_to(other_atom)
 
 
 
+WATER_NAMES = ("HOH", "WAT")
+
+HYDROGEN_ELEMENTS = ("H", "D")
+
 DATA_DICT = {
  "description": {
   "code": None,
@@ -239,3 +356,42 @@ ATOM_DICT = {
  "polymer": False,
  "full_res_id": None
 }
+
+
+def new_model_dict():
+    """Creates a new, empty model dictionary. This, and the other functions
+    below, are much cheaper than deep-copying the template dictionaries above,
+    which matters when they are called once for every atom in a file.
+
+    :rtype: ``dict``"""
+
+    return {key: [] for key in MODEL_DICT}
+
+
+def new_chain_dict(**values):
+    """Creates a new chain dictionary with default values, updated with any
+    values given.
+
+    :rtype: ``dict``"""
+
+    return {**CHAIN_DICT, "full_sequence": [], **values}
+
+
+def new_residue_dict(**values):
+    """Creates a new residue dictionary with default values, updated with any
+    values given.
+
+    :rtype: ``dict``"""
+
+    return {**RESIDUE_DICT, **values}
+
+
+def new_atom_dict(**values):
+    """Creates a new atom dictionary with default values, updated with any
+    values given.
+
+    :rtype: ``dict``"""
+
+    return {**ATOM_DICT, "anisotropy": [], **values}
+
+BOND_TEMPLATES = compile_bond_templates(BONDS)
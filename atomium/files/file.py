@@ -217,7 +217,8 @@ class File:
 
     @property
     def models(self):
-        """The structure's models.
+        """The structure's models. Files which have been parsed only create
+        each model the first time it is accessed.
 
         :rtype: ``list``"""
 
@@ -1,172 +1,239 @@
 """Contains functions for dealing with the .mmcif file format."""
 
-import shlex
 import re
+from math import ceil
+import numpy as np
 from copy import deepcopy
 from datetime import datetime
-from .data import generate_higher_structures, DATA_DICT, MODEL_DICT, ATOM_DICT
-
-def mmcif_string_to_mmcif_dict(filestring):
+from collections import OrderedDict
+from .data import generate_higher_structures, atom_filter, DATA_DICT, ATOM_DICT
+from .data import new_model_dict, new_atom_dict
+
+TOKEN = re.compile(
+ r"""'(.*?)'(?=\s|$)|"(.*?)"(?=\s|$)|(#.*)|(\S+)"""
+)
+COORDINATE_CATEGORIES = (
+ "atom_site", "atom_site_anisotrop", "pdbx_poly_seq_scheme"
+)
+
+def mmcif_string_to_mmcif_dict(filestring, header_only=False):
     """Takes the filecontents of a .cif file and produces an atomium data
-    dictionary from them.
+    dictionary from them (see :py:func:`.mmcif_lines_to_mmcif_dict`).
 
     :param str filestring: The contents of a .cif file.
+    :param bool header_only: If ``True``, the categories in\
+    ``COORDINATE_CATEGORIES`` are not read.
     :rtype: ``dict``"""
 
-    lines = list(filter(lambda l: l and l[0] != "#", filestring.split("\n")))
-    lines = consolidate_strings(lines)
-    blocks = mmcif_lines_to_mmcif_blocks(lines)
-    mmcif_dict = {}
-    for block in blocks:
-        if block["lines"][0] == "loop_":
-            mmcif_dict[block["category"]] = loop_block_to_list(block)
-        else:
-            mmcif_dict[block["category"]] = category_block_to_dict(block)
-    strip_quotes(mmcif_dict)
+    return mmcif_lines_to_mmcif_dict(filestring.split("\n"), header_only)
+
+
+def mmcif_lines_to_mmcif_dict(lines, header_only=False):
+    """Takes an iterable of lines from a .cif file, without their line
+    endings, and produces an atomium data dictionary from them. The lines are
+    only read as they are needed, so the file never has to be held in memory
+    as one string.
+
+    The file is read in a single pass over its tokens, so the time taken grows
+    linearly with the size of the file. If only the header is wanted, the
+    lines of the coordinate categories (which make up nearly all of a typical
+    file) are skipped without being tokenised.
+
+    :param lines: The lines to read.
+    :param bool header_only: If ``True``, the categories in\
+    ``COORDINATE_CATEGORIES`` are not read.
+    :rtype: ``dict``"""
+
+    mmcif_dict, category, names, values = {}, None, None, None
+    tag, in_loop = None, False
+    skip = COORDINATE_CATEGORIES if header_only else ()
+    for token, quoted in mmcif_lines_to_tokens(lines, skip):
+        if not quoted and token[0] == "_":
+            token_category, _, name = token[1:].partition(".")
+            if in_loop and values is None:
+                names.append(name)
+                category = token_category
+                continue
+            if in_loop:
+                mmcif_dict[category] = LoopTable(names, values or [])
+            if in_loop or token_category != category:
+                category, in_loop = token_category, False
+                mmcif_dict[category] = [{}]
+            tag = name
+        elif not quoted and (token == "loop_" or token.startswith("data_")):
+            if in_loop:
+                mmcif_dict[category] = LoopTable(names, values or [])
+            in_loop, category, tag = token == "loop_", None, None
+            names, values = [], None
+        elif in_loop:
+            if values is None: values = []
+            values.append(token)
+        elif tag:
+            mmcif_dict[category][0][tag] = " ".join(token.split())\
+             if quoted else token
+            tag = None
+    if in_loop: mmcif_dict[category] = LoopTable(names, values or [])
     return mmcif_dict
 
 
-def consolidate_strings(lines):
-    """In the .mmcif format, long strings are placed on a line of their own and
-    marked with semi-colons. This function goes through the lines of such a file
-    and creates new lines where these strings are on the preceding line where
-    they semantically belong.
+def mmcif_lines_to_tokens(lines, skip=()):
+    """Takes the lines of a .cif file and yields its tokens one at a
+    time, as ``(token, quoted)`` tuples. Comments are discarded, quoted values
+    have their quote marks removed (a quote only ends a value if followed by
+    whitespace, so values can contain quotes), and semicolon text fields are
+    returned as a single value, with their lines joined by spaces.
 
-    :param list lines: The lines of a .mmcif file.
-    :rtype: ``list``"""
+    :param lines: The lines of a .cif file.
+    :param skip: The names of any categories whose lines should be skipped.
+    :rtype: ``tuple``"""
 
-    new_lines = []
-    while lines:
-        line = lines.pop(0)
-        if line.startswith(";"):
-            string = [line[1:].strip()]
-            while not lines[0].startswith(";"):
-                string.append(lines.pop(0))
-            lines.pop(0)
-            new_lines[-1] += " \"{}\"".format(" ".join(string))
+    text = None
+    if skip: lines = skip_categories(lines, skip)
+    for line in lines:
+        if text is not None:
+            if line.startswith(";"):
+                yield " ".join(text), True
+                text = None
+            elif line: text.append(line)
+        elif line.startswith(";"):
+            text = [line[1:].strip()]
+        elif "'" in line or '"' in line or "#" in line:
+            for match in TOKEN.finditer(line):
+                single, double, comment, token = match.groups()
+                if comment: break
+                if token is None:
+                    yield (double if single is None else single), True
+                else: yield token, False
         else:
-            new_lines.append(line)
-    return new_lines
+            for token in line.split(): yield token, False
+    if text is not None: yield " ".join(text), True
 
 
-def mmcif_lines_to_mmcif_blocks(lines):
-    """Takes a list if .mmcif lines and groups them into blocks based on
-    category name.
+def skip_categories(lines, categories):
+    """Takes the lines of a .cif file and yields them, leaving out the lines
+    belonging to certain categories - their names, their values, and the
+    ``loop_`` line before them if they are loops. Only the first character of
+    most lines needs to be looked at, as a category's values end at the next
+    name, ``loop_``, data block or comment line.
 
-    :param list lines: The lines of a .mmcif file.
-    :rtype: ``list``"""
+    :param lines: The lines of a .cif file.
+    :param categories: The names of the categories to leave out.
+    :rtype: ``str``"""
 
-    category = None
-    block, blocks = [], []
-    while lines:
-        line = lines.pop(0)
-        if line.startswith("data_"): continue
-        if line.startswith("_"):
-            line_category = line.split(".")[0]
-            if line_category != category:
-                if category:
-                    blocks.append({"category": category[1:], "lines": block})
-                category = line_category
-                block = []
+    loop, skipping, in_text = None, False, False
+    for line in lines:
+        first = line[:1]
+        if first == ";" or in_text:
+            if first == ";": in_text = not in_text
+            if not skipping: yield line
+            continue
+        if skipping:
+            if first == "_":
+                if line[1:].partition(".")[0] in categories: continue
+            elif first != "#" and not line.startswith(("loop_", "data_")):
+                continue
+            skipping = False
+        if loop is not None:
+            if not line.strip(): continue
+            if first == "_" and line[1:].partition(".")[0] in categories:
+                loop, skipping = None, True
+                continue
+            yield loop
+            loop = None
         if line.startswith("loop_"):
-            if category:
-                blocks.append({"category": category[1:], "lines": block})
-            category = lines[0].split(".")[0]
-            block = []
-        block.append(line)
-    if block: blocks.append({"category": category[1:], "lines": block})
-    return blocks
+            loop = line
+        elif first == "_" and line[1:].partition(".")[0] in categories:
+            skipping = True
+        else: yield line
+    if loop is not None: yield loop
+
+
+class LoopTable:
+    """A table of values from a loop in a .cif file. The values are stored as
+    one list per column rather than one ``dict`` per row, which makes large
+    tables such as ``atom_site`` far cheaper to create and to read whole
+    columns from.
+
+    It otherwise behaves like a list of row dictionaries - it can be indexed,
+    sliced, iterated over and compared with lists - but each row's ``dict`` is
+    only created when that row is asked for, so changing it will not change
+    the table.
+
+    :param list names: The column names.
+    :param list values: The loop's values, in order."""
+
+    def __init__(self, names, values):
+        width = len(names)
+        self._columns = OrderedDict(
+         (name, values[index::width]) for index, name in enumerate(names)
+        )
+        self._length = ceil(len(values) / width) if width else 0
+
 
+    def __repr__(self):
+        return "<LoopTable ({} column{}, {} row{})>".format(
+         len(self._columns), "" if len(self._columns) == 1 else "s",
+         self._length, "" if self._length == 1 else "s"
+        )
 
-def category_block_to_dict(block):
-    """Takes a category block from a .mmcif file and turns it into a dictionary.
 
-    :param dict block: The block to convert.
-    :rtype: ``dict``"""
+    def __len__(self):
+        return self._length
 
-    d = {}
-    category = block["lines"][0].split(".")[0]
-    for index in range(len(block["lines"]) - 1):
-        if block["lines"][index + 1][0] != "_":
-            block["lines"][index] += " " + block["lines"][index + 1]
-    block["lines"] = [l for l in block["lines"] if l[0] == "_"]
-    for line in block["lines"]:
-        name = line.split(".")[1].split()[0]
-        value = line
-        if line.startswith("_"):
-            value = " ".join(line.split()[1:])
-        if value[0] == "'" and value[-1] == "'": value = value[1:-1]
-        d[name] = value
-    return [d]
-
-
-def loop_block_to_list(block):
-    """Takes a loop block from a .mmcif file and turns it into a table list.
-
-    :param dict block: The block to convert.
-    :rtype: ``list``"""
 
-    names = [l for l in block["lines"] if l.startswith("_" + block["category"])]
-    lines = [l for l in block["lines"][1:] if l not in names]
-    names = [l.split(".")[1].split()[0] for l in names]
-    lines = [split_values(l) for l in lines]
-    l = []
-    for n in range(len(lines) - 1):
-        while n < len(lines) - 1 and\
-         len(lines[n]) + len(lines[n + 1]) <= len(names):
-            lines[n] += lines[n + 1]
-            lines.pop(n + 1)
-    for line in lines:
-        l.append({
-         name: value for name, value in zip(names, line)
-        })
-    return l
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if index < 0: index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("LoopTable index out of range")
+        return OrderedDict((name, column[index])
+         for name, column in self._columns.items() if index < len(column))
 
 
-def split_values(line):
-    """Takes a line and splits it on strings, ignoring those in strings. Like
-    ``shlex.split()`` only faster and it handles quotes inside strings.
+    def __iter__(self):
+        for index in range(self._length):
+            yield self[index]
 
-    :param str line: The line to split.
-    :rtype: ``list``"""
-    if not re.search("[\'\"]", line): return line.split()
-    chars = list(line.strip())
-    values, value, in_string = [], [], False
-    while chars:
-        char = chars.pop(0)
-        if char == " " and not in_string:
-            values.append(value)
-            value = []
-        elif char in "'\"":
-            if in_string and chars and chars[0] != " ":
-                value.append(char)
-            else:
-                in_string = not in_string
-        else:
-            value.append(char)
-    values.append(value)
-    return ["".join(v) for v in values if v]
+
+    def __eq__(self, other):
+        if isinstance(other, (LoopTable, list)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
 
 
-def strip_quotes(mmcif_dict):
-    """Takes a finished mmcif dictionary, and trims any strings that have now
-    unneeded quote marks around them.
+    @property
+    def names(self):
+        """The table's column names.
 
-    :param dict mmcif_dict: The ``dict`` to clean up."""
+        :rtype: ``tuple``"""
 
-    for key, value in mmcif_dict.items():
-        dicts = [value] if isinstance(value, dict) else value
-        for d in dicts:
-            for key2, value2 in d.items():
-                if value2[0] == '"' and value2[-1] == '"':
-                    d[key2] = value2[1:-1]
+        return tuple(self._columns)
 
 
-def mmcif_dict_to_data_dict(mmcif_dict):
+    def column(self, name):
+        """Returns all the values in one of the table's columns. This is the
+        list stored by the table itself, so it should not be modified.
+
+        :param str name: The name of the column.
+        :raises KeyError: if there is no such column.
+        :rtype: ``list``"""
+
+        return self._columns[name]
+
+
+def mmcif_dict_to_data_dict(mmcif_dict, model=None, **filters):
     """Takes a basic .mmcif dict and turns it into a standard atomium data
     dictionary.
 
+    A single model can be asked for, and atoms can be filtered out using any
+    of the filters that :py:func:`.atom_filter` accepts - rows of the
+    atom_site table which are filtered out are never converted.
+
     :param dict mmcif_dict: The .mmcif dictionary.
+    :param int model: The model to keep, counting from 1.
+    :param \*\*filters: Any of ``chains``, ``water``, ``hydrogens`` and\
+    ``altloc``.
     :rtype: ``dict``"""
 
     d = deepcopy(DATA_DICT)
@@ -174,7 +241,7 @@ def mmcif_dict_to_data_dict(mmcif_dict):
     update_experiment_dict(mmcif_dict, d)
     update_quality_dict(mmcif_dict, d)
     update_geometry_dict(mmcif_dict, d)
-    update_models_list(mmcif_dict, d)
+    update_models_list(mmcif_dict, d, model, **filters)
     return d
 
 
@@ -265,6 +332,7 @@ def update_geometry_dict(mmcif_dict, data_dict):
     :param dict data_dict: The data dictionary to update."""
 
     assembly_ids = [a["id"] for a in mmcif_dict.get("pdbx_struct_assembly", [])]
+    operators = table_index(mmcif_dict.get("pdbx_struct_oper_list", []), "id")
     for a_id in assembly_ids:
         assembly = {
          "id": int(a_id), "surface_area": None, "buried_surface_area": None,
@@ -272,44 +340,72 @@ def update_geometry_dict(mmcif_dict, data_dict):
         }
         assign_software_to_assembly(assembly, mmcif_dict)
         assign_metrics_to_assembly(assembly, mmcif_dict)
-        assign_transformations_to_assembly(assembly, mmcif_dict)
+        assign_transformations_to_assembly(assembly, mmcif_dict, operators)
         data_dict["geometry"]["assemblies"].append(assembly)
 
 
-def update_models_list(mmcif_dict, data_dict):
+def update_models_list(mmcif_dict, data_dict, model=None, **filters):
     """Creates the models component of a standard atomium data dictionary
     from a .mmcif dictionary.
 
     :param dict mmcif_dict: The .mmcif dictionary.
-    :param dict data_dict: The data dictionary to update."""
-
-    model = deepcopy(MODEL_DICT)
-    model_num = int(mmcif_dict["atom_site"][0]["pdbx_PDB_model_num"])
-    for line in mmcif_dict["atom_site"]:
-        if model["atoms"] and int(line["pdbx_PDB_model_num"]) > model_num:
-            model_num = int(line["pdbx_PDB_model_num"])
-            if model["atoms"]:
-                data_dict["models"].append(model)
-                model = deepcopy(MODEL_DICT)
-        model["atoms"].append(atom_line_to_atom_dict(line))
+    :param dict data_dict: The data dictionary to update.
+    :param int model: The model to keep, counting from 1.
+    :param \*\*filters: The filters to pass to :py:func:`.atom_filter`."""
+
+    if "atom_site" not in mmcif_dict: return
+    atom_site = mmcif_dict["atom_site"]
+    model_nums = [int(n) for n in table_column(atom_site, "pdbx_PDB_model_num")]
+    rows = atom_site_rows(atom_site, model_nums, model, atom_filter(**filters))
+    if rows is not None: model_nums = [model_nums[row] for row in rows]
+    if not model_nums: return
+    model = new_model_dict()
+    model_num = model_nums[0]
+    for num, atom in zip(model_nums, atom_site_to_atom_dicts(atom_site, rows)):
+        if model["atoms"] and num > model_num:
+            model_num = num
+            data_dict["models"].append(model)
+            model = new_model_dict()
+        model["atoms"].append(atom)
     if model["atoms"]: data_dict["models"].append(model)
     generate_higher_structures(data_dict["models"])
+    sequences = {}
+    for res in mmcif_dict.get("pdbx_poly_seq_scheme", []):
+        sequences.setdefault(res["pdb_strand_id"], []).append(res["mon_id"])
+    anisotropy = table_index(
+     mmcif_dict.get("atom_site_anisotrop", []), "id", convert=float
+    )
     for model in data_dict["models"]:
-        for res in mmcif_dict.get("pdbx_poly_seq_scheme", []):
-            for chain in model["chains"]:
-                if res["pdb_strand_id"] == chain["id"]:
-                    chain["full_sequence"].append(res["mon_id"])
+        for chain in model["chains"]:
+            chain["full_sequence"].extend(sequences.get(chain["id"], []))
         for atom in model["atoms"]:
-            for anisou in mmcif_dict.get("atom_site_anisotrop", []):
-                if float(anisou["id"]) == atom["id"]:
-                    for x in ("11", "12", "13", "22", "23", "33"):
-                        atom["anisotropy"].append(
-                         float(anisou["U[{}][{}]".format(*list(x))]) / 10000
-                        )
-                    break
+            anisou = anisotropy.get(atom["id"])
+            if anisou:
+                for x in ("11", "12", "13", "22", "23", "33"):
+                    atom["anisotropy"].append(
+                     float(anisou["U[{}][{}]".format(*list(x))]) / 10000
+                    )
             else: atom["anisotropy"] = [0, 0, 0, 0, 0, 0]
 
 
+def table_index(table, column, convert=None):
+    """Takes a table from a .mmcif dictionary and indexes its rows by the value
+    they have in one column, so that a row can be looked up by that value
+    without scanning the whole table. If several rows share a value, the first
+    of them is used.
+
+    :param list table: The table to index.
+    :param str column: The column whose values should be the keys.
+    :param convert: A function to apply to the values before using them.
+    :rtype: ``dict``"""
+
+    index = {}
+    for row in table:
+        key = convert(row[column]) if convert else row[column]
+        if key not in index: index[key] = row
+    return index
+
+
 def assign_software_to_assembly(assembly, mmcif_dict):
     """Takes an assembly dict, and goes through an mmcif dictionary looking for
     relevant software information to update it with.
@@ -340,26 +436,32 @@ def assign_metrics_to_assembly(assembly, mmcif_dict):
                 assembly["buried_surface_area"] = float(a["value"])
 
 
-def assign_transformations_to_assembly(assembly, mmcif_dict):
+def assign_transformations_to_assembly(assembly, mmcif_dict, operators=None):
     """Takes an assembly dict, and goes through an mmcif dictionary looking for
     relevant transformation information to update it with.
 
+    The operators can be supplied already indexed by ID, so that the operator
+    table only needs indexing once for all the assemblies in a file.
+
     :param dict assembly: The assembly to update.
-    :param dict mmcif_dict: The dictionary to read."""
+    :param dict mmcif_dict: The dictionary to read.
+    :param dict operators: The file's operators, indexed by ID."""
 
+    if operators is None:
+        operators = table_index(mmcif_dict.get("pdbx_struct_oper_list", []), "id")
     for a in mmcif_dict.get("pdbx_struct_assembly_gen", []):
         if a["assembly_id"] == str(assembly["id"]):
             t_ids = get_transformation_ids(a["oper_expression"])
             for t_id in t_ids:
-                for oper in mmcif_dict["pdbx_struct_oper_list"]:
-                    if oper["id"] == t_id:
-                        assembly["transformations"].append({
-                         "chains": a["asym_id_list"].split(","),
-                         "matrix": [[float(oper["matrix[{}][{}]".format(x, y)])
-                          for y in (1, 2, 3)] for x in (1, 2, 3)],
-                         "vector": [float(oper["vector[{}]".format(y)])
-                          for y in (1, 2, 3)]
-                        })
+                oper = operators.get(t_id)
+                if oper:
+                    assembly["transformations"].append({
+                     "chains": a["asym_id_list"].split(","),
+                     "matrix": [[float(oper["matrix[{}][{}]".format(x, y)])
+                      for y in (1, 2, 3)] for x in (1, 2, 3)],
+                     "vector": [float(oper["vector[{}]".format(y)])
+                      for y in (1, 2, 3)]
+                    })
 
 
 def get_transformation_ids(expression):
@@ -384,32 +486,114 @@ def get_transformation_ids(expression):
         return expression.split(",")
 
 
-def atom_line_to_atom_dict(d):
-    """Takes an atom dictionary from an mmcif dictionary and turns it into an
-    atomium atom dictionary.
+def atom_site_rows(atom_site, model_nums, model=None, keep=None):
+    """Works out which rows of the atom_site table of an mmcif dictionary are
+    wanted, when only one model is wanted or atoms are being filtered. Only
+    the columns the filters need are read. If every row is wanted, ``None`` is
+    returned.
 
-    :param dict d: The mmcif atom dict.
-    :rtype: ``dict``"""
+    :param atom_site: The ``LoopTable`` (or list of row dicts) to read.
+    :param list model_nums: The model number of each row.
+    :param int model: The model to keep, counting from 1.
+    :param function keep: A function from :py:func:`.atom_filter` which\
+    decides which rows are kept.
+    :rtype: ``list``"""
 
-    a = deepcopy(ATOM_DICT)
-    table = [
-     ["id", int, "id"], ["element", lambda v: v, "type_symbol"],
-     ["name", lambda v: v, "label_atom_id"],
-     ["alt_loc", lambda v: v, "label_alt_id"],
-     ["x", float, "Cartn_x"], ["y", float, "Cartn_y"], ["z", float, "Cartn_z"],
-     ["residue_id", int, "auth_seq_id"],
-     ["residue_name", lambda v: v, "label_comp_id"],
-     ["residue_insert", lambda v: v, "pdbx_PDB_ins_code"],
-     ["chain_id", lambda v: v, "auth_asym_id"],
-     ["bfactor", float, "B_iso_or_equiv"], ["occupancy", float, "occupancy"],
-     ["charge", float, "pdbx_formal_charge"],
-    ]
-    for row in table:
-        if d[row[2]] not in "?.":
-            a[row[0]] = row[1](d[row[2]])
-    a["full_res_id"] = "{}:{}{}".format(
-     a["chain_id"] or "", str(a["residue_id"] or "") or "", a["residue_insert"]
-    )
-    if a["full_res_id"] == ":": a["full_res_id"] = None
-    a["polymer"] = d["label_seq_id"] != "."
-    return a
+    if model is None and keep is None: return None
+    rows = range(len(model_nums))
+    if model is not None:
+        numbers = list(OrderedDict.fromkeys(model_nums))[model - 1:model]
+        rows = [row for row in rows if numbers and model_nums[row] in numbers]
+    if keep is not None:
+        chain_ids, names, elements, alt_locs, residue_ids, inserts = [
+         table_column(atom_site, name, "?") for name in (
+          "auth_asym_id", "label_comp_id", "type_symbol", "label_alt_id",
+          "auth_seq_id", "pdbx_PDB_ins_code"
+         )
+        ]
+        rows = [row for row in rows if keep(
+         chain_ids[row], names[row], elements[row],
+         None if alt_locs[row] in "?." else alt_locs[row],
+         (model_nums[row], chain_ids[row], residue_ids[row], inserts[row])
+        )]
+    return list(rows)
+
+
+def atom_site_to_atom_dicts(atom_site, rows=None):
+    """Takes the atom_site table of an mmcif dictionary and creates an atomium
+    atom dictionary for each row. The table is converted a column at a time,
+    and no dictionary is created for any of its rows.
+
+    :param atom_site: The ``LoopTable`` (or list of row dicts) to read.
+    :param list rows: If given, only these rows are converted.
+    :rtype: ``list``"""
+
+    columns = []
+    for key, convert, name in ATOM_SITE_COLUMNS:
+        values = table_column(atom_site, name, "?")
+        if rows is not None: values = [values[row] for row in rows]
+        columns.append(convert_column(values, convert, ATOM_DICT[key]))
+    polymer = [v != "." for v in table_column(atom_site, "label_seq_id", ".")]
+    if rows is not None: polymer = [polymer[row] for row in rows]
+    atoms = []
+    for (id_, element, name, alt_loc, x, y, z, residue_id, residue_name,
+     residue_insert, chain_id, bfactor, occupancy, charge, is_polymer)\
+     in zip(*columns, polymer):
+        full_res_id = "{}:{}{}".format(
+         chain_id or "", str(residue_id or ""), residue_insert
+        )
+        atoms.append(new_atom_dict(
+         id=id_, element=element, name=name, x=x, y=y, z=z, bfactor=bfactor,
+         charge=charge, residue_id=residue_id, residue_name=residue_name,
+         residue_insert=residue_insert, chain_id=chain_id,
+         occupancy=occupancy, alt_loc=alt_loc, polymer=is_polymer,
+         full_res_id=None if full_res_id == ":" else full_res_id
+        ))
+    return atoms
+
+
+ATOM_SITE_COLUMNS = [
+ ["id", int, "id"], ["element", None, "type_symbol"],
+ ["name", None, "label_atom_id"], ["alt_loc", None, "label_alt_id"],
+ ["x", float, "Cartn_x"], ["y", float, "Cartn_y"], ["z", float, "Cartn_z"],
+ ["residue_id", int, "auth_seq_id"], ["residue_name", None, "label_comp_id"],
+ ["residue_insert", None, "pdbx_PDB_ins_code"],
+ ["chain_id", None, "auth_asym_id"], ["bfactor", float, "B_iso_or_equiv"],
+ ["occupancy", float, "occupancy"], ["charge", float, "pdbx_formal_charge"]
+]
+
+
+def table_column(table, name, default=None):
+    """Gets all the values in one column of a table in an mmcif dictionary,
+    which can be a :py:class:`.LoopTable` or a list of row dicts. If the column
+    is missing, every row gets the default value.
+
+    :param table: The table to read.
+    :param str name: The name of the column.
+    :param default: The value to use if there is no such column.
+    :rtype: ``list``"""
+
+    if isinstance(table, LoopTable):
+        try:
+            return table.column(name)
+        except KeyError: return [default] * len(table)
+    return [row.get(name, default) for row in table]
+
+
+def convert_column(values, convert, default):
+    """Converts a column of .mmcif values to Python values. Values marked as
+    unknown or inapplicable (``?`` or ``.``) get the default value instead.
+    Columns of floats are parsed with NumPy in a single step where possible.
+
+    :param list values: The values to convert.
+    :param convert: The function to convert values with, or ``None``.
+    :param default: The value to use for unknown values.
+    :rtype: ``list``"""
+
+    if convert is float:
+        try:
+            return np.array(values, dtype=float).tolist()
+        except ValueError: pass
+    if convert is None:
+        return [default if v in "?." else v for v in values]
+    return [default if v in "?." else convert(v) for v in values]
@@ -5,65 +5,146 @@ from itertools import groupby, chain
 from math import ceil
 from datetime import datetime
 import re
-from .data import generate_higher_structures
-from .data import DATA_DICT, MODEL_DICT, CHAIN_DICT, RESIDUE_DICT, ATOM_DICT
+import gc
+import numpy as np
+from .data import generate_higher_structures, atom_filter
+from .data import DATA_DICT, new_model_dict, new_atom_dict
 from ..models.data import CODES
 
-def pdb_string_to_pdb_dict(filestring):
+MODEL_RECORDS = ("ATOM", "HETATM", "ANISOU", "MODEL", "TER", "ENDMDL")
+COORDINATES = re.compile(r"^(?:ATOM |HETATM|ANISOU|MODEL |TER\b|ENDMDL)", re.M)
+ATOM_WIDTH = 76
+
+def pdb_string_to_pdb_dict(filestring, header_only=False):
     """Takes the filecontents of a .pdb file and produces an pdb file
     dictionary from them.
 
+    If only the header is wanted, everything from the first coordinate record
+    onwards is ignored, and the dictionary will have no models.
+
     :param str filestring: The contents of a .pdb file.
+    :param bool header_only: If ``True``, no models are read.
+    :rtype: ``dict``"""
+
+    pdb_dict = {}
+    if header_only:
+        match = COORDINATES.search(filestring)
+        if match: filestring = filestring[:match.start()]
+    models = list(pdb_lines_to_model_dicts(filestring.split("\n"), pdb_dict))
+    pdb_dict["MODEL"] = [] if header_only else models
+    return pdb_dict
+
+
+def pdb_lines_to_pdb_dict(lines, header_only=False):
+    """Takes an iterable of lines from a .pdb file, such as an open file, and
+    produces a pdb file dictionary from them, just as
+    :py:func:`.pdb_string_to_pdb_dict` would from the whole file. The file
+    never has to be held in memory as one string.
+
+    If only the header is wanted, no lines are read after the first coordinate
+    record, and the dictionary will have no models.
+
+    :param lines: The lines to read.
+    :param bool header_only: If ``True``, no models are read.
     :rtype: ``dict``"""
 
     pdb_dict = {}
-    lines = list(filter(lambda l: bool(l.strip()), filestring.split("\n")))
-    lines = [[line[:6].rstrip(), line[6:].rstrip()] for line in lines]
-    pre_m, model, post_m = [], [], []
-    model_recs = ("ATOM", "HETATM", "ANISOU", "MODEL", "TER", "ENDMDL")
-    for l in lines:
-        (model if l[0] in model_recs else post_m if model else pre_m).append(l)
-    for line in pre_m:
-        if line[0] == "REMARK":
+    if header_only: lines = pdb_header_lines(lines)
+    models = list(pdb_lines_to_model_dicts(lines, pdb_dict))
+    pdb_dict["MODEL"] = [] if header_only else models
+    return pdb_dict
+
+
+def pdb_header_lines(lines):
+    """Takes an iterable of lines from a .pdb file, such as an open file, and
+    yields them up to the first coordinate record, reading no further.
+
+    :param lines: The lines to read.
+    :rtype: ``str``"""
+
+    for line in lines:
+        if line[:6].rstrip() in MODEL_RECORDS: return
+        yield line
+
+
+def pdb_lines_to_model_dicts(lines, pdb_dict):
+    """Takes an iterable of lines from a .pdb file, such as an open file, and
+    yields a .pdb model dictionary for each model it contains, as soon as that
+    model's lines have been read. Only one model's lines are held in memory at
+    any one time.
+
+    All records which aren't part of a model are added to the .pdb dictionary
+    supplied as they are read - so by the time the first model is yielded, all
+    the header records before it will be present.
+
+    If the file has no MODEL records, all its coordinate records are treated as
+    a single model.
+
+    :param lines: The lines to read.
+    :param dict pdb_dict: The .pdb dictionary to put non-model records in.
+    :rtype: ``dict``"""
+
+    model_lines, in_models, has_models, open_model = [], False, False, False
+    for line in lines:
+        if not line.strip(): continue
+        record, contents = line[:6].rstrip(), line[6:].rstrip()
+        if record in MODEL_RECORDS:
+            in_models = True
+            if record == "MODEL":
+                has_models, open_model = True, True
+            elif record == "ENDMDL":
+                if open_model: yield model_lines_to_model_dict(model_lines)
+                model_lines, open_model = [], False
+            else:
+                model_lines.append((record, contents))
+        elif not in_models and record == "REMARK":
             if "REMARK" not in pdb_dict: pdb_dict["REMARK"] = {}
-            number = line[1].lstrip().split()[0]
+            number = contents.lstrip().split()[0]
             try:
-                pdb_dict["REMARK"][number].append(line[1][4:])
-            except: pdb_dict["REMARK"][number] = [line[1][4:]]
+                pdb_dict["REMARK"][number].append(contents[4:])
+            except: pdb_dict["REMARK"][number] = [contents[4:]]
         else:
             try:
-                pdb_dict[line[0]].append(line[1])
-            except: pdb_dict[line[0]] = [line[1]]
-    pdb_dict["MODEL"], m, het = [], {"ATOM": []}, True
-    for line in model[::-1]:
-        if line[0] == "ENDMDL":
-            m, het = {"ATOM": []}, True
-        elif line[0] == "MODEL":
-            pdb_dict["MODEL"].append(m)
-        else:
-            if line[0] == "TER": het = False
-            if het and line[0] == "ATOM": line[0] = "HETATM"
-            if not het and line[0] == "HETATM": line[0] = "ATOM"
-            try:
-                m[line[0]].append(line[1])
-            except: m[line[0]] = [line[1]]
-    if not pdb_dict["MODEL"]: pdb_dict["MODEL"].append(m)
-    pdb_dict["MODEL"].reverse()
-    for m in pdb_dict["MODEL"]:
-        if "ATOM" in m: m["ATOM"].reverse()
-        if "HETATM" in m: m["HETATM"].reverse()
-    for line in post_m:
+                pdb_dict[record].append(contents)
+            except: pdb_dict[record] = [contents]
+    if open_model or not has_models:
+        yield model_lines_to_model_dict(model_lines)
+
+
+def model_lines_to_model_dict(lines):
+    """Takes the ``(record, contents)`` pairs of a single model and sorts them
+    into a .pdb model dictionary. Any ATOM or HETATM records after the model's
+    last TER record are treated as HETATM records, and those before it as ATOM
+    records.
+
+    :param list lines: The model's records.
+    :rtype: ``dict``"""
+
+    model = {"ATOM": []}
+    last_ter = max(
+     [i for i, line in enumerate(lines) if line[0] == "TER"], default=-1
+    )
+    for index, (record, contents) in enumerate(lines):
+        if record in ("ATOM", "HETATM"):
+            record = "ATOM" if index < last_ter else "HETATM"
         try:
-            pdb_dict[line[0]].append(line[1])
-        except: pdb_dict[line[0]] = [line[1]]
-    return pdb_dict
+            model[record].append(contents)
+        except: model[record] = [contents]
+    return model
 
 
-def pdb_dict_to_data_dict(pdb_dict):
+def pdb_dict_to_data_dict(pdb_dict, model=None, **filters):
     """Takes a basic .pdb dict and turns it into a standard atomium data
     dictionary.
 
+    A single model can be asked for, and atoms can be filtered out using any
+    of the filters that :py:func:`.atom_filter` accepts - atoms which are
+    filtered out never have atom dictionaries made for them.
+
     :param dict pdb_dict: The .pdb dictionary.
+    :param int model: The model to keep, counting from 1.
+    :param \*\*filters: Any of ``chains``, ``water``, ``hydrogens`` and\
+    ``altloc``.
     :rtype: ``dict``"""
 
     d = deepcopy(DATA_DICT)
@@ -71,7 +152,7 @@ def pdb_dict_to_data_dict(pdb_dict):
     update_experiment_dict(pdb_dict, d)
     update_quality_dict(pdb_dict, d)
     update_geometry_dict(pdb_dict, d)
-    update_models_list(pdb_dict, d)
+    update_models_list(pdb_dict, d, model, **filters)
     return d
 
 
@@ -120,26 +201,65 @@ def update_geometry_dict(pdb_dict, data_dict):
     extract_assembly_remark(pdb_dict, data_dict["geometry"])
 
 
-def update_models_list(pdb_dict, data_dict):
+def update_models_list(pdb_dict, data_dict, model=None, **filters):
     """Creates the models component of a standard atomium data dictionary
-    from a .pdb dictionary.
+    from a .pdb dictionary. Models which the filters leave without any atoms
+    are discarded, as they are for .mmcif files.
 
     :param dict pdb_dict: The .pdb dictionary to update.
-    :param dict data_dict: The data dictionary to update."""
-
-    for model_dict in pdb_dict["MODEL"]:
-        model = deepcopy(MODEL_DICT)
-        for line in model_dict.get("ATOM", []):
-            model["atoms"].append(atom_line_to_atom_dict(line))
-        for line in model_dict.get("HETATM", []):
-            model["atoms"].append(atom_line_to_atom_dict(line, polymer=False))
-        assign_anisou(model_dict, model)
-        data_dict["models"].append(model)
+    :param dict data_dict: The data dictionary to update.
+    :param int model: The model to keep, counting from 1.
+    :param \*\*filters: The filters to pass to :py:func:`.atom_filter`."""
+
+    model_dicts = pdb_dict["MODEL"]
+    if model is not None: model_dicts = model_dicts[model - 1:model]
+    keep = atom_filter(**filters)
+    for model_dict in model_dicts:
+        data_model = model_dict_to_data_model(model_dict, keep)
+        if keep is None or data_model["atoms"]:
+            data_dict["models"].append(data_model)
     generate_higher_structures(data_dict["models"])
     extract_sequence(pdb_dict, data_dict["models"])
     extract_connections(pdb_dict, data_dict["models"])
 
 
+def model_dict_to_data_model(model_dict, keep=None):
+    """Takes a .pdb model dictionary and creates the atoms of a standard
+    atomium model dictionary from it. Higher structures, sequences and
+    connections are not added.
+
+    :param dict model_dict: The .pdb model dictionary to read.
+    :param function keep: A function from :py:func:`.atom_filter` which\
+    decides which atom records are used.
+    :rtype: ``dict``"""
+
+    model = new_model_dict()
+    for record, polymer in (("ATOM", True), ("HETATM", False)):
+        lines = model_dict.get(record, [])
+        if keep is not None:
+            lines = [line for line in lines if keep_atom_line(line, keep)]
+        model["atoms"] += atom_lines_to_atom_dicts(lines, polymer)
+    assign_anisou(model_dict, model)
+    return model
+
+
+def pdb_lines_to_data_models(lines):
+    """Takes an iterable of lines from a .pdb file and yields a standard
+    atomium model dictionary for each model in it, one at a time. The models
+    have their chains, residues, ligands and sequences, but as CONECT records
+    come after all the models in a .pdb file, they have no connections.
+
+    :param lines: The lines to read.
+    :rtype: ``dict``"""
+
+    pdb_dict = {}
+    for model_dict in pdb_lines_to_model_dicts(lines, pdb_dict):
+        model = model_dict_to_data_model(model_dict)
+        generate_higher_structures([model])
+        extract_sequence(pdb_dict, [model])
+        yield model
+
+
 def extract_header(pdb_dict, description_dict):
     """Takes a ``dict`` and adds header information to it by parsing the HEADER
     line.
@@ -323,7 +443,7 @@ def atom_line_to_atom_dict(line, polymer=True):
     :param bool polymer: is this atom in a chain or not?
     :rtype: ``dict``"""
 
-    a = deepcopy(ATOM_DICT)
+    a = new_atom_dict()
     if line[:5].strip(): a["id"] = int(line[:5].strip())
     if line[6:10].strip(): a["name"] = line[6:10].strip()
     if line[10].strip(): a["alt_loc"] = line[10]
@@ -337,10 +457,7 @@ def atom_line_to_atom_dict(line, polymer=True):
     if line[48:54].strip(): a["occupancy"] = float(line[48:54].strip())
     if line[54:60].strip(): a["bfactor"] = float(line[54:60].strip())
     if line[70:72].strip(): a["element"] = line[70:72].strip()
-    if line[72:76].strip():
-        try:
-            a["charge"] = int(line[72:76].strip())
-        except: a["charge"] = int(line[72:76][::-1].strip())
+    if line[72:76].strip(): a["charge"] = charge_value(line[72:76].strip())
     a["full_res_id"] = "{}:{}{}".format(
      a["chain_id"] or "",
      str(a["residue_id"] if a["residue_id"] is not None else "") or "",
@@ -351,6 +468,149 @@ def atom_line_to_atom_dict(line, polymer=True):
     return a
 
 
+def atom_lines_to_atom_dicts(lines, polymer=True):
+    """Takes ATOM or HETATM lines and converts them to atom ``dict`` objects,
+    just as :py:func:`.atom_line_to_atom_dict` would, but with the columns of
+    all the lines decoded at once.
+
+    The lines are copied into a fixed-width table of ASCII codes, and each
+    numeric column is decoded from it with NumPy in one go (see
+    :py:func:`.decode_numbers`), as is each text column. Lines which can't be
+    decoded this way - ones that are too short, or which have something other
+    than a number in a numeric column - are passed to
+    :py:func:`.atom_line_to_atom_dict` instead, as are all of them if they
+    aren't ASCII. Garbage collection is paused while the dictionaries are
+    made, as it would otherwise run many times over the growing list.
+
+    :param list lines: the atom records to parse.
+    :param bool polymer: are these atoms in a chain or not?
+    :rtype: ``list``"""
+
+    if not lines: return []
+    try:
+        table = np.array(lines, dtype="S{}".format(ATOM_WIDTH))
+    except UnicodeEncodeError:
+        return [atom_line_to_atom_dict(line, polymer) for line in lines]
+    table = table.view(np.uint8).reshape(len(lines), ATOM_WIDTH).copy()
+    table[table == 0] = 32
+    ids, bad_ids = decode_numbers(table, 0, 5, int, default=0)
+    res_ids, bad_res_ids = decode_numbers(table, 16, 20, int)
+    xs, bad_xs = decode_numbers(table, 24, 32)
+    ys, bad_ys = decode_numbers(table, 32, 40)
+    zs, bad_zs = decode_numbers(table, 40, 48)
+    occupancies, bad_occupancies = decode_numbers(table, 48, 54, default=1)
+    bfactors, bad_bfactors = decode_numbers(table, 54, 60)
+    names, alt_locs = text_column(table, 6, 10), text_column(table, 10, 11)
+    res_names = text_column(table, 11, 14)
+    chain_ids, inserts = text_column(table, 15, 16), text_column(table, 20, 21)
+    elements = text_column(table, 70, 72)
+    charges = [charge_value(c) if c else 0 for c in text_column(table, 72, 76)]
+    atoms, enabled = [], gc.isenabled()
+    gc.disable()
+    try:
+        for id, element, name, x, y, z, bfactor, charge, res_id, res_name, \
+         insert, chain_id, occupancy, alt_loc in zip(ids, elements, names, xs,
+         ys, zs, bfactors, charges, res_ids, res_names, inserts, chain_ids,
+         occupancies, alt_locs):
+            full_res_id = "{}:{}{}".format(
+             chain_id, "" if res_id is None else res_id, insert
+            )
+            atoms.append({
+             "id": id, "element": element or None, "name": name or None,
+             "x": x, "y": y, "z": z, "bfactor": bfactor, "charge": charge,
+             "residue_id": res_id, "residue_name": res_name or None,
+             "residue_insert": insert, "chain_id": chain_id or None,
+             "occupancy": occupancy, "alt_loc": alt_loc or None,
+             "anisotropy": [], "polymer": polymer,
+             "full_res_id": None if full_res_id == ":" else full_res_id
+            })
+    finally:
+        if enabled: gc.enable()
+    short = np.flatnonzero(np.fromiter(map(len, lines), int, len(lines)) < 21)
+    for index in set(chain(
+     bad_ids, bad_res_ids, bad_xs, bad_ys, bad_zs, bad_occupancies,
+     bad_bfactors, short.tolist()
+    )):
+        atoms[index] = atom_line_to_atom_dict(lines[index], polymer)
+    return atoms
+
+
+def decode_numbers(table, start, end, convert=float, default=None):
+    """Decodes one fixed-width numeric column of some atom records, given as a
+    table of ASCII codes with one row per record, with NumPy in one step.
+    Blank rows get a default value.
+
+    If NumPy can't decode the whole column, its rows are converted one at a
+    time instead, and the indices of any which can't be converted at all are
+    returned, so that those records can be parsed separately.
+
+    :param numpy.ndarray table: The ASCII codes of the records.
+    :param int start: The index of the column's first character.
+    :param int end: The index after the column's last character.
+    :param convert: ``float`` or ``int``.
+    :param default: The value to give blank rows.
+    :returns: (``list`` of values, ``list`` of bad row indices)"""
+
+    width = end - start
+    column = np.ascontiguousarray(table[:, start:end])
+    blank = (column == 32).all(axis=1)
+    column = column.view("S{}".format(width)).ravel()
+    column[blank] = b"0"
+    bad = []
+    try:
+        values = column.astype(
+         np.float64 if convert is float else np.int64
+        ).tolist()
+    except ValueError:
+        values = column.tolist()
+        for index, value in enumerate(values):
+            try:
+                values[index] = convert(value)
+            except ValueError: bad.append(index)
+    for index in np.flatnonzero(blank).tolist(): values[index] = default
+    return values, bad
+
+
+def text_column(table, start, end):
+    """Decodes one fixed-width text column of some atom records, given as a
+    table of ASCII codes with one row per record, into stripped strings.
+
+    :param numpy.ndarray table: The ASCII codes of the records.
+    :param int start: The index of the column's first character.
+    :param int end: The index after the column's last character.
+    :rtype: ``list``"""
+
+    width = end - start
+    column = np.ascontiguousarray(table[:, start:end]).view("S{}".format(width))
+    return np.char.strip(column.ravel().astype("U{}".format(width))).tolist()
+
+
+def charge_value(charge):
+    """Takes the contents of the charge column of an atom record, which might
+    have its sign either before or after the number, and returns the charge.
+
+    :param str charge: The charge column's contents, stripped.
+    :rtype: ``int``"""
+
+    try:
+        return int(charge)
+    except: return int(charge[::-1])
+
+
+def keep_atom_line(line, keep):
+    """Passes the values an atom filter needs from an ATOM or HETATM record to
+    that filter, without parsing the rest of the record.
+
+    :param str line: The atom record.
+    :param function keep: The filter from :py:func:`.atom_filter`.
+    :rtype: ``bool``"""
+
+    return keep(
+     line[15].strip() or None, line[11:14].strip(),
+     line[70:72].strip() or None, line[10].strip() or None, line[15:21]
+    )
+
+
 def assign_anisou(model_dict, model):
     """Aassigns anisotropy information the atoms in a model dictionary, by
     pasrsing ANISOU lines.
@@ -386,25 +646,22 @@ def extract_sequence(pdb_dict, model_list):
 
 def extract_connections(pdb_dict, model_list):
     """Adds connectivity information to each model in a list of model
-    dictionaries, by parsing CONECT lines.
+    dictionaries, by parsing CONECT lines. Each model gets its own copy of the
+    connections.
 
     :param dict pdb_dict: The ``dict`` to read from.
     :param list model_list: The list of model dictionaries to update."""
 
-    lines = pdb_dict.get("CONECT", [])
-    atom_ids = sorted(list(set([int(r[:5].strip()) for r in lines])))
-    connections = [{"atom": id_, "bond_to": []} for id_ in atom_ids]
-    for connection in connections:
-        relevant_lines = [line[5:] for line in lines
-          if int(line[:5].strip()) == connection["atom"]]
-        line_numbers = [[
-         line[n * 5:n * 5 + 5].strip() for n in range(4)
-        ] for line in relevant_lines]
-        for line in line_numbers:
-            for number in line:
-                if number:
-                    connection["bond_to"].append(int(number))
-    for model in model_list: model["connections"] = connections.copy()
+    partners = {}
+    for line in pdb_dict.get("CONECT", []):
+        bond_to = partners.setdefault(int(line[:5].strip()), [])
+        for n in range(1, 5):
+            number = line[n * 5:n * 5 + 5].strip()
+            if number: bond_to.append(int(number))
+    for model in model_list:
+        model["connections"] = [{
+         "atom": id_, "bond_to": partners[id_][:]
+        } for id_ in sorted(partners)]
 
 
 def merge_lines(lines, start, join=" "):
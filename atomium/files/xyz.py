@@ -2,7 +2,7 @@
 
 import re
 from copy import deepcopy
-from .data import DATA_DICT, ATOM_DICT, MODEL_DICT
+from .data import DATA_DICT, new_model_dict, new_atom_dict
 
 def xyz_string_to_xyz_dict(filestring):
     """Takes the filecontents of a .xyz file and produces an atomium data
@@ -11,15 +11,27 @@ def xyz_string_to_xyz_dict(filestring):
     :param str filestring: The contents of a .xyz file.
     :rtype: ``dict``"""
 
-    lines = list(filter(lambda l: bool(l.strip()), filestring.split("\n")))
+    return xyz_lines_to_xyz_dict(filestring.split("\n"))
+
+
+def xyz_lines_to_xyz_dict(lines):
+    """Takes an iterable of lines from a .xyz file, without their line
+    endings, and produces an atomium data dictionary from them. Blank lines
+    are ignored, and every line before the first atom line is a header line.
+
+    :param lines: The lines to read.
+    :rtype: ``dict``"""
+
     xyz_dict = {"header_lines": [], "atom_lines": []}
     element_pattern = r"[A-Z]"
     float_pattern = r"\s{1,}\-?\d*\.?\d*"
     pattern = re.compile(element_pattern + (3 * float_pattern))
-    while not pattern.match(lines[0]):
-        xyz_dict["header_lines"].append(lines.pop(0))
     for line in lines:
-        xyz_dict["atom_lines"].append(line)
+        if not line.strip(): continue
+        if not xyz_dict["atom_lines"] and not pattern.match(line):
+            xyz_dict["header_lines"].append(line)
+        else:
+            xyz_dict["atom_lines"].append(line)
     return xyz_dict
 
 
@@ -32,9 +44,9 @@ def xyz_dict_to_data_dict(xyz_dict):
 
     d = deepcopy(DATA_DICT)
     d["description"]["title"] = xyz_dict["header_lines"][-1]
-    d["models"].append(deepcopy(MODEL_DICT))
+    d["models"].append(new_model_dict())
     for atom_line in xyz_dict["atom_lines"]:
-        a = deepcopy(ATOM_DICT)
+        a = new_atom_dict()
         chunks = atom_line.split()
         a["element"] = chunks[0]
         a["x"], a["y"], a["z"] = [float(n) for n in chunks[1:]]
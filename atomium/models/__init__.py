@@ -1,2 +1,3 @@
 from .atoms import Atom
 from .molecules import Model, Ligand, Residue, Chain
+from .builder import ModelBuilder
@@ -1,11 +1,14 @@
 """Contains the atom class."""
 
 import re
+import sys
 import numpy as np
 from math import isclose
 from itertools import combinations
 from .data import PERIODIC_TABLE, METALS
 
+ZERO_ANISOTROPY = (0, 0, 0, 0, 0, 0)
+
 class Atom:
     """An atom in space - a point particle with a location, element, charge etc.
 
@@ -21,17 +24,24 @@ class Atom:
     :param number bfactor: The B-factor of the atom (its uncertainty).
     :param list anisotropy: The directional uncertainty of the atom."""
 
+    __slots__ = (
+     "_element", "_x", "_y", "_z", "_id", "_name", "_charge", "_bfactor",
+     "_anisotropy", "_bonded_atoms", "_row",
+     "_ligand", "_residue", "_chain", "_model"
+    )
+
     def __init__(self, element, x=0, y=0, z=0, id=0, name=None, charge=0,
-                 bfactor=0, anisotropy=(0, 0, 0, 0, 0, 0)):
-        self._element = str(element)
+                 bfactor=0, anisotropy=ZERO_ANISOTROPY):
+        self._element = sys.intern(str(element))
         self._x, self._y, self._z = x, y, z
-        self._id, self._name = int(id), str(name) if name else None
+        self._id = int(id)
+        self._name = sys.intern(str(name)) if name else None
         self._charge = float(charge)
         self._bfactor = float(bfactor)
-        self._anisotropy = list(anisotropy)
-        self._bonded_atoms = set()
-        for attr in ("ligand", "residue", "chain", "model"):
-            self.__dict__["_" + attr] = None
+        self.anisotropy = anisotropy
+        self._bonded_atoms = None
+        self._row = None
+        self._ligand, self._residue, self._chain, self._model = (None,) * 4
 
 
     def __repr__(self):
@@ -39,7 +49,7 @@ class Atom:
          self._element,
          " ({})".format(self._name) if self._name else "",
          " {}".format(self._id) if self._id else "",
-         self._x, self._y, self._z
+         *self.location
         )
 
 
@@ -62,7 +72,8 @@ class Atom:
 
     @element.setter
     def element(self, element):
-        self._element = element
+        self._element = sys.intern(element)
+        if self._row is not None: self._model._set_element(self._row, element)
 
 
     @property
@@ -71,12 +82,17 @@ class Atom:
 
         :rtype: ``float``"""
 
-        return self._x
+        if self._row is None: return self._x
+        return self._model._coordinates[self._row, 0].item()
 
 
     @x.setter
     def x(self, x):
-        self._x = x
+        if self._row is None:
+            self._x = x
+        else:
+            self._model._coordinates[self._row, 0] = x
+        self._moved()
 
 
     @property
@@ -85,12 +101,17 @@ class Atom:
 
         :rtype: ``float``"""
 
-        return self._y
+        if self._row is None: return self._y
+        return self._model._coordinates[self._row, 1].item()
 
 
     @y.setter
     def y(self, y):
-        self._y = y
+        if self._row is None:
+            self._y = y
+        else:
+            self._model._coordinates[self._row, 1] = y
+        self._moved()
 
 
     @property
@@ -99,12 +120,17 @@ class Atom:
 
         :rtype: ``float``"""
 
-        return self._z
+        if self._row is None: return self._z
+        return self._model._coordinates[self._row, 2].item()
 
 
     @z.setter
     def z(self, z):
-        self._z = z
+        if self._row is None:
+            self._z = z
+        else:
+            self._model._coordinates[self._row, 2] = z
+        self._moved()
 
 
     @property
@@ -129,7 +155,7 @@ class Atom:
 
     @name.setter
     def name(self, name):
-        self._name = str(name)
+        self._name = sys.intern(str(name))
 
 
     @property
@@ -138,12 +164,16 @@ class Atom:
 
         :rtype: ``float``"""
 
-        return self._charge
+        if self._row is None: return self._charge
+        return self._model._charges[self._row].item()
 
 
     @charge.setter
     def charge(self, charge):
-        self._charge = float(charge)
+        if self._row is None:
+            self._charge = float(charge)
+        else:
+            self._model._charges[self._row] = charge
 
 
     @property
@@ -153,31 +183,55 @@ class Atom:
 
         :rtype: ``float``"""
 
-        return self._bfactor
+        if self._row is None: return self._bfactor
+        return self._model._bfactors[self._row].item()
 
 
     @bfactor.setter
     def bfactor(self, bfactor):
-        self._bfactor = float(bfactor)
+        if self._row is None:
+            self._bfactor = float(bfactor)
+        else:
+            self._model._bfactors[self._row] = bfactor
 
 
     @property
     def anisotropy(self):
         """The atom's directional uncertainty, represented by a list of six
-        numbers.
+        numbers. Atoms with no anisotropy all share a single zero value until
+        this is first accessed, when the atom is given a list of its own - so
+        the list can be changed in place for every atom.
 
         :rtype: ``list``"""
 
+        if self._anisotropy is ZERO_ANISOTROPY:
+            self._anisotropy = list(ZERO_ANISOTROPY)
         return self._anisotropy
 
 
+    @anisotropy.setter
+    def anisotropy(self, anisotropy):
+        if tuple(anisotropy) == ZERO_ANISOTROPY:
+            self._anisotropy = ZERO_ANISOTROPY
+        else:
+            self._anisotropy = list(anisotropy)
+
+
     @property
     def location(self):
         """The atom's Cartesian coordinates in ``(x, y, z)`` format.
 
         :rtype: ``tuple``"""
 
-        return (self._x, self._y, self._z)
+        if self._row is None: return (self._x, self._y, self._z)
+        return tuple(self._model._coordinates[self._row].tolist())
+
+
+    def _moved(self):
+        """Lets the atom's :py:class:`.Model` know that the atom's coordinates
+        have changed, so that any spatial index it has built is discarded."""
+
+        if self._model is not None: self._model._spatial_index = None
 
 
     def trim(self, places):
@@ -188,9 +242,7 @@ class Atom:
         ``None``, no rounding will be done."""
 
         if places is not None:
-            self._x = round(self._x, places)
-            self._y = round(self._y, places)
-            self._z = round(self._z, places)
+            self.move_to(*[round(value, places) for value in self.location])
 
 
     def translate(self, dx=0, dy=0, dz=0, trim=12):
@@ -207,9 +259,8 @@ class Atom:
         try:
             dx, dy, dz = dx
         except TypeError: pass
-        self._x += dx
-        self._y += dy
-        self._z += dz
+        x, y, z = self.location
+        self.move_to(x + dx, y + dy, z + dz)
         self.trim(trim)
 
 
@@ -220,7 +271,11 @@ class Atom:
         :param number y: The atom's new y coordinate.
         :param number z: The atom's new z coordinate."""
 
-        self._x, self._y, self._z = x, y, z
+        if self._row is None:
+            self._x, self._y, self._z = x, y, z
+        else:
+            self._model._coordinates[self._row] = (x, y, z)
+        self._moved()
 
 
     def transform(self, matrix, trim=12):
@@ -235,7 +290,7 @@ class Atom:
         set to ``None`` if no rounding is to be done."""
 
         vector = np.array(matrix).dot(self.location)
-        self._x, self._y, self._z = vector
+        self.move_to(*vector)
         self.trim(trim)
 
 
@@ -249,21 +304,7 @@ class Atom:
         after rotating - the default is 12 decimal places but this can be\
         set to ``None`` if no rounding is to be done."""
 
-        try:
-            axis = [1 if i == "xyz".index(axis) else 0 for i in range(3)]
-        except ValueError:
-            raise ValueError("'{}' is not a valid axis".format(axis))
-        axis = np.asarray(axis)
-        axis = axis / np.sqrt(np.dot(axis, axis))
-        a = np.cos(angle / 2)
-        b, c, d = -axis * np.sin(angle / 2)
-        aa, bb, cc, dd = a * a, b * b, c * c, d * d
-        bc, ad, ac, ab, bd, cd = b * c, a * d, a * c, a * b, b * d, c * d
-        self.transform(np.array([
-         [aa + bb - cc - dd, 2 * (bc + ad), 2 * (bd - ac)],
-         [2 * (bc - ad), aa + cc - bb - dd, 2 * (cd + ab)],
-         [2 * (bd + ac), 2 * (cd - ab), aa + dd - bb - cc]
-        ]), *args, **kwargs)
+        self.transform(rotation_matrix(angle, axis), *args, **kwargs)
 
 
     @property
@@ -315,9 +356,10 @@ class Atom:
             x, y, z = other
         except:
             x, y, z = other.location
-        x_sum = pow((x - self._x), 2)
-        y_sum = pow((y - self._y), 2)
-        z_sum = pow((z - self._z), 2)
+        self_x, self_y, self_z = self.location
+        x_sum = pow((x - self_x), 2)
+        y_sum = pow((y - self_y), 2)
+        z_sum = pow((z - self_z), 2)
         return np.sqrt(x_sum + y_sum + z_sum)
 
 
@@ -367,15 +409,18 @@ class Atom:
 
         :rtype: ``set``"""
 
-        return set(self._bonded_atoms)
+        return set(self._bonded_atoms) if self._bonded_atoms else set()
 
 
     def bond_to(self, other):
         """Bonds the atom to some other atom. The two atoms will be placed
-        inside each other's :py:meth:`.bonded_atoms`.
+        inside each other's :py:meth:`.bonded_atoms`. The sets which hold an
+        atom's bonds are only created when it is first bonded.
 
         :param Atom other: The atom to bond to."""
 
+        if self._bonded_atoms is None: self._bonded_atoms = set()
+        if other._bonded_atoms is None: other._bonded_atoms = set()
         self._bonded_atoms.add(other)
         other._bonded_atoms.add(self)
 
@@ -388,10 +433,10 @@ class Atom:
 
         try:
             self._bonded_atoms.remove(other)
-        except KeyError: pass
+        except (KeyError, AttributeError): pass
         try:
             other._bonded_atoms.remove(self)
-        except KeyError: pass
+        except (KeyError, AttributeError): pass
 
 
     def nearby_atoms(self, cutoff, *args, **kwargs):
@@ -444,14 +489,41 @@ class Atom:
 
         :rtype: ``Atom``"""
 
+        x, y, z = self.location
         return Atom(
-         element=self._element, x=self._x, y=self._y, z=self._z, id=self._id,
-         name=self._name, charge=self._charge, bfactor=self._bfactor,
-         anisotropy=self.anisotropy
+         element=self._element, x=x, y=y, z=z, id=self._id,
+         name=self._name, charge=self.charge, bfactor=self.bfactor,
+         anisotropy=self._anisotropy
         )
 
 
 
+def rotation_matrix(angle, axis):
+    """Creates the matrix which describes a rotation by some angle around one of
+    the three axes.
+
+    :param float angle: The angle to rotate by in radians.
+    :param str axis: the axis to rotate around.
+    :raises ValueError: if the axis is not 'x', 'y' or 'z'.
+    :rtype: ``numpy.ndarray``"""
+
+    try:
+        axis = [1 if i == "xyz".index(axis) else 0 for i in range(3)]
+    except ValueError:
+        raise ValueError("'{}' is not a valid axis".format(axis))
+    axis = np.asarray(axis)
+    axis = axis / np.sqrt(np.dot(axis, axis))
+    a = np.cos(angle / 2)
+    b, c, d = -axis * np.sin(angle / 2)
+    aa, bb, cc, dd = a * a, b * b, c * c, d * d
+    bc, ad, ac, ab, bd, cd = b * c, a * d, a * c, a * b, b * d, c * d
+    return np.array([
+     [aa + bb - cc - dd, 2 * (bc + ad), 2 * (bd - ac)],
+     [2 * (bc - ad), aa + cc - bb - dd, 2 * (cd + ab)],
+     [2 * (bd + ac), 2 * (cd - ab), aa + dd - bb - cc]
+    ])
+
+
 QUERY_DOCSTRING = """You can specify which atoms should be searched in this
         function. Any atom property can be specified such as ``name='CA'``.
         String properties can be searched by regex, as in ``element='[^C]'``.
@@ -482,12 +554,16 @@ def atom_query(func):
         for key in query: del kwargs[key]
         atoms = func(*args, **kwargs)
         if atoms:
-            atom_attributes = list(list(atoms)[0].__dict__.keys())
+            atom = list(atoms)[0]
+            slots = getattr(type(atom), "__slots__", ())
+            atom_attributes = set(getattr(atom, "__dict__", ())).union(
+             slot for slot in slots if hasattr(atom, slot)
+            )
             for k, v in query.items():
                 attr = k.split("__")[0].split("_regex")[0]
                 if "_" + attr in atom_attributes: attr = "_" + attr
                 if k.endswith("_regex"):
-                    atom_filter = lambda a: re.match(v, a.__dict__[attr])
+                    atom_filter = lambda a: re.match(v, getattr(a, attr))
                 else:
                     comp = "__eq__"
                     if "__" in k:
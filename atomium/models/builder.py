@@ -0,0 +1,153 @@
+"""Contains the ModelBuilder class, for assembling large models quickly."""
+
+from collections import OrderedDict
+from .molecules import Model, Chain, Residue, Ligand
+
+class ModelBuilder:
+    """Assembles a :py:class:`.Model`, along with the chains, residues and
+    ligands inside it, from atoms which have not yet been placed in any
+    structure.
+
+    Creating each structure in turn means that every new structure has to
+    update the registries of all the structures its atoms are already in. The
+    builder instead just records which chain and residue or ligand each atom
+    goes in, and when :py:meth:`.build` is called it creates every structure
+    in one pass over the atoms, filling in their registries directly.
+
+    Residues are connected to each other in the order their first atoms were
+    added, within each chain - the chains and residues are kept in ordered
+    dictionaries so that this doesn't depend on the Python version.
+
+        >>> builder = ModelBuilder()
+        >>> builder.add_chain("A", rep="MV")
+        >>> builder.add_atom(Atom("N", 0, 0, 0, name="N"), "A", "A.1", "MET")
+        >>> builder.add_atom(Atom("N", 3, 0, 0, name="N"), "A", "A.2", "VAL")
+        >>> model = builder.build()"""
+
+    def __init__(self):
+        self._atoms = []
+        self._chains = OrderedDict()
+        self._hets = OrderedDict()
+
+
+    def __repr__(self):
+        return "<ModelBuilder ({} atom{})>".format(
+         len(self._atoms), "" if len(self._atoms) == 1 else "s"
+        )
+
+
+    def add_chain(self, id, rep=""):
+        """Adds a chain to the model being built, or changes the
+        representative sequence of one already added. Chains are also added
+        automatically when atoms are added to them, so this is only needed to
+        set a chain's representative sequence, or to have a chain whose ID is
+        ``None``.
+
+        :param str id: The chain's ID.
+        :param str rep: The chain's representative sequence."""
+
+        try:
+            self._chains[id][0] = rep
+        except KeyError: self._chains[id] = [rep, []]
+
+
+    def add_atom(self, atom, chain_id=None, het_id=None, het_name=None,
+                 polymer=True):
+        """Adds an atom to the model being built. Atoms with the same chain ID
+        and residue/ligand ID will be placed in the same residue or ligand.
+
+        :param Atom atom: The atom to add.
+        :param str chain_id: The ID of the chain the atom is in, if any.
+        :param str het_id: The ID of the residue or ligand the atom is in, if\
+        any.
+        :param str het_name: The name of the residue or ligand.
+        :param bool polymer: If ``True``, the atom's residue/ligand will be a\
+        :py:class:`.Residue`, otherwise a :py:class:`.Ligand`. Only the value\
+        given with the first atom of each residue/ligand is used.
+        :raises ValueError: if the atom is already in a structure."""
+
+        if atom._model is not None or atom._chain is not None \
+         or atom._residue is not None or atom._ligand is not None:
+            raise ValueError("{} is already in a structure".format(atom))
+        self._atoms.append(atom)
+        if chain_id is not None and chain_id not in self._chains:
+            self._chains[chain_id] = ["", []]
+        if het_id is not None:
+            try:
+                self._hets[(chain_id, het_id)][2].append(atom)
+            except KeyError:
+                self._hets[(chain_id, het_id)] = [polymer, het_name, [atom]]
+        elif chain_id in self._chains:
+            self._chains[chain_id][1].append(atom)
+
+
+    def build(self):
+        """Creates the :py:class:`.Model` from the atoms added so far. The
+        builder should not be used again afterwards.
+
+        :rtype: ``Model``"""
+
+        model = new_structure(Model, self._atoms)
+        for atom in self._atoms: atom._model = model
+        share_atoms(model, model, len(self._atoms))
+        chain_hets = {id: [] for id in self._chains}
+        for (chain_id, het_id), (polymer, name, atoms) in self._hets.items():
+            het = new_structure(
+             Residue if polymer else Ligand, atoms, het_id, name
+            )
+            if polymer:
+                for atom in atoms: atom._residue = het
+            else:
+                for atom in atoms: atom._ligand = het
+            share_atoms(het, het, len(atoms))
+            share_atoms(het, model, len(atoms))
+            if chain_id in chain_hets: chain_hets[chain_id].append(het)
+        for id, (rep, loose_atoms) in self._chains.items():
+            atoms = loose_atoms + [
+             atom for het in chain_hets[id] for atom in het._atoms
+            ]
+            chain = new_structure(Chain, atoms, id)
+            chain._rep_sequence = rep
+            residues = [
+             het for het in chain_hets[id] if isinstance(het, Residue)
+            ]
+            for res1, res2 in zip(residues[:-1], residues[1:]):
+                res1._next, res2._previous = res2, res1
+            chain._residues = tuple(residues)
+            for atom in atoms: atom._chain = chain
+            share_atoms(chain, chain, len(atoms))
+            share_atoms(chain, model, len(atoms))
+            for het in chain_hets[id]:
+                share_atoms(het, chain, len(het._atoms))
+        return model
+
+
+
+def new_structure(cls, atoms, id=None, name=None):
+    """Creates a ligand, residue, chain or model from some atoms, without
+    updating the atoms or any registries - the equivalent of
+    :py:meth:`.AtomStructure.__init__` for atoms which are in no other
+    structure yet. The structure's attributes are set by
+    :py:meth:`.AtomStructure._initialise`, just as its constructor would.
+
+    :param type cls: The kind of structure to create.
+    :param list atoms: The atoms in the structure.
+    :param str id: The structure's ID.
+    :param str name: The structure's name.
+    :rtype: ``AtomStructure``"""
+
+    structure = cls.__new__(cls)
+    structure._initialise(atoms, id, name)
+    return structure
+
+
+def share_atoms(structure, other, count):
+    """Records in the registries of two structures that they share some
+    atoms. A structure also shares all of its atoms with itself.
+
+    :param AtomStructure structure: The first structure.
+    :param AtomStructure other: The second structure.
+    :param int count: The number of atoms they share."""
+
+    structure._children[other.__class__.__name__.lower()][other] = count
+    other._children[structure.__class__.__name__.lower()][structure] = count
@@ -1,7 +1,10 @@
 """Contains the useful sub-classes of AtomStructure."""
 
-from .structures import AtomStructure
-from .data import CODES, FULL_NAMES
+import numpy as np
+from .structures import AtomStructure, round_locations
+from .atoms import atom_query
+from .spatial import CellList
+from .data import CODES, FULL_NAMES, PERIODIC_TABLE
 from .exceptions import SequenceConnectivityError
 
 def lower(name):
@@ -56,6 +59,12 @@ class Model(AtomStructure):
     """The universe in which all other molecules live, interact, and generally
     exist.
 
+    A model can optionally be :py:meth:`.pack`\ ed, in which case the
+    coordinates, B-factors, charges and elements of its atoms are held in NumPy
+    arrays owned by the model, rather than by each atom individually. The atoms
+    still behave exactly as before, but whole-model operations work on the
+    arrays directly.
+
     :param \*atoms: The atoms the structure is to be made of. The atoms will\
     be updated with awareness of the new structure they are part of if a\
     sub-class is used. You can also pass in other atom structures here, and\
@@ -67,6 +76,186 @@ class Model(AtomStructure):
     residues, residue = lower("residue")
     ligands, ligand = lower("ligand")
 
+    def __init__(self, *args, **kwargs):
+        release_atoms(args)
+        AtomStructure.__init__(self, *args, **kwargs)
+
+
+    def _initialise(self, *args, **kwargs):
+        AtomStructure._initialise(self, *args, **kwargs)
+        self._spatial_index = None
+        self._packed_atoms = None
+        self._coordinates, self._bfactors, self._charges = None, None, None
+        self._elements, self._element_indices = None, None
+
+
+    def add(self, obj):
+        packed = self.packed
+        release_atoms([obj])
+        if packed: self.unpack()
+        AtomStructure.add(self, obj)
+        self._spatial_index = None
+        if packed: self.pack()
+
+
+    def remove(self, obj):
+        packed = self.packed
+        if packed: self.unpack()
+        AtomStructure.remove(self, obj)
+        self._spatial_index = None
+        if packed: self.pack()
+
+    add.__doc__ = AtomStructure.add.__doc__
+    remove.__doc__ = AtomStructure.remove.__doc__
+
+
+    @atom_query
+    def atoms_in_sphere(self, x, y, z, radius):
+        """Returns all the atoms in a given sphere within the model.
+
+        The search uses a :py:class:`.CellList` spatial index, which is built
+        the first time it is needed and then reused until atoms are added,
+        removed or moved.
+
+        {}
+
+        :rtype: ``set``"""
+
+        if self._spatial_index is None:
+            self._spatial_index = CellList(self._atoms)
+        return self._spatial_index.atoms_in_sphere(x, y, z, radius)
+
+
+    @property
+    def packed(self):
+        """Returns ``True`` if the model's atom data is currently held in
+        arrays by the model itself.
+
+        :rtype: ``bool``"""
+
+        return self._packed_atoms is not None
+
+
+    def pack(self):
+        """Moves the coordinates, B-factors, charges and elements of the model's
+        atoms into contiguous NumPy arrays owned by the model. Each atom keeps
+        only its row number in those arrays, and reads and writes its values
+        through them.
+
+        Adding atoms to, or removing atoms from, a packed model rebuilds the
+        arrays, so it is best to pack a model once it is complete."""
+
+        if self.packed: self.unpack()
+        atoms = list(self._atoms)
+        self._coordinates = np.array(
+         [atom.location for atom in atoms], dtype=float
+        ).reshape(-1, 3)
+        self._bfactors = np.array([a.bfactor for a in atoms], dtype=float)
+        self._charges = np.array([a.charge for a in atoms], dtype=float)
+        self._elements = sorted(set(atom._element for atom in atoms))
+        lookup = {element: i for i, element in enumerate(self._elements)}
+        self._element_indices = np.array(
+         [lookup[atom._element] for atom in atoms], dtype=int
+        )
+        for row, atom in enumerate(atoms):
+            atom._row = row
+            del atom._x, atom._y, atom._z, atom._bfactor, atom._charge
+        self._packed_atoms = atoms
+
+
+    def unpack(self):
+        """Moves the model's atom data out of its arrays and back into the
+        atoms themselves. This is the opposite of :py:meth:`.pack`, and does
+        nothing if the model isn't packed."""
+
+        if not self.packed: return
+        coordinates = self._coordinates.tolist()
+        bfactors, charges = self._bfactors.tolist(), self._charges.tolist()
+        for atom in self._packed_atoms:
+            atom._x, atom._y, atom._z = coordinates[atom._row]
+            atom._bfactor, atom._charge = bfactors[atom._row], charges[atom._row]
+            atom._row = None
+        self._packed_atoms = None
+        self._coordinates, self._bfactors, self._charges = None, None, None
+        self._elements, self._element_indices = None, None
+
+
+    def _set_element(self, row, element):
+        try:
+            index = self._elements.index(element)
+        except ValueError:
+            self._elements.append(element)
+            index = len(self._elements) - 1
+        self._element_indices[row] = index
+
+
+    def _masses(self):
+        masses = [PERIODIC_TABLE.get(e.upper(), 0) for e in self._elements]
+        return np.array(masses, dtype=float)[self._element_indices]
+
+
+    @property
+    def mass(self):
+        if not self.packed: return AtomStructure.mass.fget(self)
+        return round(self._masses().sum().item(), 12)
+
+
+    @property
+    def charge(self):
+        if not self.packed: return AtomStructure.charge.fget(self)
+        return round(self._charges.sum().item(), 12)
+
+
+    @property
+    def center_of_mass(self):
+        if not self.packed: return AtomStructure.center_of_mass.fget(self)
+        masses = self._masses()
+        center = (self._coordinates * masses[:, None]).sum(axis=0)
+        return tuple((center / masses.sum()).tolist())
+
+
+    @property
+    def radius_of_gyration(self):
+        if not self.packed: return AtomStructure.radius_of_gyration.fget(self)
+        deltas = self._coordinates - self.center_of_mass
+        return np.sqrt((deltas ** 2).sum(axis=1).mean())
+
+    mass.__doc__ = AtomStructure.mass.__doc__
+    charge.__doc__ = AtomStructure.charge.__doc__
+    center_of_mass.__doc__ = AtomStructure.center_of_mass.__doc__
+    radius_of_gyration.__doc__ = AtomStructure.radius_of_gyration.__doc__
+
+
+    def trim(self, places):
+        if not self.packed: return AtomStructure.trim(self, places)
+        if places is not None:
+            self._coordinates[:] = round_locations(self._coordinates, places)
+            self._spatial_index = None
+
+
+    def translate(self, dx=0, dy=0, dz=0, trim=12):
+        if not self.packed:
+            return AtomStructure.translate(self, dx, dy, dz, trim=trim)
+        try:
+            dx, dy, dz = dx
+        except TypeError: pass
+        self._coordinates += (dx, dy, dz)
+        self._spatial_index = None
+        self.trim(trim)
+
+
+    def transform(self, matrix, trim=12):
+        if not self.packed:
+            return AtomStructure.transform(self, matrix, trim=trim)
+        self._coordinates[:] = self._coordinates.dot(np.array(matrix).T)
+        self._spatial_index = None
+        self.trim(trim)
+
+    trim.__doc__ = AtomStructure.trim.__doc__
+    translate.__doc__ = AtomStructure.translate.__doc__
+    transform.__doc__ = AtomStructure.transform.__doc__
+
+
     def copy(self):
         """Creates a copy of the Model, as well as copies of its substructures
         such as chains etc.
@@ -78,10 +267,27 @@ class Model(AtomStructure):
         atom_copies = [atom.copy() for atom in atoms]
         model._atoms.update(atom_copies)
         model._id, model._name = self._id, self._name
+        if self.packed: model.pack()
         return model
 
 
 
+def release_atoms(objects):
+    """Takes some atoms or atom structures which are about to be placed in a
+    new :py:class:`.Model`, and unpacks any packed model they currently belong
+    to, so that they no longer depend on that model's arrays.
+
+    :param objects: The atoms or structures to release."""
+
+    for obj in objects:
+        try:
+            atoms = obj._atoms
+        except AttributeError: atoms = (obj,)
+        for atom in atoms:
+            if atom._row is not None: atom._model.unpack()
+
+
+
 class Chain(AtomStructure):
     """A sequence of residues. Unlike other structures, they are iterables, and
     have a length.
@@ -109,6 +315,12 @@ class Chain(AtomStructure):
         self.verify()
 
 
+    def _initialise(self, *args, **kwargs):
+        AtomStructure._initialise(self, *args, **kwargs)
+        self._rep_sequence = ""
+        self._residues = None
+
+
     def __len__(self):
         return len(self.residues())
 
@@ -117,6 +329,20 @@ class Chain(AtomStructure):
         return self.residues()[index]
 
 
+    def __iter__(self):
+        return iter(self.residues())
+
+
+    def add(self, obj):
+        AtomStructure.add(self, obj)
+        self._residues = None
+
+
+    def remove(self, obj):
+        AtomStructure.remove(self, obj)
+        self._residues = None
+
+
     def copy(self):
         """Creates a copy of the Chain, as well as copies of its substructures
         such as ligands etc.
@@ -180,17 +406,16 @@ class Chain(AtomStructure):
             modified the structure since then, this may produce unexpected
             results.
 
+        The order is worked out once and then remembered until the chain, its
+        residues, or the connections between them are changed.
+
         :rtype: ``tuple``"""
 
-        all_res = lower("residue")[0](self, *args, **kwargs)
-        if len(all_res) == 0: return tuple()
-        initial_res = list(all_res)[0]
-        full_sequence = [initial_res]
-        while full_sequence[-1].next:
-            full_sequence.append(full_sequence[-1].next)
-        while full_sequence[0].previous:
-            full_sequence.insert(0, full_sequence[0].previous)
-        return tuple(sorted(all_res, key=lambda k: full_sequence.index(k)))
+        if self._residues is None:
+            self._residues = order_residues(self._get("residue"))
+        if not args and not kwargs: return self._residues
+        matches = lower("residue")[0](self, *args, **kwargs)
+        return tuple(res for res in self._residues if res in matches)
 
 
     @property
@@ -253,9 +478,24 @@ class Residue(Het):
 
     def __init__(self, *atoms, **kwargs):
         Het.__init__(self, *atoms, **kwargs)
+        invalidate_residue_order(self)
+
+
+    def _initialise(self, *args, **kwargs):
+        Het._initialise(self, *args, **kwargs)
         self._next, self._previous = None, None
 
 
+    def add(self, obj):
+        Het.add(self, obj)
+        invalidate_residue_order(self)
+
+
+    def remove(self, obj):
+        invalidate_residue_order(self)
+        Het.remove(self, obj)
+
+
     @property
     def full_name(self):
         """Returns the full name of the reside if it is one of the 20 canonical
@@ -298,6 +538,7 @@ class Residue(Het):
 
     @next.setter
     def next(self, residue):
+        invalidate_residue_order(self, self._next, residue)
         if residue is None:
             if self._next: self._next._previous = None
             self._next = None
@@ -328,6 +569,7 @@ class Residue(Het):
 
     @previous.setter
     def previous(self, residue):
+        invalidate_residue_order(self, self._previous, residue)
         if residue is None:
             if self._previous: self._previous._next = None
             self._previous = None
@@ -336,3 +578,39 @@ class Residue(Het):
         else:
             self._previous = residue
             residue._next = self
+
+
+def order_residues(residues):
+    """Takes a collection of residues and puts them in order, by following the
+    ``next`` and ``previous`` connections outwards from one of them. Any which
+    are not connected to that one are left out.
+
+    :param residues: The residues to order.
+    :rtype: ``tuple``"""
+
+    if not residues: return tuple()
+    start = next(iter(residues))
+    seen = {start}
+    while start.previous is not None and start.previous not in seen:
+        start = start.previous
+        seen.add(start)
+    ordered, residue, seen = [], start, set()
+    while residue is not None and residue not in seen:
+        if residue in residues: ordered.append(residue)
+        seen.add(residue)
+        residue = residue.next
+    return tuple(ordered)
+
+
+def invalidate_residue_order(*residues):
+    """Makes the chains that some residues are in forget the order of their
+    residues, so that it is worked out again the next time it is needed.
+
+    :param \*residues: The residues that have changed."""
+
+    for residue in residues:
+        try:
+            atoms = residue._atoms
+        except AttributeError: continue
+        for atom in atoms:
+            if atom._chain is not None: atom._chain._residues = None
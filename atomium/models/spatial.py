@@ -0,0 +1,86 @@
+"""Contains the spatial index used for fast neighbourhood searches."""
+
+from math import floor
+from itertools import product
+import numpy as np
+
+class CellList:
+    """A spatial index over a collection of atoms. Space is divided into cubic
+    cells, and each atom is filed under the cell its coordinates fall in, so
+    that a search for atoms near some point only has to look at the atoms in
+    the handful of cells around it, rather than at every atom.
+
+    The index is a snapshot - it records where the atoms were when it was
+    created and knows nothing about them moving afterwards. The
+    :py:class:`.Model` which owns it is responsible for throwing it away when
+    that happens.
+
+    :param atoms: The atoms to index.
+    :param float cell_size: The length of each cell's edge."""
+
+    CELL_SIZE = 5
+
+    def __init__(self, atoms, cell_size=None):
+        self._atoms = list(atoms)
+        self._cell_size = cell_size or self.CELL_SIZE
+        self._coordinates = np.array(
+         [atom.location for atom in self._atoms], dtype=float
+        ).reshape(-1, 3)
+        cells = {}
+        keys = np.floor(self._coordinates / self._cell_size).astype(int)
+        for index, key in enumerate(map(tuple, keys.tolist())):
+            try:
+                cells[key].append(index)
+            except KeyError: cells[key] = [index]
+        self._cells = {k: np.array(v) for k, v in cells.items()}
+
+
+    def __repr__(self):
+        return "<CellList ({} atom{}, {} cell{})>".format(
+         len(self._atoms), "" if len(self._atoms) == 1 else "s",
+         len(self._cells), "" if len(self._cells) == 1 else "s"
+        )
+
+
+    def __len__(self):
+        return len(self._atoms)
+
+
+    def candidates(self, x, y, z, radius):
+        """Returns the indices of all atoms in cells which overlap the cube
+        that bounds the given sphere. Every atom in the sphere will be in here,
+        but so will some atoms outside it.
+
+        :param Number x: The x coordinate of the sphere's centre.
+        :param Number y: The y coordinate of the sphere's centre.
+        :param Number z: The z coordinate of the sphere's centre.
+        :param Number radius: The radius of the sphere.
+        :rtype: ``numpy.ndarray``"""
+
+        bounds = [range(
+         floor((value - radius) / self._cell_size),
+         floor((value + radius) / self._cell_size) + 1
+        ) for value in (x, y, z)]
+        cell_count = len(bounds[0]) * len(bounds[1]) * len(bounds[2])
+        if cell_count >= len(self._cells):
+            return np.arange(len(self._atoms))
+        indices = [self._cells.get(key) for key in product(*bounds)]
+        indices = [i for i in indices if i is not None]
+        if not indices: return np.array([], dtype=int)
+        return np.concatenate(indices)
+
+
+    def atoms_in_sphere(self, x, y, z, radius):
+        """Returns all the indexed atoms in a given sphere.
+
+        :param Number x: The x coordinate of the sphere's centre.
+        :param Number y: The y coordinate of the sphere's centre.
+        :param Number z: The z coordinate of the sphere's centre.
+        :param Number radius: The radius of the sphere.
+        :rtype: ``set``"""
+
+        indices = self.candidates(x, y, z, radius)
+        if not len(indices): return set()
+        deltas = self._coordinates[indices] - (x, y, z)
+        distances = np.sqrt((deltas ** 2).sum(axis=1))
+        return {self._atoms[i] for i in indices[distances <= radius].tolist()}
@@ -1,10 +1,11 @@
 """Contains the base Atom Structure class."""
 
 import re
+import sys
 import numpy as np
 import rmsd
 from collections import Counter
-from .atoms import atom_query, QUERY_DOCSTRING
+from .atoms import atom_query, rotation_matrix, QUERY_DOCSTRING
 
 class AtomStructure:
     """A structure made of atoms. In practice this class usually acts as a base
@@ -25,19 +26,44 @@ class AtomStructure:
     CLASS_NAMES = ("ligand", "residue", "chain", "model")
 
     def __init__(self, *atoms, id=None, name=None):
-        self._atoms = set()
+        structure_atoms = set()
         for atom in atoms:
             try:
-                self._atoms.update(atom._atoms)
-            except AttributeError: self._atoms.add(atom)
-        self._id_atoms = {id: set() for id in set([a.id for a in self._atoms])}
-        update = self.__class__.__name__.lower() in self.CLASS_NAMES
+                structure_atoms.update(atom._atoms)
+            except AttributeError: structure_atoms.add(atom)
+        self._initialise(structure_atoms, id, name)
+        register_atoms(self, self._atoms, 1)
+        class_name = self.__class__.__name__.lower()
+        if class_name in self.CLASS_NAMES:
+            set_atoms_structure(self._atoms, class_name, self)
+
+
+    def _initialise(self, atoms, id=None, name=None):
+        """Sets every attribute of a new structure, with its registries
+        recording only the structure's own atoms. The atoms themselves, and the
+        registries of any other structures they are in, are left unchanged.
+        The registries are trusted until one of the structure's atoms is moved
+        to another structure of its kind while still in this one (see
+        :py:func:`.set_atoms_structure`).
+        Sub-classes with attributes of their own set them here, so that
+        structures made without calling their constructor (see
+        :py:class:`.ModelBuilder`) have them too.
+
+        :param atoms: The atoms the structure is to be made of.
+        :param str id: The structure's ID.
+        :param str name: The structure's name."""
+
+        self._atoms = set(atoms)
+        self._id_atoms = {}
         for atom in self._atoms:
-            self._id_atoms[atom.id].add(atom)
-            if update:
-                atom.__dict__["_" + self.__class__.__name__.lower()] = self
+            try:
+                self._id_atoms[atom.id].add(atom)
+            except KeyError: self._id_atoms[atom.id] = {atom}
+        self._children = {name: {} for name in self.CLASS_NAMES}
+        self._indexes = {}
+        self._registered = True
         self._id = str(id) if id else None
-        self._name = str(name) if name else None
+        self._name = sys.intern(str(name)) if name else None
 
 
     def __repr__(self):
@@ -111,15 +137,19 @@ class AtomStructure:
         try:
             atoms = obj._atoms
         except AttributeError: atoms = {obj}
+        new_atoms = []
         for atom in atoms:
             if atom.id in self._id_atoms:
                 self._id_atoms[atom.id].add(atom)
             else:
                 self._id_atoms[atom.id] = {atom}
-            class_name = self.__class__.__name__.lower()
-            if class_name in self.CLASS_NAMES:
-                atom.__dict__["_" + class_name] = self
-            self._atoms.add(atom)
+            if atom not in self._atoms:
+                self._atoms.add(atom)
+                new_atoms.append(atom)
+        register_atoms(self, new_atoms, 1)
+        class_name = self.__class__.__name__.lower()
+        if class_name in self.CLASS_NAMES:
+            set_atoms_structure(atoms, class_name, self)
 
 
     def remove(self, obj):
@@ -131,23 +161,42 @@ class AtomStructure:
         try:
             atoms = obj._atoms
         except AttributeError: atoms = {obj}
+        removed = []
         for atom in atoms:
             try:
                 self._id_atoms[atom.id].remove(atom)
                 if not self._id_atoms[atom.id]: del self._id_atoms[atom.id]
-                atom.__dict__["_" + self.__class__.__name__.lower()] = None
                 self._atoms.remove(atom)
+                removed.append(atom)
             except KeyError: pass
+        class_name = self.__class__.__name__.lower()
+        if class_name in self.CLASS_NAMES:
+            set_atoms_structure(removed, class_name, None)
+        register_atoms(self, removed, -1)
 
 
     def _get(self, object_name, id=None, name=None, id_regex=None,
              name_regex=None, **kwargs):
-        objects = set()
-        for atom in self._atoms:
-            objects.add(atom.__dict__["_" + object_name])
-        try:
-            objects.remove(None)
-        except: pass
+        if self.__class__.__name__.lower() in self.CLASS_NAMES \
+         and self._registered and object_name in self._children:
+            if id:
+                objects = self._lookup(object_name, "_id", id)
+            elif name:
+                objects = self._lookup(object_name, "_name", name)
+            else:
+                objects = self._children[object_name].keys()
+            if object_name == "ligand" and not kwargs.get("water", True):
+                objects = set(objects).difference(
+                 self._lookup(object_name, "_name", "HOH"),
+                 self._lookup(object_name, "_name", "WAT")
+                )
+        else:
+            objects = set()
+            for atom in self._atoms:
+                objects.add(getattr(atom, "_" + object_name))
+            try:
+                objects.remove(None)
+            except: pass
         if id:
             objects = [o for o in objects if o._id == id]
         if id_regex:
@@ -162,6 +211,24 @@ class AtomStructure:
         return set(objects)
 
 
+    def _lookup(self, object_name, attribute, value):
+        """Returns the child structures of a given kind whose ID or name has
+        a given value, using an index which is built from the structure's
+        registry of children the first time it is needed.
+
+        :param str object_name: The kind of structure to look for.
+        :param str attribute: ``'_id'`` or ``'_name'``.
+        :param value: The value to look up.
+        :rtype: ``list``"""
+
+        indexes = self._indexes.setdefault(object_name, {})
+        if attribute not in indexes:
+            index = indexes[attribute] = {}
+            for child in self._children[object_name]:
+                index.setdefault(getattr(child, attribute), []).append(child)
+        return indexes[attribute].get(value, [])
+
+
     @property
     def id(self):
         """The structure's identifier. Once created it is not modifiable.
@@ -182,7 +249,11 @@ class AtomStructure:
 
     @name.setter
     def name(self, name):
-        self._name = name
+        self._name = sys.intern(name) if isinstance(name, str) else name
+        class_name = self.__class__.__name__.lower()
+        if class_name in self.CLASS_NAMES:
+            for structure in atom_structures(self._atoms):
+                structure._indexes.pop(class_name, None)
 
 
     def trim(self, places):
@@ -192,11 +263,12 @@ class AtomStructure:
         :param int places: The number of places to round the coordinates to. If\
         ``None``, no rounding will be done."""
 
-        for atom in self._atoms:
-            atom.trim(places)
+        if places is not None:
+            atoms, locations = gather_locations(self._atoms)
+            scatter_locations(atoms, locations, places)
 
 
-    def translate(self, *args, **kwargs):
+    def translate(self, dx=0, dy=0, dz=0, trim=12):
         """Translates the structure through space, updating all atom
         coordinates accordingly. You can provide three values, or a single
         vector.
@@ -208,11 +280,14 @@ class AtomStructure:
         after translating - the default is 12 decimal places but this can be\
         set to ``None`` if no rounding is to be done."""
 
-        for atom in self._atoms:
-            atom.translate(*args, **kwargs)
+        try:
+            dx, dy, dz = dx
+        except TypeError: pass
+        atoms, locations = gather_locations(self._atoms)
+        scatter_locations(atoms, locations + (dx, dy, dz), trim)
 
 
-    def transform(self, *args, **kwargs):
+    def transform(self, matrix, trim=12):
         """Transforms the structure using a 3x3 matrix supplied. This is useful
         if the :py:meth:`.rotate` method isn't powerful enough for your needs.
 
@@ -223,11 +298,11 @@ class AtomStructure:
         after transforming - the default is 12 decimal places but this can be\
         set to ``None`` if no rounding is to be done."""
 
-        for atom in self._atoms:
-            atom.transform(*args, **kwargs)
+        atoms, locations = gather_locations(self._atoms)
+        scatter_locations(atoms, locations.dot(np.array(matrix).T), trim)
 
 
-    def rotate(self, *args, **kwargs):
+    def rotate(self, angle, axis, *args, **kwargs):
         """Rotates the structure about an axis, updating all atom coordinates
         accordingly.
 
@@ -237,8 +312,7 @@ class AtomStructure:
         after translating - the default is 12 decimal places but this can be\
         set to ``None`` if no rounding is to be done."""
 
-        for atom in self._atoms:
-            atom.rotate(*args, **kwargs)
+        self.transform(rotation_matrix(angle, axis), *args, **kwargs)
 
 
     @property
@@ -484,6 +558,162 @@ class AtomStructure:
         f.save(path)
 
 
+def gather_locations(atoms):
+    """Takes some atoms and returns them as a list, along with a NumPy array of
+    their coordinates with one row per atom in the same order. If the atoms all
+    belong to the same packed :py:class:`.Model`, the coordinates are read
+    straight from its array. Otherwise the array is of integers if every
+    coordinate is an integer, so that moving atoms by whole amounts leaves
+    their coordinates as integers, as moving each atom by itself would.
+
+    :param atoms: The atoms to read.
+    :rtype: ``tuple``"""
+
+    atoms = list(atoms)
+    model = packed_model(atoms)
+    if model is not None:
+        return atoms, model._coordinates[[atom._row for atom in atoms]]
+    locations = np.array([atom.location for atom in atoms])
+    return atoms, locations.reshape(-1, 3)
+
+
+def scatter_locations(atoms, locations, trim=None):
+    """Takes a list of atoms and an array of new coordinates (one row per atom)
+    and moves each atom to its new location.
+
+    :param list atoms: The atoms to move.
+    :param numpy.ndarray locations: The new coordinates.
+    :param int trim: The number of decimal places to round the new\
+    coordinates to. If ``None``, no rounding will be done."""
+
+    locations = round_locations(locations, trim)
+    model = packed_model(atoms)
+    if model is not None:
+        model._coordinates[[atom._row for atom in atoms]] = locations
+        model._spatial_index = None
+    else:
+        for atom, location in zip(atoms, locations):
+            atom.move_to(*location)
+
+
+def round_locations(locations, places=None):
+    """Takes an array of coordinates and returns them as a list of lists,
+    rounded to some number of decimal places with Python's own ``round``, so
+    that they are rounded exactly as :py:meth:`.Atom.trim` would round them -
+    ``round(2.675, 2)`` is 2.67, for example, where NumPy would give 2.68.
+    Integers are left as integers.
+
+    :param numpy.ndarray locations: The coordinates to round.
+    :param int places: The number of decimal places to round to. If ``None``,\
+    no rounding will be done.
+    :rtype: ``list``"""
+
+    locations = locations.tolist()
+    if places is None: return locations
+    return [[round(value, places) for value in location]
+     for location in locations]
+
+
+def packed_model(atoms):
+    """Takes a list of atoms and, if they are all stored in the arrays of the
+    same packed :py:class:`.Model`, returns that model.
+
+    :param list atoms: The atoms to check.
+    :rtype: ``Model``"""
+
+    if atoms and atoms[0]._row is not None:
+        model = atoms[0]._model
+        if all(atom._model is model and atom._row is not None
+         for atom in atoms):
+            return model
+
+
+def register_atoms(structure, atoms, step):
+    """Updates a structure's registry of the ligands, residues, chains and
+    models its atoms belong to, when atoms are added to it (a step of 1) or
+    removed from it (a step of -1). The registry counts how many of the
+    structure's atoms belong to each child.
+
+    :param AtomStructure structure: The structure whose atoms changed.
+    :param atoms: The atoms added or removed.
+    :param int step: 1 or -1."""
+
+    for name in AtomStructure.CLASS_NAMES:
+        attribute = "_" + name
+        counts = Counter([getattr(atom, attribute) for atom in atoms])
+        counts.pop(None, None)
+        for child, count in counts.items():
+            count_child(structure, name, child, step * count)
+
+
+def set_atoms_structure(atoms, class_name, structure):
+    """Changes which ligand, residue, chain or model some atoms belong to, and
+    updates the registries of every structure which contains them. Atoms are
+    grouped by the structures they currently belong to, so that each
+    registry is updated once per group rather than once per atom.
+
+    Only structures which the atoms refer back to can be found this way. If an
+    atom is taken from a structure which still contains it, later changes to
+    the atom would not reach that structure, so it stops trusting its
+    registries and looks at its atoms instead, as it would if it had none.
+
+    :param atoms: The atoms to update.
+    :param str class_name: The kind of structure, such as ``'chain'``.
+    :param AtomStructure structure: The new structure (or ``None``)."""
+
+    attribute = "_" + class_name
+    attributes = ["_" + name for name in AtomStructure.CLASS_NAMES]
+    moves = Counter()
+    for atom in atoms:
+        old = getattr(atom, attribute)
+        if old is not structure:
+            if isinstance(old, AtomStructure) and atom in old._atoms:
+                old._registered = False
+            moves[(old, *[getattr(atom, a) for a in attributes])] += 1
+            setattr(atom, attribute, structure)
+    for (old, *containers), count in moves.items():
+        for container in set(containers + [old, structure]):
+            if isinstance(container, AtomStructure):
+                if old is not None:
+                    count_child(container, class_name, old, -count)
+                if structure is not None:
+                    count_child(container, class_name, structure, count)
+
+
+def count_child(structure, class_name, child, step):
+    """Adds to, or subtracts from, the number of atoms a structure shares with
+    one of its children. Children are removed from the registry when they no
+    longer share any atoms, and any ID or name indexes of that kind of child
+    are discarded whenever a child is added or removed.
+
+    :param AtomStructure structure: The structure to update.
+    :param str class_name: The kind of child, such as ``'residue'``.
+    :param AtomStructure child: The child structure.
+    :param int step: The change in the number of shared atoms."""
+
+    children = structure._children[class_name]
+    count = children.get(child, 0) + step
+    if count > 0:
+        children[child] = count
+        if count == step: structure._indexes.pop(class_name, None)
+    elif child in children:
+        del children[child]
+        structure._indexes.pop(class_name, None)
+
+
+def atom_structures(atoms):
+    """Takes some atoms and returns every ligand, residue, chain and model
+    which they belong to.
+
+    :param atoms: The atoms to inspect.
+    :rtype: ``set``"""
+
+    structures = {getattr(atom, "_" + name)
+     for atom in atoms for name in AtomStructure.CLASS_NAMES}
+    structures.discard(None)
+    return structures
+
+
 AtomStructure.atom.__doc__ =\
  AtomStructure.atom.__doc__.format(QUERY_DOCSTRING)
 AtomStructure.nearby_atoms.__doc__ =\
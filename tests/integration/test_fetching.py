@@ -0,0 +1,117 @@
+import os
+import gzip
+import shutil
+import socket
+import tempfile
+import threading
+from functools import partial
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+import requests
+from tests.integration.base import IntegratedTest
+import atomium
+
+class QuietHandler(SimpleHTTPRequestHandler):
+
+    def log_message(self, *args): pass
+
+
+
+class FetchingTests(IntegratedTest):
+    """Tests fetching files, using a local HTTP server to stand in for the
+    RCSB."""
+
+    def setUp(self):
+        IntegratedTest.setUp(self)
+        self.requests = []
+        requests = self.requests
+        class Handler(QuietHandler):
+            def do_GET(self):
+                requests.append(self.path)
+                SimpleHTTPRequestHandler.do_GET(self)
+        self.server = HTTPServer(("127.0.0.1", 0), partial(
+         Handler, directory="tests/integration/files"
+        ))
+        self.url = "http://127.0.0.1:{}/".format(self.server.server_port)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.temp = tempfile.mkdtemp()
+
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.temp)
+        IntegratedTest.tearDown(self)
+
+
+    def test_can_fetch_url(self):
+        pdb = atomium.fetch(self.url + "1lol.pdb")
+        self.assertEqual(pdb.title, atomium.open("tests/integration/files/1lol.pdb").title)
+        self.assertEqual(len(pdb.model.atoms()), 3431)
+        with self.assertRaises(ValueError):
+            atomium.fetch(self.url + "9xxx.pdb")
+
+
+    def test_can_fetch_into_download_directory(self):
+        downloads = os.path.join(self.temp, "downloads")
+        for i in range(3):
+            d = atomium.fetch(
+             self.url + "1lol.cif", download_dir=downloads, data_dict=True
+            )
+            self.assertEqual(len(d["models"][0]["atoms"]), 3431)
+        self.assertEqual(self.requests, ["/1lol.cif"])
+        self.assertEqual(len(os.listdir(downloads)), 1)
+        atomium.fetch(self.url + "1lol.cif", download_dir=downloads, download_age=-1)
+        self.assertEqual(len(self.requests), 2)
+        atomium.fetch(self.url + "1xda.cif", download_dir=downloads, download_size=1)
+        self.assertEqual(len(os.listdir(downloads)), 0)
+
+
+    def test_unresponsive_servers_time_out(self):
+        silent = socket.socket()
+        silent.bind(("127.0.0.1", 0))
+        silent.listen()
+        try:
+            url = "http://127.0.0.1:{}/1lol.pdb".format(silent.getsockname()[1])
+            with self.assertRaises(requests.Timeout):
+                atomium.fetch(url, timeout=0.1, retries=1)
+        finally: silent.close()
+
+
+    def test_can_fetch_from_divided_mirror(self):
+        os.makedirs(os.path.join(self.temp, "pdb", "lo"))
+        with open("tests/integration/files/1lol.pdb", "rb") as f:
+            with gzip.open(os.path.join(
+             self.temp, "pdb", "lo", "pdb1lol.ent.gz"
+            ), "wb") as g:
+                g.write(f.read())
+        pdb = atomium.fetch("1LOL", mirror=self.temp)
+        self.assertEqual(len(pdb.model.atoms()), 3431)
+        self.assertEqual(pdb.filetype, "pdb")
+
+
+    def test_can_fetch_from_flat_mirror(self):
+        shutil.copy("tests/integration/files/1xda.cif", self.temp)
+        cif = atomium.fetch("1xda.cif", mirror=self.temp)
+        self.assertEqual(cif.filetype, "cif")
+        self.assertEqual(
+         len(cif.model.atoms()),
+         len(atomium.open("tests/integration/files/1xda.cif").model.atoms())
+        )
+
+
+    def test_can_fetch_many(self):
+        names = ["1lol.pdb", "1xda.cif", "1cbn.pdb", "1lol.pdb"]
+        urls = [self.url + name for name in names]
+        for processes in (0, 2):
+            files = atomium.fetch_many(urls, processes=processes)
+            self.assertEqual([f.filetype for f in files], ["pdb", "cif", "pdb", "pdb"])
+            for name, f in zip(names, files):
+                opened = atomium.open("tests/integration/files/" + name)
+                self.assertEqual(f.title, opened.title)
+                self.assertEqual(len(f.model.atoms()), len(opened.model.atoms()))
+            dicts = atomium.fetch_many(urls, data_dict=True, processes=processes)
+            self.assertEqual(dicts[1], atomium.open(
+             "tests/integration/files/1xda.cif", data_dict=True
+            ))
+        with self.assertRaises(ValueError):
+            atomium.fetch_many([self.url + "9xxx.pdb"], retries=0)
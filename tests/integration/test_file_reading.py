@@ -741,3 +741,333 @@ class FileReadingTests(IntegratedTest):
         self.assertFalse(model.residues() & pdb.model.residues())
         self.assertFalse(model.ligands() & pdb.model.ligands())
         self.assertEqual(pdb.best_assembly["id"], 5)
+
+
+
+class FileStreamingTests(IntegratedTest):
+
+    def test_5xme_pdb(self):
+        pdb = atomium.open("tests/integration/files/5xme.pdb")
+        models = atomium.iter_models("tests/integration/files/5xme.pdb")
+        count = 0
+        for model, streamed in zip(pdb.models, models):
+            self.assertEqual(len(streamed.atoms()), 1827)
+            self.assertEqual(streamed.atom(1).location, model.atom(1).location)
+            self.assertEqual(
+             {r.id for r in streamed.residues()},
+             {r.id for r in model.residues()}
+            )
+            self.assertEqual(streamed.chain("A").sequence, model.chain("A").sequence)
+            count += 1
+        self.assertEqual(count, 10)
+
+
+    def test_1lol_pdb_gz(self):
+        import gzip
+        with open("tests/integration/files/1lol.pdb") as f:
+            with gzip.open("tests/integration/files/1lol.pdb.gz", "wt") as g:
+                g.write(f.read())
+        models = list(atomium.iter_models("tests/integration/files/1lol.pdb.gz"))
+        self.assertEqual(len(models), 1)
+        pdb = atomium.open("tests/integration/files/1lol.pdb")
+        self.assertEqual(len(models[0].atoms()), len(pdb.model.atoms()))
+        self.assertEqual(len(models[0].ligands()), len(pdb.model.ligands()))
+        atoms = list(atomium.iter_atoms("tests/integration/files/1lol.pdb.gz"))
+        self.assertEqual(len(atoms), len(pdb.model.atoms()))
+        self.assertEqual(atoms[0]["name"], "N")
+
+
+    def test_1lol_mmcif(self):
+        models = list(atomium.iter_models("tests/integration/files/1lol.cif"))
+        self.assertEqual(len(models), 1)
+        self.assertEqual(len(models[0].chains()), 2)
+
+
+    def test_1lol_mmcif_atoms(self):
+        atoms = list(atomium.iter_atoms("tests/integration/files/1lol.cif"))
+        pdb_atoms = list(atomium.iter_atoms("tests/integration/files/1lol.pdb"))
+        self.assertEqual(len(atoms), 3431)
+        self.assertEqual(len(atoms), len(pdb_atoms))
+        self.assertEqual(atoms[0]["name"], "N")
+        self.assertEqual(
+         (atoms[0]["x"], atoms[0]["y"], atoms[0]["z"]),
+         (pdb_atoms[0]["x"], pdb_atoms[0]["y"], pdb_atoms[0]["z"])
+        )
+
+
+    def test_1lol_mmcif_without_extension(self):
+        import os, shutil, tempfile
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "1lol")
+            shutil.copy("tests/integration/files/1lol.cif", path)
+            models = list(atomium.iter_models(path))
+        self.assertEqual(len(models), 1)
+        self.assertEqual(len(models[0].chains()), 2)
+
+
+
+class HeaderReadingTests(IntegratedTest):
+
+    def test_headers_match_full_files(self):
+        for code in ("1lol", "5xme", "1cbn", "1xda"):
+            for ext in ("pdb", "cif"):
+                path = "tests/integration/files/{}.{}".format(code, ext)
+                full = atomium.open(path, data_dict=True)
+                header = atomium.open(path, data_dict=True, header_only=True)
+                self.assertEqual(header["models"], [])
+                del full["models"], header["models"]
+                self.assertEqual(header, full)
+
+
+    def test_header_files_have_no_models(self):
+        pdb = atomium.open("tests/integration/files/1lol.pdb", header_only=True)
+        self.assertEqual(pdb.code, "1LOL")
+        self.assertEqual(pdb.resolution, 1.9)
+        self.assertEqual(len(pdb.assemblies), 1)
+        self.assertEqual(pdb.models, [])
+        self.assertIsNone(pdb.model)
+
+
+
+class FilteredReadingTests(IntegratedTest):
+
+    def test_filters_match_full_files(self):
+        for ext in ("pdb", "cif"):
+            path = "tests/integration/files/{}." + ext
+            full = atomium.open(path.format("1lol")).model
+            chain = atomium.open(path.format("1lol"), chains=["B"]).model
+            self.assertEqual(len(chain.chains()), 1)
+            self.assertEqual(
+             {a.id for a in chain.atoms()}, {a.id for a in full.chain("B").atoms()}
+            )
+            dry = atomium.open(path.format("1lol"), water=False).model
+            self.assertEqual(
+             {a.id for a in dry.atoms()},
+             {a.id for a in full.atoms()
+              if not (a.ligand and a.ligand.name == "HOH")}
+            )
+            nmr = atomium.open(path.format("5xme"))
+            first = atomium.open(path.format("5xme"), model=1, hydrogens=False)
+            self.assertEqual(len(first.models), 1)
+            self.assertEqual(
+             {(a.id, a.location) for a in first.model.atoms()},
+             {(a.id, a.location) for a in nmr.model.atoms() if a.element != "H"}
+            )
+            last = atomium.open(path.format("5xme"), model=10)
+            self.assertEqual(
+             {(a.id, a.location) for a in last.model.atoms()},
+             {(a.id, a.location) for a in nmr.models[9].atoms()}
+            )
+            self.assertEqual(atomium.open(path.format("5xme"), model=11).models, [])
+
+
+    def test_filters_agree_across_formats(self):
+        path = "tests/integration/files/5xme."
+        for filters in ({"chains": ["B"]}, {"chains": ["A"], "water": False},
+         {"model": 2, "hydrogens": False}, {"model": 2, "chains": ["B"]}):
+            pdb = atomium.open(path + "pdb", data_dict=True, **filters)
+            cif = atomium.open(path + "cif", data_dict=True, **filters)
+            self.assertEqual(len(pdb["models"]), len(cif["models"]))
+            for pdb_model, cif_model in zip(pdb["models"], cif["models"]):
+                self.assertTrue(
+                 [(a["name"], a["x"], a["y"], a["z"]) for a in pdb_model["atoms"]]
+                 == [(a["name"], a["x"], a["y"], a["z"]) for a in cif_model["atoms"]]
+                )
+
+
+    def test_altlocs_can_be_chosen(self):
+        for ext in ("pdb", "cif"):
+            path = "tests/integration/files/1cbn." + ext
+            full = atomium.open(path).model
+            first = atomium.open(path, altloc="first").model
+            self.assertEqual(
+             {a.id for a in first.atoms()}, {a.id for a in full.atoms()}
+            )
+            b = atomium.open(path, altloc="B").model
+            self.assertLess(len(b.atoms()), len(first.atoms()))
+            self.assertNotEqual(
+             {a.id for a in b.atoms()}, {a.id for a in first.atoms()}
+            )
+
+
+
+class LazyModelTests(IntegratedTest):
+
+    def test_models_are_created_when_needed(self):
+        for ext in ("pdb", "cif"):
+            pdb = atomium.open("tests/integration/files/5xme." + ext)
+            self.assertEqual(len(pdb.models), 10)
+            self.assertEqual(pdb.models._models, [None] * 10)
+            model = pdb.model
+            self.assertIs(pdb.models[0], model)
+            self.assertEqual(pdb.models._models[1:], [None] * 9)
+            self.assertEqual(len(pdb.models[9].atoms()), 1827)
+            self.assertEqual(len(model.residues()), 114)
+            self.assertEqual(sum(m is not None for m in pdb.models._models), 2)
+
+
+
+class ModelBuildingTests(IntegratedTest):
+
+    def test_built_models_match_created_models(self):
+        describe = lambda s: (s.__class__.__name__, s.id, s.name)
+        registry = lambda m: sorted(
+         (describe(s), name, sorted((describe(c), n) for c, n in children.items()))
+         for s in [m, *m.chains(), *m.residues(), *m.ligands()]
+         for name, children in s._children.items()
+        )
+        for name in ("1lol.pdb", "1lol.cif", "1cbn.pdb", "5xme.cif"):
+            model = atomium.open("tests/integration/files/" + name).model
+            copy = model.copy()
+            self.assertEqual(registry(model), registry(copy))
+            for chain in model.chains():
+                self.assertEqual(
+                 [res.id for res in chain],
+                 [res.id for res in copy.chain(chain.id)]
+                )
+                self.assertTrue(chain.verify())
+
+
+
+class CompressedReadingTests(IntegratedTest):
+
+    def test_can_open_compressed_files(self):
+        import gzip, bz2, lzma
+        for name, copy in (("1lol.pdb", "pdb1lol.ent"), ("1lol.cif", "1lol.cif")):
+            path = "tests/integration/files/" + name
+            data_dict = atomium.open(path, data_dict=True)
+            with open(path, "rb") as f: contents = f.read()
+            for module, ending in ((gzip, ".gz"), (bz2, ".bz2"), (lzma, ".xz")):
+                compressed = module.compress(contents)
+                for copy_name in (copy + ending, "compressed"):
+                    copy_path = "tests/integration/files/" + copy_name
+                    with open(copy_path, "wb") as f: f.write(compressed)
+                    self.assertEqual(atomium.open(
+                     copy_path, data_dict=True
+                    ), data_dict)
+                self.assertEqual(atomium.open(compressed, data_dict=True), data_dict)
+                with open(copy_path, "rb") as f:
+                    self.assertEqual(atomium.open(f, data_dict=True), data_dict)
+                    self.assertFalse(f.closed)
+            self.assertEqual(atomium.open(contents).filetype, name[-3:])
+
+
+    def test_can_read_compressed_pdb_header(self):
+        import gzip
+        path = "tests/integration/files/5xme.pdb.gz"
+        with open("tests/integration/files/5xme.pdb", "rb") as f:
+            with gzip.open(path, "wb") as g: g.write(f.read())
+        pdb = atomium.open(path, header_only=True)
+        self.assertEqual(pdb.code, "5XME")
+        self.assertEqual(pdb.models, [])
+        self.assertEqual(len(atomium.open(path).models), 10)
+        self.assertEqual(len(list(atomium.iter_models(path))), 10)
+
+
+
+class FileCachingTests(IntegratedTest):
+
+    def test_cache_returns_same_structures(self):
+        import os, tempfile
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for name in ("1lol.pdb", "1lol.cif"):
+                path = "tests/integration/files/" + name
+                data_dict = atomium.open(path, data_dict=True)
+                file_dict = atomium.open(path, file_dict=True)
+                sequence = atomium.open(path).model.chain("A").sequence
+                for i in range(2):
+                    self.assertEqual(atomium.open(
+                     path, cache_dir=cache_dir, data_dict=True
+                    ), data_dict)
+                    self.assertEqual(atomium.open(
+                     path, cache_dir=cache_dir, file_dict=True
+                    ), file_dict)
+                    f = atomium.open(path, cache_dir=cache_dir)
+                    self.assertEqual(f.filetype, name[-3:])
+                    self.assertEqual(f.title, data_dict["description"]["title"])
+                    self.assertEqual(len(f.model.atoms()), 3431)
+                    self.assertEqual(f.model.chain("A").sequence, sequence)
+            self.assertEqual(len(os.listdir(cache_dir)), 4)
+
+
+    def test_cache_is_private_and_checks_entries(self):
+        import os, pickle, stat, tempfile
+        with tempfile.TemporaryDirectory() as parent:
+            cache_dir = os.path.join(parent, "cache")
+            path = "tests/integration/files/1lol.pdb"
+            atomium.open(path, cache_dir=cache_dir)
+            self.assertEqual(stat.S_IMODE(os.stat(cache_dir).st_mode) & 0o077, 0)
+            entry = os.path.join(cache_dir, os.listdir(cache_dir)[0])
+            with open(entry, "wb") as f:
+                pickle.dump({"description": {"title": "FAKE"}}, f)
+            pdb = atomium.open(path, cache_dir=cache_dir)
+            self.assertNotEqual(pdb.title, "FAKE")
+            self.assertEqual(len(pdb.model.atoms()), 3431)
+
+
+    def test_unpicklable_entries_leave_nothing_behind(self):
+        import os, tempfile
+        from atomium.files.cache import save_to_cache
+        with tempfile.TemporaryDirectory() as cache_dir:
+            save_to_cache(cache_dir, "abc", lambda: None)
+            self.assertEqual(os.listdir(cache_dir), [])
+
+
+    def test_cache_is_size_bounded(self):
+        import os, tempfile
+        with tempfile.TemporaryDirectory() as cache_dir:
+            atomium.open("tests/integration/files/1lol.pdb", cache_dir=cache_dir)
+            size = os.path.getsize(os.path.join(cache_dir, os.listdir(cache_dir)[0]))
+            atomium.open(
+             "tests/integration/files/1lol.cif", cache_dir=cache_dir,
+             cache_size=size + 1
+            )
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+
+
+class ManyOpeningTests(IntegratedTest):
+
+    def test_can_open_many_files(self):
+        import os, gzip, shutil, tempfile
+        with tempfile.TemporaryDirectory() as mirror:
+            os.makedirs(os.path.join(mirror, "pdb", "lo"))
+            os.makedirs(os.path.join(mirror, "mmCIF", "xm"))
+            with open("tests/integration/files/1lol.pdb", "rb") as f:
+                with gzip.open(os.path.join(
+                 mirror, "pdb", "lo", "pdb1lol.ent.gz"
+                ), "wb") as g: shutil.copyfileobj(f, g)
+            shutil.copy(
+             "tests/integration/files/5xme.cif",
+             os.path.join(mirror, "mmCIF", "xm", "5xme.cif")
+            )
+            with open(os.path.join(mirror, "mmCIF", "bad.cif"), "wb") as f:
+                f.write(b"data_\xff\xfe")
+            with open(os.path.join(mirror, "README"), "w") as f:
+                f.write("not a structure")
+            paths = list(atomium.walk_files(mirror))
+            self.assertEqual([os.path.relpath(p, mirror) for p in paths], [
+             os.path.join("mmCIF", "bad.cif"),
+             os.path.join("mmCIF", "xm", "5xme.cif"),
+             os.path.join("pdb", "lo", "pdb1lol.ent.gz")
+            ])
+            for workers in (0, 2):
+                results = dict(atomium.open_many(mirror, workers=workers))
+                self.assertEqual(set(results), set(paths))
+                self.assertIsInstance(results[paths[0]], Exception)
+                self.assertEqual(results[paths[1]].code, "5XME")
+                self.assertEqual(results[paths[1]].filetype, "cif")
+                self.assertEqual(len(results[paths[2]].model.atoms()), 3431)
+                dicts = dict(atomium.open_many(
+                 paths[1:], data_dict=True, workers=workers, chunksize=2,
+                 model=1
+                ))
+                self.assertEqual(
+                 dicts[paths[2]], atomium.open(paths[2], data_dict=True)
+                )
+                self.assertEqual(len(dicts[paths[1]]["models"]), 1)
+            unnamed = os.path.join(mirror, "5xme")
+            shutil.copy("tests/integration/files/5xme.cif", unnamed)
+            for workers in (0, 2):
+                (path, f), = atomium.open_many([unnamed], workers=workers)
+                self.assertEqual(f.filetype, "cif")
@@ -0,0 +1,116 @@
+import os
+import gzip
+import socket
+import threading
+import paramiko
+from tests.integration.base import IntegratedTest
+import atomium
+
+class Server(paramiko.ServerInterface):
+
+    def check_auth_password(self, username, password):
+        if (username, password) == ("user", "pass"):
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED
+
+
+
+class SftpHandle(paramiko.SFTPHandle):
+
+    def stat(self):
+        return paramiko.SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+
+
+
+class SftpServer(paramiko.SFTPServerInterface):
+
+    def stat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    lstat = stat
+
+
+    def open(self, path, flags, attr):
+        try:
+            f = open(path, "rb")
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        handle = SftpHandle(flags)
+        handle.readfile = f
+        return handle
+
+
+
+class FetchingOverSshTests(IntegratedTest):
+    """Tests fetching files over SFTP, using a local paramiko server which
+    serves the test files."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.key = paramiko.RSAKey.generate(2048)
+
+
+    def setUp(self):
+        IntegratedTest.setUp(self)
+        self.connections = []
+        self.socket = socket.socket()
+        self.socket.bind(("127.0.0.1", 0))
+        self.socket.listen()
+        self.port = self.socket.getsockname()[1]
+        threading.Thread(target=self.serve, daemon=True).start()
+
+
+    def tearDown(self):
+        atomium.close_ssh_sessions()
+        self.socket.close()
+        for transport in self.connections: transport.close()
+        IntegratedTest.tearDown(self)
+
+
+    def serve(self):
+        while True:
+            try:
+                connection, address = self.socket.accept()
+            except OSError: return
+            transport = paramiko.Transport(connection)
+            transport.add_server_key(self.key)
+            transport.set_subsystem_handler(
+             "sftp", paramiko.SFTPServer, SftpServer
+            )
+            transport.start_server(server=Server())
+            self.connections.append(transport)
+
+
+    def test_can_fetch_many_files_over_one_connection(self):
+        directory = os.path.abspath("tests/integration/files")
+        with open(os.path.join(directory, "1lol.cif"), "rb") as f:
+            with gzip.open(os.path.join(directory, "1lol.cif.gz"), "wb") as g:
+                g.write(f.read())
+        files = atomium.fetch_many_over_ssh(
+         "127.0.0.1", "user", [
+          os.path.join(directory, name)
+          for name in ("1lol.pdb", "1lol.cif", "1lol.cif.gz")
+         ], password="pass", port=self.port
+        )
+        for f in files:
+            self.assertEqual(len(f.model.atoms()), 3431)
+        self.assertEqual(
+         [f.filetype for f in files], ["pdb", "cif", "cif"]
+        )
+        self.assertEqual(files[1].title, files[2].title)
+        atomium.fetch_many_over_ssh(
+         "127.0.0.1", "user", [os.path.join(directory, "1lol.pdb")],
+         password="pass", port=self.port
+        )
+        self.assertEqual(len(self.connections), 1)
@@ -193,6 +193,21 @@ class CreationTests(IntegratedTest):
         self.assertEqual(
          self.atoms[0].nearby_atoms(1, element="C"), {self.atoms[1]}
         )
+        self.atoms[1].move_to(10, 10, 10)
+        self.assertEqual(
+         self.atoms[0].nearby_atoms(1), {self.atoms[3], self.atoms[9]}
+        )
+        model.remove(self.atoms[3])
+        self.assertEqual(self.atoms[0].nearby_atoms(1), {self.atoms[9]})
+        model.add(self.atoms[3])
+        self.atoms[1].move_to(1, 0, 0)
+        self.assertEqual(
+         self.atoms[0].nearby_atoms(1), {self.atoms[1], self.atoms[3], self.atoms[9]}
+        )
+        model.translate(100, 100, 100)
+        self.assertEqual(model.atoms_in_sphere(0, 0, 0, 5), set())
+        self.assertEqual(len(model.atoms_in_sphere(101, 101, 101, 5)), 27)
+        model.translate(-100, -100, -100)
 
         # Model copying
         copy = model.copy()
@@ -406,3 +421,77 @@ class CreationTests(IntegratedTest):
         self.assertEqual(self.atoms[26].location, (2, 2, 2))
         self.assertEqual(self.atoms[17].location, (2, 2, 1))
         self.assertEqual(self.atoms[8].location, (2, 2, 0))
+
+
+
+class ChainOrderTests(IntegratedTest):
+    """Tests relating to keeping residues in order."""
+
+    def test_chain_residue_order_stays_in_sync(self):
+        chain = atomium.open("tests/integration/files/1lol.pdb").model.chain("A")
+        residues = chain.residues()
+        self.assertEqual(len(chain), 204)
+        self.assertEqual([chain[i] for i in range(len(chain))], list(residues))
+        self.assertEqual(list(chain), list(residues))
+        self.assertEqual(
+         chain.residues(name="VAL"), tuple(r for r in residues if r.name == "VAL")
+        )
+        chain.remove(residues[-1])
+        self.assertEqual(len(chain), 203)
+        self.assertEqual(chain[-1], residues[-2])
+        residues[-2].next = None
+        chain.add(residues[-1])
+        self.assertEqual(len(chain), 203)
+        residues[-2].next = residues[-1]
+        self.assertEqual(chain[-1], residues[-1])
+        self.assertEqual(len(chain), 204)
+        for atom in list(residues[0].atoms()):
+            residues[0].remove(atom)
+        self.assertEqual(chain[0], residues[1])
+        self.assertEqual(chain.sequence[:3], "".join(r.code for r in residues[1:4]))
+
+
+
+class ChildRegistryTests(IntegratedTest):
+    """Tests relating to structures keeping track of their substructures."""
+
+    def test_child_lookups_stay_in_sync(self):
+        model = atomium.open("tests/integration/files/1lol.pdb").model
+        chain = model.chain("A")
+        residue = chain.residue("A:11")
+        self.assertIs(residue.chain, chain)
+        self.assertIs(model.residue("A:11"), residue)
+        self.assertEqual(len(model.ligands()), 184)
+        self.assertEqual(len(model.ligands(water=False)), 4)
+        chain.remove(residue)
+        self.assertIsNone(residue.chain)
+        self.assertIs(model.residue("A:11"), residue)
+        self.assertIsNone(chain.residue("A:11"))
+        model.remove(residue)
+        self.assertIsNone(model.residue("A:11"))
+        self.assertNotIn(residue, model.residues())
+        chain.add(residue)
+        self.assertIs(residue.chain, chain)
+        self.assertIs(chain.residue("A:11"), residue)
+        self.assertIsNone(model.residue("A:11"))
+        residue.name = "XYZ"
+        self.assertEqual(chain.residues(name="XYZ"), (residue,))
+        self.assertEqual(residue.chain.residues(name=residue.name), (residue,))
+        ligand = model.ligand(name="XMP")
+        ligand.name = "HOH"
+        self.assertEqual(len(model.ligands(water=False)), 3)
+        self.assertEqual(len(model.ligands()), 184)
+
+
+    def test_structures_which_lose_atoms_stay_in_sync(self):
+        model = atomium.open("tests/integration/files/1lol.pdb").model
+        atomium.Model(*model.chain("A").atoms())
+        residue = model.residue("A:11")
+        new = atomium.Residue(*residue.atoms(), id="X1", name="NEW")
+        self.assertIs(model.residue("X1"), new)
+        self.assertIsNone(model.residue("A:11"))
+        self.assertNotIn(residue, model.residues())
+        self.assertIn(new, model.residues())
+        new.name = "OLD"
+        self.assertIs(model.residue(name="OLD"), new)
+        self.assertIsNone(model.residue(name="NEW"))
@@ -0,0 +1,56 @@
+"""Regression benchmark for parsing .cif files with anisotropy data.
+
+Every atom in 1LOL is given an atom_site_anisotrop row, and the time taken to
+build the model from the file dictionary is measured as the number of atoms is
+doubled. If the anisotropy join is linear, the time per atom should stay
+roughly constant. A PDB code can be given to also time a real anisotropic
+structure from the PDBe (3NIR, for example)."""
+
+import sys
+import time
+from copy import deepcopy
+sys.path.insert(0, ".")
+import atomium
+from atomium.files.mmcif import mmcif_dict_to_data_dict
+import requests
+
+def anisotropic_dict(mmcif_dict, copies):
+    d = deepcopy(mmcif_dict)
+    atoms, anisotropy = [], []
+    for copy in range(copies):
+        for atom in mmcif_dict["atom_site"]:
+            atom = dict(atom)
+            atom["id"] = str(len(atoms) + 1)
+            atoms.append(atom)
+            anisotropy.append({
+             "id": atom["id"], "U[1][1]": "1", "U[1][2]": "2", "U[1][3]": "3",
+             "U[2][2]": "4", "U[2][3]": "5", "U[3][3]": "6"
+            })
+    d["atom_site"], d["atom_site_anisotrop"] = atoms, anisotropy
+    return d
+
+
+def time_dict(mmcif_dict):
+    start = time.time()
+    mmcif_dict_to_data_dict(mmcif_dict)
+    return time.time() - start
+
+
+base = atomium.open("tests/integration/files/1lol.cif", file_dict=True)
+for copies in (1, 2, 4, 8):
+    d = anisotropic_dict(base, copies)
+    elapsed = time_dict(d)
+    print("{} atoms: {:.2f}s ({:.1f}us per atom)".format(
+     len(d["atom_site"]), elapsed, elapsed / len(d["atom_site"]) * 1000000
+    ))
+
+if len(sys.argv) > 1:
+    code = sys.argv[1].lower()
+    filestring = requests.get(
+     "http://www.ebi.ac.uk/pdbe/entry-files/{}.cif".format(code)
+    ).text
+    d = atomium.files.mmcif.mmcif_string_to_mmcif_dict(filestring)
+    print("{}: {} atoms, {} anisotropy rows: {:.2f}s".format(
+     code, len(d["atom_site"]), len(d.get("atom_site_anisotrop", [])),
+     time_dict(d)
+    ))
@@ -0,0 +1,47 @@
+"""Benchmark for parsing structure files from a memory map.
+
+1EJ6 is parsed as a .cif file and as a .pdb file, first the old way - by
+reading the whole file into a string and parsing that - and then by mapping
+the file into memory and parsing it a chunk of lines at a time. The time
+taken and the peak memory allocated by Python while making the file
+dictionary are shown for each, alongside the size of the file."""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+sys.path.insert(0, ".")
+import atomium
+from atomium.files.utilities import parse_string
+
+def read_and_parse(path):
+    with open(path) as f:
+        return parse_string(f.read(), path, file_dict=True)
+
+
+def measure(func, path):
+    tracemalloc.start()
+    start = time.time()
+    func(path)
+    elapsed = time.time() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2 ** 20
+
+
+with tempfile.TemporaryDirectory() as directory:
+    cif = "tests/integration/files/1ej6.cif"
+    pdb = os.path.join(directory, "1ej6.pdb")
+    atomium.open(cif).model.save(pdb)
+    for path in (cif, pdb):
+        print("{} ({:.1f} MB)".format(
+         os.path.basename(path), os.path.getsize(path) / 2 ** 20
+        ))
+        for name, func in (
+         ("String", read_and_parse),
+         ("Memory map", lambda p: atomium.open(p, file_dict=True))
+        ):
+            print("    {}: {:.2f}s, {:.0f} MB peak".format(
+             name, *measure(func, path)
+            ))
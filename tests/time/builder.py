@@ -0,0 +1,50 @@
+"""Benchmark for building models from data dictionaries.
+
+Times turning the first model dictionary of each test file into a Model, with
+the ModelBuilder and with the older approach of creating each Model, Residue,
+Ligand and Chain with its constructor in turn."""
+
+import sys
+import timeit
+sys.path.insert(0, ".")
+import atomium
+from atomium.files.data import model_dict_to_model, atom_dict_to_atom
+from atomium.files.data import het_atom_locations, bond_atoms
+from atomium.models.data import CODES
+
+def construct_model(m):
+    atoms = {a["id"]: atom_dict_to_atom(a) for a in m["atoms"]}
+    model = atomium.Model(*atoms.values())
+    names = {het["id"]: het["name"] for het in m["ligands"] + m["residues"]}
+    hets = {}
+    for a in m["atoms"]:
+        hets.setdefault(a["full_res_id"], []).append(a)
+    for chain in m["chains"]:
+        residues, ligands = [], []
+        for het_id, het_atoms in hets.items():
+            if het_atoms[0]["chain_id"] != chain["id"]: continue
+            Het = atomium.Residue if het_atoms[0]["polymer"] else atomium.Ligand
+            het = Het(*[atoms[a["id"]] for a in het_atom_locations(het_atoms)],
+             id=het_id, name=names[het_id])
+            (residues if Het is atomium.Residue else ligands).append(het)
+        for res1, res2 in zip(residues[:-1], residues[1:]):
+            res1.next = res2
+        atomium.Chain(*residues, *ligands, id=chain["id"], rep="".join(
+         [CODES.get(res, "X") for res in chain["full_sequence"]]
+        ))
+    for a in model.atoms():
+        if not a.residue and not a.ligand and a.name: model.remove(a)
+    bond_atoms(model, m["connections"])
+    return model
+
+
+for path in ("1lol.pdb", "1lol.cif", "5xme.cif", "1ej6.cif"):
+    m = atomium.open(
+     "tests/integration/files/" + path, data_dict=True
+    )["models"][0]
+    old, new = [min(timeit.repeat(
+     lambda: func(m), number=1, repeat=5
+    )) for func in (construct_model, model_dict_to_model)]
+    print("{} ({} atoms): constructors {:.3f}s, builder {:.3f}s ({:.1f}x)".format(
+     path, len(m["atoms"]), old, new, old / new
+    ))
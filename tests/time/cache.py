@@ -0,0 +1,29 @@
+"""Benchmark for the parsed file cache.
+
+Times opening each test file without a cache, and then from a warm cache, for
+each of the three things atomium.open can return. The cache stores data
+dictionaries (or file dictionaries), so the File timings still include building
+the models."""
+
+import sys
+import timeit
+import tempfile
+sys.path.insert(0, ".")
+import atomium
+
+with tempfile.TemporaryDirectory() as cache_dir:
+    for path in ("1lol.pdb", "5xme.pdb", "1lol.cif", "1ej6.cif"):
+        path = "tests/integration/files/" + path
+        for kwargs in ({"file_dict": True}, {"data_dict": True}, {}):
+            atomium.open(path, cache_dir=cache_dir, **kwargs)
+            parsed = min(timeit.repeat(
+             lambda: atomium.open(path, **kwargs), number=1, repeat=3
+            ))
+            cached = min(timeit.repeat(
+             lambda: atomium.open(path, cache_dir=cache_dir, **kwargs),
+             number=1, repeat=3
+            ))
+            print("{} {}: parsed {:.3f}s, cached {:.3f}s ({:.1f}x faster)".format(
+             path, list(kwargs)[0] if kwargs else "File",
+             parsed, cached, parsed / cached
+            ))
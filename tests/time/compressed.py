@@ -0,0 +1,48 @@
+"""Benchmark for opening compressed structure files.
+
+1EJ6 is saved as a gzipped .pdb file, which is then opened the old way - by
+decompressing it to a temporary file and opening that - and by opening it
+directly, which decompresses it as it is read. The time taken and the peak
+memory allocated by Python are shown for each."""
+
+import os
+import sys
+import gzip
+import shutil
+import tempfile
+import time
+import tracemalloc
+sys.path.insert(0, ".")
+import atomium
+
+def decompress_and_open(path):
+    with tempfile.TemporaryDirectory() as directory:
+        plain = os.path.join(directory, "file.pdb")
+        with gzip.open(path, "rb") as f, open(plain, "wb") as g:
+            shutil.copyfileobj(f, g)
+        return atomium.open(plain, data_dict=True)
+
+
+def measure(func, path):
+    tracemalloc.start()
+    start = time.time()
+    func(path)
+    elapsed = time.time() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2 ** 20
+
+
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, "1ej6.pdb.gz")
+    atomium.open("tests/integration/files/1ej6.cif").model.save(path[:-3])
+    with open(path[:-3], "rb") as f, gzip.open(path, "wb") as g:
+        shutil.copyfileobj(f, g)
+    print("{:.1f} MB file, {:.1f} MB compressed".format(
+     os.path.getsize(path[:-3]) / 2 ** 20, os.path.getsize(path) / 2 ** 20
+    ))
+    for name, func in (
+     ("Temporary file", decompress_and_open),
+     ("Direct", lambda p: atomium.open(p, data_dict=True))
+    ):
+        print("{}: {:.2f}s, {:.0f} MB peak".format(name, *measure(func, path)))
@@ -0,0 +1,50 @@
+"""Benchmark for fetching many files at once.
+
+Serves the test files from a local HTTP server which waits before answering
+each request, to stand in for a remote server, and compares fetching them one
+at a time with atomium.fetch against fetching them all with
+atomium.fetch_many. An optional argument sets the delay in seconds."""
+
+import sys
+import time
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+sys.path.insert(0, ".")
+import atomium
+
+DELAY = float(sys.argv[1]) if len(sys.argv) > 1 else 0.2
+
+class SlowHandler(SimpleHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        time.sleep(DELAY)
+        SimpleHTTPRequestHandler.do_GET(self)
+
+
+    def log_message(self, *args): pass
+
+
+
+if __name__ == "__main__":
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(
+     SlowHandler, directory="tests/integration/files"
+    ))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:{}/".format(server.server_port)
+    urls = [url + name for name in
+     ("1lol.pdb", "1lol.cif", "5xme.pdb", "1xda.cif", "1cbn.pdb") * 8]
+    for kwargs in ({"data_dict": True}, {}):
+        start = time.time()
+        [atomium.fetch(url, **kwargs) for url in urls]
+        serial = time.time() - start
+        start = time.time()
+        atomium.fetch_many(urls, **kwargs)
+        many = time.time() - start
+        print("{} {}: fetch {:.2f}s, fetch_many {:.2f}s ({:.1f}x faster)".format(
+         len(urls), "data dicts" if kwargs else "files",
+         serial, many, serial / many
+        ))
+    server.shutdown()
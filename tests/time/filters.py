@@ -0,0 +1,24 @@
+"""Benchmark for filtering atoms while parsing.
+
+Times opening the test files in full, and with the filters most often wanted -
+the first model only, one chain, and no water or hydrogens."""
+
+import sys
+import timeit
+sys.path.insert(0, ".")
+import atomium
+
+for name, filters in (
+ ("5xme.pdb", {"model": 1}), ("5xme.cif", {"model": 1}),
+ ("5xme.pdb", {"model": 1, "hydrogens": False}),
+ ("1lol.pdb", {"chains": ["A"], "water": False}),
+ ("1lol.cif", {"chains": ["A"], "water": False})
+):
+    path = "tests/integration/files/" + name
+    full = min(timeit.repeat(lambda: atomium.open(path), number=1, repeat=3))
+    filtered = min(timeit.repeat(
+     lambda: atomium.open(path, **filters), number=1, repeat=3
+    ))
+    print("{} {}: full {:.3f}s, filtered {:.3f}s ({:.1f}x faster)".format(
+     name, filters, full, filtered, full / filtered
+    ))
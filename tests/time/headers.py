@@ -0,0 +1,19 @@
+"""Benchmark for reading only the metadata of structure files.
+
+Times opening each of the test files in full and with ``header_only=True``,
+which is what a job that catalogues a whole mirror of the PDB would do."""
+
+import sys
+import timeit
+sys.path.insert(0, ".")
+import atomium
+
+for name in ("1lol.pdb", "5xme.pdb", "1lol.cif", "5xme.cif"):
+    path = "tests/integration/files/" + name
+    full = min(timeit.repeat(lambda: atomium.open(path), number=1, repeat=3))
+    header = min(timeit.repeat(
+     lambda: atomium.open(path, header_only=True), number=1, repeat=3
+    ))
+    print("{}: full {:.3f}s, header {:.4f}s ({:.0f}x faster)".format(
+     name, full, header, full / header
+    ))
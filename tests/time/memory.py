@@ -0,0 +1,39 @@
+"""Memory benchmark for atoms.
+
+Measures how many bytes each atom takes up, first for bare atoms created
+directly, and then for whole models built from the test files (which includes
+their residues, chains and bonds). The data dictionaries are made before
+measuring, so that only the model objects are counted. Run it on two checkouts
+to compare layouts."""
+
+import sys
+import tracemalloc
+sys.path.insert(0, ".")
+import atomium
+from atomium.files.data import data_dict_to_file
+
+NUMBER = 100000
+
+def allocated(func):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+size, atoms = allocated(lambda: [atomium.Atom(
+ "C", i, i, i, id=i, name="CA", bfactor=10
+) for i in range(NUMBER)])
+print("{} bare atoms: {:.0f} bytes per atom".format(NUMBER, size / NUMBER))
+del atoms
+
+for path in ("1lol.pdb", "5xme.pdb", "1lol.cif", "1xda.cif"):
+    path = "tests/integration/files/" + path
+    data_dict = atomium.open(path, data_dict=True)
+    size, f = allocated(lambda: data_dict_to_file(data_dict))
+    atom_count = sum(len(model.atoms()) for model in f.models)
+    print("{}: {} atoms, {:.0f} bytes per atom".format(
+     path, atom_count, size / atom_count
+    ))
@@ -0,0 +1,52 @@
+"""Benchmark for opening many files in parallel.
+
+A directory of copies of a few structure files is opened one file after
+another, and then with open_many using one process per CPU. The cost of
+sending a parsed file between processes is also shown, by pickling a Model and
+its data dictionary. With a single CPU, open_many can only add overhead."""
+
+import os
+import sys
+import time
+import pickle
+import shutil
+import tempfile
+sys.path.insert(0, ".")
+import atomium
+
+NAMES = ["1lol.cif", "5xme.pdb", "1cbn.pdb", "1xda.cif"]
+COPIES = 10
+
+with tempfile.TemporaryDirectory() as directory:
+    for copy in range(COPIES):
+        for name in NAMES:
+            shutil.copy(
+             os.path.join("tests/integration/files", name),
+             os.path.join(directory, "{}_{}".format(copy, name))
+            )
+    paths = list(atomium.walk_files(directory))
+    print("{} files, {} CPUs".format(len(paths), os.cpu_count()))
+    start = time.time()
+    for path in paths: atomium.open(path, data_dict=True)
+    print("One at a time: {:.2f}s".format(time.time() - start))
+    start = time.time()
+    for path, data in atomium.open_many(
+     directory, data_dict=True, workers=os.cpu_count(), chunksize=4
+    ): pass
+    print("open_many: {:.2f}s".format(time.time() - start))
+
+def pickle_time(obj):
+    start = time.time()
+    pickle.loads(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+    return time.time() - start
+
+
+path = "tests/integration/files/1lol.cif"
+limit = sys.getrecursionlimit()
+sys.setrecursionlimit(100000)
+print("Sending 1LOL between processes:")
+print("    Model: {:.3f}s".format(pickle_time(atomium.open(path).model)))
+print("    Data dictionary: {:.3f}s".format(
+ pickle_time(atomium.open(path, data_dict=True))
+))
+sys.setrecursionlimit(limit)
@@ -0,0 +1,40 @@
+"""Benchmark for decoding the atom records of .pdb files.
+
+A large .pdb model is made by repeating the atom records of 1EJ6 until there
+are the given number of atoms (1,000,000 by default), and its records are
+converted to atom dictionaries one at a time, and then all at once. The time
+taken to parse the whole file is also shown."""
+
+import sys
+import time
+sys.path.insert(0, ".")
+import atomium
+from atomium.files.file import File
+from atomium.files.pdb import file_to_pdb_string
+from atomium.files.pdb import atom_line_to_atom_dict, atom_lines_to_atom_dicts
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+f = File()
+f._models = [atomium.open("tests/integration/files/1ej6.cif").model]
+lines = [
+ line for line in file_to_pdb_string(f).split("\n")
+ if line.startswith("ATOM")
+]
+lines = (lines * (count // len(lines) + 1))[:count]
+records = [line[6:].rstrip() for line in lines]
+
+start = time.time()
+old = [atom_line_to_atom_dict(record) for record in records]
+old_time = time.time() - start
+start = time.time()
+new = atom_lines_to_atom_dicts(records)
+new_time = time.time() - start
+assert old == new
+print("{} records: one at a time {:.2f}s, all at once {:.2f}s ({:.1f}x)".format(
+ count, old_time, new_time, old_time / new_time
+))
+del old, new
+
+start = time.time()
+atomium.files.utilities.parse_string("\n".join(lines), "big.pdb", data_dict=True)
+print("Whole file: {:.2f}s".format(time.time() - start))
@@ -0,0 +1,35 @@
+"""Microbenchmark for creating data dictionary records.
+
+Compares deep-copying the template dictionaries with the record functions in
+atomium.files.data, and then times building the data dictionaries of the test
+files, which creates one atom record per atom."""
+
+import sys
+import timeit
+from copy import deepcopy
+sys.path.insert(0, ".")
+import atomium
+from atomium.files.data import ATOM_DICT, RESIDUE_DICT, CHAIN_DICT, MODEL_DICT
+from atomium.files.data import new_atom_dict, new_residue_dict
+from atomium.files.data import new_chain_dict, new_model_dict
+
+NUMBER = 100000
+
+for name, old, new in (
+ ("atom", lambda: deepcopy(ATOM_DICT), new_atom_dict),
+ ("residue", lambda: deepcopy(RESIDUE_DICT), new_residue_dict),
+ ("chain", lambda: deepcopy(CHAIN_DICT), new_chain_dict),
+ ("model", lambda: deepcopy(MODEL_DICT), new_model_dict)
+):
+    old_time = timeit.timeit(old, number=NUMBER) / NUMBER * 1000000
+    new_time = timeit.timeit(new, number=NUMBER) / NUMBER * 1000000
+    print("{}: deepcopy {:.2f}us, new {:.2f}us ({:.0f}x faster)".format(
+     name, old_time, new_time, old_time / new_time
+    ))
+
+for path in ("1lol.pdb", "5xme.pdb", "1lol.cif", "5xme.cif"):
+    path = "tests/integration/files/" + path
+    seconds = min(timeit.repeat(
+     lambda: atomium.open(path, data_dict=True), number=1, repeat=3
+    ))
+    print("{}: {:.3f}s".format(path, seconds))
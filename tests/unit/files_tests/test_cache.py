@@ -0,0 +1,331 @@
+from unittest import TestCase
+from unittest.mock import Mock, patch, MagicMock
+import gc
+import pickle
+from atomium.files.cache import *
+from atomium import __version__
+
+class CacheKeyTests(TestCase):
+
+    def test_cache_key_depends_on_contents(self):
+        self.assertEqual(cache_key("ABC"), cache_key("ABC"))
+        self.assertNotEqual(cache_key("ABC"), cache_key("ABD"))
+        self.assertEqual(len(cache_key("ABC")), 64)
+
+
+    def test_cache_key_depends_on_options(self):
+        self.assertEqual(cache_key("ABC", "pdb", 1), cache_key("ABC", "pdb", 1))
+        self.assertNotEqual(cache_key("ABC", "pdb"), cache_key("ABC", "cif"))
+        self.assertNotEqual(cache_key("ABC", "pdb"), cache_key("ABC"))
+
+
+    @patch("atomium.files.cache.__version__", "100.0")
+    def test_cache_key_depends_on_version(self):
+        key = cache_key("ABC")
+        with patch("atomium.files.cache.__version__", "100.1"):
+            self.assertNotEqual(cache_key("ABC"), key)
+
+
+
+class CachePathTests(TestCase):
+
+    def test_can_get_cache_path(self):
+        self.assertEqual(cache_path("dir", "abc"), "dir/abc.pickle")
+
+
+
+class CacheHeaderTests(TestCase):
+
+    def test_cache_header_has_version(self):
+        self.assertIn(__version__.encode(), CACHE_HEADER)
+        self.assertTrue(CACHE_HEADER.endswith(b"\n"))
+
+
+
+class CacheLoadingTests(TestCase):
+
+    @patch("builtins.open")
+    @patch("pickle.load")
+    @patch("os.utime")
+    def test_can_load_from_cache(self, mock_utime, mock_load, mock_open):
+        f = mock_open.return_value.__enter__.return_value
+        f.read.return_value = CACHE_HEADER
+        obj = load_from_cache("dir", "abc")
+        mock_open.assert_called_with("dir/abc.pickle", "rb")
+        f.read.assert_called_with(len(CACHE_HEADER))
+        mock_load.assert_called_with(f)
+        mock_utime.assert_called_with("dir/abc.pickle")
+        self.assertIs(obj, mock_load.return_value)
+
+
+    @patch("builtins.open")
+    @patch("os.utime")
+    def test_missing_entries_return_none(self, mock_utime, mock_open):
+        mock_open.side_effect = FileNotFoundError
+        self.assertIsNone(load_from_cache("dir", "abc"))
+        self.assertFalse(mock_utime.called)
+
+
+    @patch("builtins.open")
+    @patch("pickle.load")
+    def test_unreadable_entries_return_none(self, mock_load, mock_open):
+        f = mock_open.return_value.__enter__.return_value
+        f.read.return_value = CACHE_HEADER
+        mock_load.side_effect = EOFError
+        self.assertIsNone(load_from_cache("dir", "abc"))
+
+
+    @patch("builtins.open")
+    @patch("pickle.load")
+    @patch("os.utime")
+    def test_entries_without_header_are_not_unpickled(self, mock_utime, mock_load, mock_open):
+        f = mock_open.return_value.__enter__.return_value
+        f.read.return_value = b"\x80\x04\x95"
+        self.assertIsNone(load_from_cache("dir", "abc"))
+        self.assertFalse(mock_load.called)
+        self.assertFalse(mock_utime.called)
+        self.assertTrue(gc.isenabled())
+
+
+    @patch("builtins.open")
+    @patch("pickle.load")
+    @patch("os.utime")
+    def test_garbage_collection_is_restored(self, mock_utime, mock_load, mock_open):
+        mock_load.side_effect = EOFError
+        load_from_cache("dir", "abc")
+        self.assertTrue(gc.isenabled())
+
+
+
+class CacheSavingTests(TestCase):
+
+    def setUp(self):
+        self.patch1 = patch("os.makedirs")
+        self.patch2 = patch("tempfile.mkstemp")
+        self.patch3 = patch("os.fdopen")
+        self.patch4 = patch("pickle.dump")
+        self.patch5 = patch("os.replace")
+        self.patch6 = patch("atomium.files.cache.evict_from_cache")
+        self.mock_makedirs = self.patch1.start()
+        self.mock_mkstemp = self.patch2.start()
+        self.mock_fdopen = self.patch3.start()
+        self.mock_dump = self.patch4.start()
+        self.mock_replace = self.patch5.start()
+        self.mock_evict = self.patch6.start()
+        self.mock_mkstemp.return_value = (5, "dir/xyz.tmp")
+
+
+    def tearDown(self):
+        for p in (self.patch1, self.patch2, self.patch3, self.patch4,
+         self.patch5, self.patch6):
+            p.stop()
+
+
+    def test_can_save_to_cache(self):
+        save_to_cache("dir", "abc", {"a": 1}, 100)
+        self.mock_makedirs.assert_called_with("dir", mode=0o700, exist_ok=True)
+        self.mock_mkstemp.assert_called_with(dir="dir", suffix=".tmp")
+        self.mock_fdopen.assert_called_with(5, "wb")
+        f = self.mock_fdopen.return_value.__enter__.return_value
+        f.write.assert_called_with(CACHE_HEADER)
+        self.mock_dump.assert_called_with(
+         {"a": 1}, f, protocol=pickle.HIGHEST_PROTOCOL
+        )
+        self.mock_replace.assert_called_with("dir/xyz.tmp", "dir/abc.pickle")
+        self.mock_evict.assert_called_with("dir", 100)
+
+
+    @patch("os.remove")
+    def test_failed_saves_are_cleaned_up(self, mock_remove):
+        self.mock_replace.side_effect = PermissionError
+        save_to_cache("dir", "abc", {"a": 1}, 100)
+        mock_remove.assert_called_with("dir/xyz.tmp")
+        self.assertFalse(self.mock_evict.called)
+
+
+
+class CacheEvictionTests(TestCase):
+
+    def setUp(self):
+        self.entries = []
+        for name, atime, size in (("a.pickle", 3, 10), ("b.pickle", 1, 20),
+         ("c.tmp", 0, 100), ("d.pickle", 2, 30), ("e.pickle", 4, 0)):
+            entry = Mock(path="dir/" + name)
+            entry.name = name
+            entry.stat.return_value = Mock(
+             st_atime=atime, st_mtime=10 - atime, st_size=size
+            )
+            self.entries.append(entry)
+
+
+    @patch("os.scandir")
+    @patch("os.remove")
+    def test_can_evict_least_recently_used(self, mock_remove, mock_scandir):
+        mock_scandir.return_value = self.entries
+        evict_from_cache("dir", 25)
+        mock_scandir.assert_called_with("dir")
+        self.assertEqual(
+         [c[0][0] for c in mock_remove.call_args_list],
+         ["dir/b.pickle", "dir/d.pickle"]
+        )
+
+
+    @patch("os.scandir")
+    @patch("os.remove")
+    def test_small_cache_is_left_alone(self, mock_remove, mock_scandir):
+        mock_scandir.return_value = self.entries
+        evict_from_cache("dir", 60)
+        self.assertFalse(mock_remove.called)
+
+
+    @patch("os.scandir")
+    @patch("os.remove")
+    def test_eviction_tolerates_other_processes(self, mock_remove, mock_scandir):
+        self.entries[0].stat.side_effect = FileNotFoundError
+        mock_scandir.return_value = self.entries
+        mock_remove.side_effect = FileNotFoundError
+        evict_from_cache("dir", 0)
+        self.assertEqual(mock_remove.call_count, 2)
+
+
+    @patch("os.scandir")
+    @patch("os.remove")
+    @patch("time.time")
+    def test_can_evict_old_entries(self, mock_time, mock_remove, mock_scandir):
+        mock_time.return_value = 17
+        self.entries[2].name = "c.download"
+        mock_scandir.return_value = self.entries
+        evict_from_cache("dir", 1000, ".download", max_age=6)
+        mock_remove.assert_called_once_with("dir/c.tmp")
+        mock_remove.reset_mock()
+        evict_from_cache("dir", 1000, max_age=8)
+        self.assertEqual(
+         [c[0][0] for c in mock_remove.call_args_list],
+         ["dir/a.pickle", "dir/d.pickle", "dir/e.pickle"]
+        )
+
+
+
+class EntryWritingTests(TestCase):
+
+    def setUp(self):
+        self.patch1 = patch("os.makedirs")
+        self.patch2 = patch("tempfile.mkstemp")
+        self.patch3 = patch("os.fdopen")
+        self.patch4 = patch("os.replace")
+        self.mock_makedirs = self.patch1.start()
+        self.mock_mkstemp = self.patch2.start()
+        self.mock_fdopen = self.patch3.start()
+        self.mock_replace = self.patch4.start()
+        self.mock_mkstemp.return_value = (5, "dir/xyz.tmp")
+
+
+    def tearDown(self):
+        for p in (self.patch1, self.patch2, self.patch3, self.patch4):
+            p.stop()
+
+
+    def test_can_write_entry(self):
+        write = Mock()
+        self.assertTrue(write_entry("dir", "dir/abc.pickle", write))
+        self.mock_makedirs.assert_called_with("dir", mode=0o700, exist_ok=True)
+        self.mock_mkstemp.assert_called_with(dir="dir", suffix=".tmp")
+        self.mock_fdopen.assert_called_with(5, "wb")
+        write.assert_called_with(
+         self.mock_fdopen.return_value.__enter__.return_value
+        )
+        self.mock_replace.assert_called_with("dir/xyz.tmp", "dir/abc.pickle")
+
+
+    @patch("os.remove")
+    def test_failed_writes_are_cleaned_up(self, mock_remove):
+        self.mock_replace.side_effect = PermissionError
+        self.assertFalse(write_entry("dir", "dir/abc.pickle", Mock()))
+        mock_remove.assert_called_with("dir/xyz.tmp")
+
+
+    @patch("os.remove")
+    def test_failed_write_functions_are_cleaned_up(self, mock_remove):
+        write = Mock(side_effect=pickle.PicklingError)
+        self.assertFalse(write_entry("dir", "dir/abc.pickle", write))
+        mock_remove.assert_called_with("dir/xyz.tmp")
+        self.assertFalse(self.mock_replace.called)
+
+
+
+class DownloadPathTests(TestCase):
+
+    def test_can_get_download_path(self):
+        path = download_path("dir", "https://url/")
+        self.assertTrue(path.startswith("dir/"))
+        self.assertTrue(path.endswith(".download"))
+        self.assertEqual(path, download_path("dir", "https://url/"))
+        self.assertNotEqual(path, download_path("dir", "https://url2/"))
+
+
+
+class DownloadLoadingTests(TestCase):
+
+    def setUp(self):
+        self.patch1 = patch("os.stat")
+        self.patch2 = patch("builtins.open")
+        self.patch3 = patch("os.utime")
+        self.patch4 = patch("time.time")
+        self.mock_stat = self.patch1.start()
+        self.mock_open = self.patch2.start()
+        self.mock_utime = self.patch3.start()
+        self.mock_time = self.patch4.start()
+        self.mock_stat.return_value = Mock(st_mtime=100)
+        self.mock_time.return_value = 150
+        f = self.mock_open.return_value.__enter__.return_value
+        f.read.return_value = b"FILE"
+        self.path = download_path("dir", "https://url/")
+
+
+    def tearDown(self):
+        for p in (self.patch1, self.patch2, self.patch3, self.patch4):
+            p.stop()
+
+
+    def test_can_load_download(self):
+        self.assertEqual(load_download("dir", "https://url/"), "FILE")
+        self.mock_stat.assert_called_with(self.path)
+        self.mock_open.assert_called_with(self.path, "rb")
+        self.mock_utime.assert_called_with(self.path, (150, 100))
+
+
+    def test_can_load_recent_download(self):
+        self.assertEqual(load_download("dir", "https://url/", 60), "FILE")
+
+
+    def test_old_downloads_are_ignored(self):
+        self.assertIsNone(load_download("dir", "https://url/", 40))
+        self.assertFalse(self.mock_open.called)
+
+
+    def test_missing_downloads_return_none(self):
+        self.mock_stat.side_effect = FileNotFoundError
+        self.assertIsNone(load_download("dir", "https://url/"))
+
+
+
+class DownloadSavingTests(TestCase):
+
+    @patch("atomium.files.cache.write_entry")
+    @patch("atomium.files.cache.evict_from_cache")
+    def test_can_save_download(self, mock_evict, mock_write):
+        save_download("dir", "https://url/", "FILE", 10, 5)
+        path, write = mock_write.call_args[0][1:]
+        self.assertEqual(path, download_path("dir", "https://url/"))
+        f = Mock()
+        write(f)
+        f.write.assert_called_with(b"FILE")
+        mock_evict.assert_called_with("dir", 10, ".download", 5)
+
+
+    @patch("atomium.files.cache.write_entry")
+    @patch("atomium.files.cache.evict_from_cache")
+    def test_failed_save_does_not_evict(self, mock_evict, mock_write):
+        mock_write.return_value = False
+        save_download("dir", "https://url/", "FILE")
+        self.assertFalse(mock_evict.called)
@@ -1,3 +1,4 @@
+from copy import deepcopy
 from datetime import date
 from unittest import TestCase
 from unittest.mock import Mock, patch, PropertyMock, MagicMock
@@ -45,6 +46,53 @@ class HigherStructureGenerationTests(TestCase):
 
 
 
+class AtomFilterTests(TestCase):
+
+    def test_no_filter_if_nothing_filtered(self):
+        self.assertIsNone(atom_filter())
+        self.assertIsNone(atom_filter(water=True, hydrogens=True))
+
+
+    def test_can_filter_chains(self):
+        keep = atom_filter(chains=["A", "C"])
+        self.assertTrue(keep("A", "VAL", "C", None, "A1"))
+        self.assertFalse(keep("B", "VAL", "C", None, "B1"))
+        self.assertFalse(keep(None, "VAL", "C", None, "1"))
+
+
+    def test_can_filter_water(self):
+        keep = atom_filter(water=False)
+        self.assertTrue(keep("A", "VAL", "C", None, "A1"))
+        self.assertFalse(keep("A", "HOH", "O", None, "A2"))
+        self.assertFalse(keep("A", "WAT", "O", None, "A3"))
+
+
+    def test_can_filter_hydrogens(self):
+        keep = atom_filter(hydrogens=False)
+        self.assertTrue(keep("A", "VAL", "C", None, "A1"))
+        self.assertTrue(keep("A", "VAL", None, None, "A1"))
+        self.assertFalse(keep("A", "VAL", "H", None, "A1"))
+        self.assertFalse(keep("A", "VAL", "D", None, "A1"))
+
+
+    def test_can_keep_first_altloc_of_each_residue(self):
+        keep = atom_filter(altloc="first")
+        self.assertTrue(keep("A", "VAL", "C", None, "A1"))
+        self.assertTrue(keep("A", "VAL", "C", "B", "A1"))
+        self.assertFalse(keep("A", "VAL", "C", "A", "A1"))
+        self.assertTrue(keep("A", "VAL", "C", "B", "A1"))
+        self.assertTrue(keep("A", "VAL", "C", "A", "A2"))
+        self.assertFalse(keep("A", "VAL", "C", "B", "A2"))
+
+
+    def test_can_keep_specific_altloc(self):
+        keep = atom_filter(altloc="B")
+        self.assertTrue(keep("A", "VAL", "C", None, "A1"))
+        self.assertTrue(keep("A", "VAL", "C", "B", "A1"))
+        self.assertFalse(keep("A", "VAL", "C", "A", "A1"))
+
+
+
 class DataDictToFileConversionTests(TestCase):
 
     @patch("atomium.files.data.File")
@@ -84,46 +132,105 @@ class DataDictToFileConversionTests(TestCase):
 
 
 
+class ModelListTests(TestCase):
+
+    def setUp(self):
+        self.patch1 = patch("atomium.files.data.model_dict_to_model")
+        self.mock_model = self.patch1.start()
+        self.mock_model.side_effect = lambda d: "M" + d
+        self.models = ModelList(["1", "2", "3"])
+
+
+    def tearDown(self):
+        self.patch1.stop()
+
+
+    def test_model_list_creation(self):
+        self.assertEqual(self.models._dicts, ["1", "2", "3"])
+        self.assertEqual(self.models._models, [None, None, None])
+        self.assertFalse(self.mock_model.called)
+
+
+    def test_model_list_repr(self):
+        self.assertEqual(repr(self.models), "<ModelList (3 models, 0 created)>")
+        self.models[0]
+        self.assertEqual(repr(self.models), "<ModelList (3 models, 1 created)>")
+        self.assertEqual(repr(ModelList(["1"])), "<ModelList (1 model, 0 created)>")
+
+
+    def test_model_list_length(self):
+        self.assertEqual(len(self.models), 3)
+        self.assertEqual(len(ModelList([])), 0)
+        self.assertFalse(ModelList([]))
+
+
+    def test_models_are_created_once_when_accessed(self):
+        self.assertEqual(self.models[1], "M2")
+        self.mock_model.assert_called_once_with("2")
+        self.assertEqual(self.models[1], "M2")
+        self.assertEqual(self.mock_model.call_count, 1)
+        self.assertEqual(self.models._dicts, ["1", None, "3"])
+        self.assertEqual(self.models[-1], "M3")
+        with self.assertRaises(IndexError):
+            self.models[3]
+
+
+    def test_model_list_slicing(self):
+        self.assertEqual(self.models[1:], ["M2", "M3"])
+        self.assertEqual(self.models[::2], ["M1", "M3"])
+
+
+    def test_model_list_iteration(self):
+        self.assertEqual(list(self.models), ["M1", "M2", "M3"])
+        self.assertIn("M2", self.models)
+
+
+    def test_model_list_equality(self):
+        self.assertEqual(self.models, ["M1", "M2", "M3"])
+        self.assertEqual(self.models, ModelList(["1", "2", "3"]))
+        self.assertNotEqual(self.models, ["M1", "M2"])
+        self.assertNotEqual(self.models, "M1M2M3")
+
+
+    def test_model_list_changing(self):
+        self.models[0] = "X"
+        self.models.append("Y")
+        self.models.insert(1, "Z")
+        del self.models[2]
+        self.assertEqual(self.models, ["X", "Z", "M3", "Y"])
+        self.models[1:3] = ["A"]
+        self.assertEqual(self.models, ["X", "A", "Y"])
+        self.assertEqual(self.mock_model.call_count, 1)
+
+
+
 class ModelDictToModelTests(TestCase):
 
     @patch("atomium.files.data.atom_dict_to_atom")
-    @patch("atomium.files.data.Model")
-    @patch("atomium.files.data.create_het")
-    @patch("atomium.files.data.Chain")
+    @patch("atomium.files.data.ModelBuilder")
+    @patch("atomium.files.data.het_atom_locations")
     @patch("atomium.files.data.bond_atoms")
-    def test_can_convert_model_dict_to_model(self, mock_bond, mock_chain, mock_het, mock_mod, mock_atom):
+    def test_can_convert_model_dict_to_model(self, mock_bond, mock_loc, mock_builder, mock_atom):
         m = {
          "atoms": [
-          {"chain_id": "A", "full_res_id": "A1"},
-          {"chain_id": "A", "full_res_id": "A1"},
-          {"chain_id": "A", "full_res_id": "A2"},
-          {"chain_id": "A", "full_res_id": "A2"},
-          {"chain_id": "A", "full_res_id": "A3"},
-          {"chain_id": "A", "full_res_id": "A3"},
-          {"chain_id": "B", "full_res_id": "B1"},
-          {"chain_id": "B", "full_res_id": "B1"},
-          {"chain_id": "B", "full_res_id": "B2"},
-          {"chain_id": "B", "full_res_id": "B2"},
-          {"chain_id": "B", "full_res_id": "B3"},
-          {"chain_id": "B", "full_res_id": "B3"},
-          {"chain_id": "A", "full_res_id": "A100"},
-          {"chain_id": "A", "full_res_id": "A100"},
-          {"chain_id": "A", "full_res_id": "A200"},
-          {"chain_id": "A", "full_res_id": "A200"},
-          {"chain_id": "B", "full_res_id": "B100"},
-          {"chain_id": "B", "full_res_id": "B100"},
-         ],  "connections": [],
+          {"chain_id": "A", "full_res_id": "A1", "polymer": True},
+          {"chain_id": "A", "full_res_id": "A1", "polymer": True},
+          {"chain_id": "A", "full_res_id": "A2", "polymer": True},
+          {"chain_id": "A", "full_res_id": "A2", "polymer": True},
+          {"chain_id": "B", "full_res_id": "B1", "polymer": True},
+          {"chain_id": "B", "full_res_id": "B1", "polymer": True},
+          {"chain_id": "A", "full_res_id": "A100", "polymer": False},
+          {"chain_id": "A", "full_res_id": "A100", "polymer": False},
+          {"chain_id": "B", "full_res_id": "B100", "polymer": False},
+          {"chain_id": "A", "full_res_id": "A2", "polymer": True},
+         ],  "connections": [1, 2],
          "residues": [
           {"id": "A1", "name": "MET", "chain_id": "A"},
           {"id": "A2", "name": "TYR", "chain_id": "A"},
-          {"id": "A3", "name": "PRO", "chain_id": "A"},
           {"id": "B1", "name": "ASP", "chain_id": "B"},
-          {"id": "B2", "name": "VAL", "chain_id": "B"},
-          {"id": "B3", "name": "GLU", "chain_id": "B"},
          ],
          "ligands": [
           {"id": "A100", "name": "XMP", "chain_id": "A"},
-          {"id": "A200", "name": "LOS", "chain_id": "A"},
           {"id": "B100", "name": "XYZ", "chain_id": "B"},
          ],
          "chains": [
@@ -132,22 +239,37 @@ class ModelDictToModelTests(TestCase):
          ]
         }
         mock_atom.side_effect = lambda a: a["full_res_id"] + "_"
-        mod = Mock(atoms=lambda: [])
-        mock_mod.return_value = mod
-        residues = [Mock() for _ in range(6)]
-        ligands = [Mock() for _ in range(3)]
-        mock_het.side_effect = residues[:3] + ligands[:2] + residues[3:] + ligands[-1:]
+        mock_loc.side_effect = lambda atoms: atoms[:1]
+        builder = mock_builder.return_value
         model = model_dict_to_model(m)
-        for n in m["atoms"]: mock_atom.assert_any_call(n)
-        mock_mod.assert_called_with(*[a["full_res_id"] + "_" for a in m["atoms"]])
-        for res in m["residues"] + m["ligands"]:
-            mock_het.assert_any_call([a for a in m["atoms"] if a["full_res_id"] == res["id"]], res, mod)
-        self.assertIs(residues[0].next, residues[1])
-        self.assertIs(residues[1].next, residues[2])
-        self.assertIs(residues[3].next, residues[4])
-        self.assertIs(residues[4].next, residues[5])
-        mock_chain.assert_any_call(*(residues[:3] + ligands[:2]), id="A", rep="MV")
-        mock_chain.assert_any_call(*(residues[3:] + ligands[-1:]), id="B", rep="XH")
+        builder.add_chain.assert_any_call("A", rep="MV")
+        builder.add_chain.assert_any_call("B", rep="XH")
+        mock_loc.assert_any_call([m["atoms"][2], m["atoms"][3], m["atoms"][9]])
+        self.assertEqual(mock_loc.call_count, 5)
+        self.assertEqual([c[0] for c in builder.add_atom.call_args_list], [
+         ("A1_", "A", "A1", "MET", True), ("A2_", "A", "A2", "TYR", True),
+         ("B1_", "B", "B1", "ASP", True), ("A100_", "A", "A100", "XMP", False),
+         ("B100_", "B", "B100", "XYZ", False)
+        ])
+        self.assertIs(model, builder.build.return_value)
+        mock_bond.assert_called_with(model, [1, 2])
+
+
+    @patch("atomium.files.data.atom_dict_to_atom")
+    @patch("atomium.files.data.ModelBuilder")
+    @patch("atomium.files.data.bond_atoms")
+    def test_can_convert_model_dict_without_chains(self, mock_bond, mock_builder, mock_atom):
+        m = {
+         "atoms": [{"name": None, "id": 1}, {"name": "CA", "id": 2}, {"name": None, "id": 3}],
+         "connections": [], "residues": [], "ligands": [], "chains": []
+        }
+        mock_atom.side_effect = lambda a: a["id"]
+        builder = mock_builder.return_value
+        model = model_dict_to_model(m)
+        builder.add_chain.assert_not_called()
+        self.assertEqual([c[0] for c in builder.add_atom.call_args_list], [(1,), (3,)])
+        self.assertIs(model, builder.build.return_value)
+        mock_bond.assert_called_with(model, [])
 
 
 
@@ -188,57 +310,38 @@ class AtomDictToAtomTests(TestCase):
 
 
 
-class HetCreationTests(TestCase):
+class HetAtomLocationTests(TestCase):
 
-    @patch("atomium.files.data.Residue")
-    def test_can_create_residue(self, mock_res):
-        res = {"id": "A1", "name": "TYR"}
-        model = Mock()
-        model.atom.side_effect = [1, 2, 3]
+    def test_can_use_all_atoms(self):
         atoms = [
-         {"full_res_id": "A1", "polymer": True, "occupancy": 1, "alt_loc": None, "id": 2},
-         {"full_res_id": "A1", "polymer": True, "occupancy": 1, "alt_loc": None, "id": 3},
-         {"full_res_id": "A1", "polymer": True, "occupancy": 1, "alt_loc": None, "id": 4},
+         {"occupancy": 1, "alt_loc": None, "id": 2},
+         {"occupancy": 1, "alt_loc": None, "id": 3},
+         {"occupancy": 1, "alt_loc": None, "id": 4},
         ]
-        het = create_het(atoms, res, model)
-        for n in (2, 3, 4): model.atom.assert_any_call(n)
-        mock_res.assert_called_with(1, 2, 3, id="A1", name="TYR")
-        self.assertIs(het, mock_res.return_value)
+        self.assertEqual(het_atom_locations(atoms), atoms)
 
 
-    @patch("atomium.files.data.Ligand")
-    def test_can_create_ligand(self, mock_lig):
-        res = {"id": "A1", "name": "TYR"}
-        model = Mock()
-        model.atom.side_effect = [1, 2, 3]
+    def test_can_use_all_atoms_with_full_occupancy(self):
         atoms = [
-         {"full_res_id": "A1", "polymer": False, "occupancy": 1, "alt_loc": None, "id": 2},
-         {"full_res_id": "A1", "polymer": False, "occupancy": 1, "alt_loc": None, "id": 3},
-         {"full_res_id": "A1", "polymer": False, "occupancy": 1, "alt_loc": None, "id": 4},
+         {"occupancy": 1, "alt_loc": "A", "id": 2},
+         {"occupancy": 1, "alt_loc": "B", "id": 3},
         ]
-        het = create_het(atoms, res, model)
-        for n in (2, 3, 4): model.atom.assert_any_call(n)
-        mock_lig.assert_called_with(1, 2, 3, id="A1", name="TYR")
-        self.assertIs(het, mock_lig.return_value)
+        self.assertEqual(het_atom_locations(atoms), atoms)
 
 
-    @patch("atomium.files.data.Residue")
-    def test_can_create_residue_with_low_occupancy_atoms(self, mock_res):
-        res = {"id": "A1", "name": "TYR"}
-        model = Mock()
-        model.atom.side_effect = [1, 2, 3, 4]
+    def test_can_use_first_alt_loc_of_low_occupancy_atoms(self):
         atoms = [
-         {"full_res_id": "A1", "polymer": True, "occupancy": 1, "alt_loc": None, "id": 2},
-         {"full_res_id": "A1", "polymer": True, "occupancy": 1, "alt_loc": "A", "id": 3},
-         {"full_res_id": "A1", "polymer": True, "occupancy": 0.7, "alt_loc": "A", "id": 4},
-         {"full_res_id": "A1", "polymer": True, "occupancy": 0.3, "alt_loc": "B", "id": 5},
-         {"full_res_id": "A1", "polymer": True, "occupancy": 0.4, "alt_loc": "A", "id": 6},
-         {"full_res_id": "A1", "polymer": True, "occupancy": 0.6, "alt_loc": "B", "id": 7},
+         {"occupancy": 1, "alt_loc": None, "id": 2},
+         {"occupancy": 1, "alt_loc": "A", "id": 3},
+         {"occupancy": 0.7, "alt_loc": "A", "id": 4},
+         {"occupancy": 0.3, "alt_loc": "B", "id": 5},
+         {"occupancy": 0.4, "alt_loc": "A", "id": 6},
+         {"occupancy": 0.6, "alt_loc": "B", "id": 7},
+         {"occupancy": 0.5, "alt_loc": None, "id": 8},
         ]
-        het = create_het(atoms, res, model)
-        for n in (2, 3, 4, 6): model.atom.assert_any_call(n)
-        mock_res.assert_called_with(1, 2, 3, 4, id="A1", name="TYR")
-        self.assertIs(het, mock_res.return_value)
+        self.assertEqual(
+         het_atom_locations(atoms), [atoms[n] for n in (0, 1, 2, 4, 6)]
+        )
 
 
 
@@ -253,12 +356,30 @@ class AtomBondingTests(TestCase):
         model.residues.return_value = set(residues)
         connections = "ccc"
         bond_atoms(model, connections)
-        mock_intra.assert_called_with(set(residues), BONDS)
+        mock_intra.assert_called_with(set(residues), BOND_TEMPLATES)
         mock_inter.assert_called_with(set(residues))
         mock_con.assert_called_with(model, "ccc")
 
 
 
+class BondTemplateCompilationTests(TestCase):
+
+    def test_can_compile_bond_templates(self):
+        self.assertEqual(compile_bond_templates({
+         "CYS": {"A": ["B"], "B": ["A"]},
+         "TYR": {"A": ["P", "B"], "B": ["A", "B"], "P": ["A"]},
+         "MET": {}
+        }), {
+         "CYS": [("A", "B")], "TYR": [("A", "B"), ("A", "P")], "MET": []
+        })
+
+
+    def test_bonds_are_compiled(self):
+        self.assertEqual(BOND_TEMPLATES, compile_bond_templates(BONDS))
+        self.assertIn(("C", "O"), BOND_TEMPLATES["ALA"])
+
+
+
 class IntraResidueConnectionTests(TestCase):
 
     def test_can_connect_residue(self):
@@ -272,24 +393,29 @@ class IntraResidueConnectionTests(TestCase):
             atoms[i * 3 + 1].name = "B"
             atoms[i * 3 + 2].name = ["C", "P", "U", "D"][i]
         d = {
-         "CYS": {"A": ["B"], "B": ["A"]},
-         "TYR": {"A": ["B", "P"], "B": ["A"], "P": ["A"]},
-         "MET": {"A": ["B", "X"], "X": ["A"], "B": ["A"]}
+         "CYS": [("A", "B")],
+         "TYR": [("A", "B"), ("A", "P")],
+         "MET": [("A", "B"), ("A", "X")]
         }
         make_intra_residue_bonds(residues, d)
-        atoms[0].bond_to.assert_called_with(atoms[1])
-        atoms[1].bond_to.assert_called_with(atoms[0])
+        atoms[0].bond_to.assert_called_once_with(atoms[1])
         atoms[3].bond_to.assert_any_call(atoms[4])
         atoms[3].bond_to.assert_any_call(atoms[5])
-        atoms[4].bond_to.assert_called_with(atoms[3])
-        atoms[5].bond_to.assert_called_with(atoms[3])
-        atoms[6].bond_to.assert_called_with(atoms[7])
-        atoms[7].bond_to.assert_called_with(atoms[6])
-        self.assertFalse(atoms[2].bond_to.called)
-        self.assertFalse(atoms[8].bond_to.called)
-        self.assertFalse(atoms[9].bond_to.called)
-        self.assertFalse(atoms[10].bond_to.called)
-        self.assertFalse(atoms[11].bond_to.called)
+        self.assertEqual(atoms[3].bond_to.call_count, 2)
+        atoms[6].bond_to.assert_called_once_with(atoms[7])
+        for index in (1, 2, 4, 5, 7, 8, 9, 10, 11):
+            self.assertFalse(atoms[index].bond_to.called)
+
+
+    def test_can_connect_atoms_with_same_name(self):
+        residue = Mock()
+        residue.name = "CYS"
+        atoms = [Mock(), Mock(), Mock()]
+        for atom, name in zip(atoms, "ABB"): atom.name = name
+        residue.atoms.return_value = set(atoms)
+        make_intra_residue_bonds([residue], {"CYS": [("A", "B")]})
+        atoms[0].bond_to.assert_any_call(atoms[1])
+        atoms[0].bond_to.assert_any_call(atoms[2])
 
 
 
@@ -365,9 +491,7 @@ class ConnectionBondsTests(TestCase):
     def test_can_bond_from_connections(self):
         model = Mock()
         atoms = [Mock(), Mock(), Mock(), Mock()]
-        model.atom.side_effect = [
-         atoms[1], atoms[2], atoms[3], None, atoms[2], atoms[1], atoms[3], atoms[1], None
-        ]
+        model.atoms.return_value = set(atoms)
         for index, atom in enumerate(atoms):
             atom.id = index
         connections = [{
@@ -385,14 +509,14 @@ class ConnectionBondsTests(TestCase):
         atoms[2].bond_to.assert_called_with(atoms[1])
         atoms[3].bond_to.assert_called_with(atoms[1])
         self.assertFalse(atoms[0].called)
+        self.assertFalse(model.atom.called)
+        self.assertEqual(connections[0]["bond_to"], [2, 3, 4])
 
 
     def test_can_ignore_self_bonding(self):
         model = Mock()
         atoms = [Mock(), Mock(), Mock(), Mock()]
-        model.atom.side_effect = [
-         atoms[0], atoms[1], atoms[2], atoms[3]
-        ]
+        model.atoms.return_value = set(atoms)
         for index, atom in enumerate(atoms):
             atom.id = index + 1
         connections = [{
@@ -402,3 +526,41 @@ class ConnectionBondsTests(TestCase):
         atoms[0].bond_to.assert_any_call(atoms[1])
         atoms[0].bond_to.assert_any_call(atoms[2])
         atoms[0].bond_to.assert_called_with(atoms[3])
+        self.assertEqual(atoms[0].bond_to.call_count, 3)
+        self.assertEqual(connections[0]["bond_to"], [1, 2, 3, 4])
+
+
+
+class RecordCreationTests(TestCase):
+
+    def test_can_create_model_dict(self):
+        model = new_model_dict()
+        self.assertEqual(model, MODEL_DICT)
+        for key in model:
+            self.assertIsNot(model[key], MODEL_DICT[key])
+
+
+    def test_can_create_chain_dict(self):
+        chain = new_chain_dict(id="A")
+        self.assertEqual(chain, {"id": "A", "full_sequence": []})
+        self.assertIsNot(chain["full_sequence"], CHAIN_DICT["full_sequence"])
+        self.assertEqual(new_chain_dict(), CHAIN_DICT)
+
+
+    def test_can_create_residue_dict(self):
+        residue = new_residue_dict(id="A:1", name="VAL", chain_id="A")
+        self.assertEqual(list(residue.items()), [
+         ("id", "A:1"), ("name", "VAL"), ("chain_id", "A")
+        ])
+        self.assertEqual(new_residue_dict(), RESIDUE_DICT)
+
+
+    def test_can_create_atom_dict(self):
+        atom = new_atom_dict()
+        self.assertEqual(atom, ATOM_DICT)
+        self.assertEqual(list(atom), list(ATOM_DICT))
+        self.assertIsNot(atom["anisotropy"], ATOM_DICT["anisotropy"])
+        atom = new_atom_dict(id=5, x=1.5)
+        self.assertEqual(atom["id"], 5)
+        self.assertEqual(atom["x"], 1.5)
+        self.assertEqual(list(atom), list(ATOM_DICT))
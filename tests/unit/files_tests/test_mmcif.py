@@ -1,194 +1,239 @@
 from copy import deepcopy
 from datetime import date
+from collections import OrderedDict
 from unittest import TestCase
 from unittest.mock import Mock, patch, PropertyMock, MagicMock
 from atomium.files.mmcif import *
 
 class MmcifStringToMmcifDictTests(TestCase):
 
-    @patch("atomium.files.mmcif.consolidate_strings")
-    @patch("atomium.files.mmcif.mmcif_lines_to_mmcif_blocks")
-    @patch("atomium.files.mmcif.loop_block_to_list")
-    @patch("atomium.files.mmcif.category_block_to_dict")
-    @patch("atomium.files.mmcif.strip_quotes")
-    def test_can_turn_mmcif_string_to_mmcif_dict(self, mock_strp, mock_cat, mock_loop, mock_block, mock_con):
-        mock_con.return_value = "CONSOLIDATED"
-        mock_block.return_value = [
-         {"category": "A", "lines": ["1", "2"]},
-         {"category": "B", "lines": ["loop_", "3"]},
-         {"category": "C", "lines": ["loop_", "4"]},
-         {"category": "D", "lines": ["5", "6"]},
-        ]
-        mock_cat.side_effect = ["CAT1", "CAT2"]
-        mock_loop.side_effect = ["LOOP1", "LOOP2"]
-        d = mmcif_string_to_mmcif_dict("1\n\n2\n3\n")
-        mock_con.assert_called_with(["1", "2", "3"])
-        mock_block.assert_called_with("CONSOLIDATED")
-        mock_loop.assert_any_call({"category": "B", "lines": ["loop_", "3"]})
-        mock_loop.assert_any_call({"category": "C", "lines": ["loop_", "4"]})
-        mock_cat.assert_any_call({"category": "A", "lines": ["1", "2"]})
-        mock_cat.assert_any_call({"category": "D", "lines": ["5", "6"]})
-        mock_strp.assert_called_with({
-         "A": "CAT1", "B": "LOOP1", "C": "LOOP2", "D": "CAT2"
-        })
+    @patch("atomium.files.mmcif.mmcif_lines_to_tokens")
+    @patch("atomium.files.mmcif.LoopTable")
+    def test_can_turn_mmcif_string_to_mmcif_dict(self, mock_loop, mock_tok):
+        mock_tok.return_value = iter([
+         ("data_1LOL", False), ("_entry.id", False), ("1LOL", False),
+         ("_cat.a", False), ("1", False), ("_cat.b", False),
+         ("A  long\nstring", True), ("loop_", False), ("_loop1.x", False),
+         ("_loop1.y", False), ("1", False), ("2", False), ("3", False),
+         ("4", False), ("loop_", False), ("_loop2.z", False), ("_l", True),
+         ("_other.c", False), ("loop_", False), ("_loop3.x", False)
+        ])
+        mock_loop.side_effect = ["LOOP1", "LOOP2", "LOOP3"]
+        d = mmcif_string_to_mmcif_dict("filestring")
+        mock_tok.assert_called_with(["filestring"], ())
+        mock_loop.assert_any_call(["x", "y"], ["1", "2", "3", "4"])
+        mock_loop.assert_any_call(["z"], ["_l"])
+        mock_loop.assert_any_call(["x"], [])
         self.assertEqual(d, {
-         "A": "CAT1", "B": "LOOP1", "C": "LOOP2", "D": "CAT2"
+         "entry": [{"id": "1LOL"}], "cat": [{"a": "1", "b": "A long string"}],
+         "loop1": "LOOP1", "loop2": "LOOP2", "other": [{}], "loop3": "LOOP3"
+        })
+
+
+    def test_can_parse_mmcif_string(self):
+        filestring = "\n".join([
+         "data_1LOL", "#", "_entry.id   1LOL", "#", "_struct.title", ";A long",
+         "title", ";", "_struct.name 'it's here'", "#", "loop_",
+         "_atom.id", "_atom.name", "_atom.note", "1 N  .", "2 CA 'a b'",
+         "3", "C", ";TEXT", ";", "4 O \"x\" # comment", ""
+        ])
+        self.assertEqual(mmcif_string_to_mmcif_dict(filestring), {
+         "entry": [{"id": "1LOL"}],
+         "struct": [{"title": "A long title", "name": "it's here"}],
+         "atom": [
+          {"id": "1", "name": "N", "note": "."},
+          {"id": "2", "name": "CA", "note": "a b"},
+          {"id": "3", "name": "C", "note": "TEXT"},
+          {"id": "4", "name": "O", "note": "x"}
+         ]
         })
 
 
+    def test_can_parse_mmcif_lines(self):
+        lines = iter(["data_1LOL", "_entry.id 1LOL", "loop_", "_a.x", "1", "2"])
+        self.assertEqual(mmcif_lines_to_mmcif_dict(lines), {
+         "entry": [{"id": "1LOL"}], "a": [{"x": "1"}, {"x": "2"}]
+        })
+
 
-class StringConsolidationTests(TestCase):
 
-    def test_consolidation_can_do_nothing(self):
-        lines = consolidate_strings(["line1", "line2", "line3"])
-        self.assertEqual(lines, ["line1", "line2", "line3"])
+    @patch("atomium.files.mmcif.mmcif_lines_to_tokens")
+    def test_can_skip_coordinate_categories(self, mock_tok):
+        mock_tok.return_value = iter([("_entry.id", False), ("1LOL", False)])
+        d = mmcif_string_to_mmcif_dict("filestring", header_only=True)
+        mock_tok.assert_called_with(["filestring"], COORDINATE_CATEGORIES)
+        self.assertEqual(d, {"entry": [{"id": "1LOL"}]})
 
 
-    def test_can_consolidate_string(self):
-        lines = consolidate_strings(["line1", "line2", ";STRING", ";", "line3"])
-        self.assertEqual(lines, ["line1", "line2 \"STRING\"", "line3"])
 
+class MmcifLinesToTokensTests(TestCase):
 
-    def test_can_consolidate_multi_strings(self):
-        lines = consolidate_strings([
-         "line1", "line2", "; STRING 1", "CONT CONT", ";", "line3", ";STRING2", ";", "line4"
-        ])
-        self.assertEqual(lines, [
-         "line1", "line2 \"STRING 1 CONT CONT\"", "line3 \"STRING2\"", "line4"
+    def test_can_tokenize_basic_lines(self):
+        self.assertEqual(list(mmcif_lines_to_tokens(["_a.b  1", "", "loop_", "2 3"])), [
+         ("_a.b", False), ("1", False), ("loop_", False),
+         ("2", False), ("3", False)
         ])
 
 
+    def test_can_tokenize_quoted_values(self):
+        self.assertEqual(list(mmcif_lines_to_tokens(
+         ["1 'A B' \"it's\" 'O5'' C'D '_x' ''"]
+        )), [
+         ("1", False), ("A B", True), ("it's", True), ("O5'", True),
+         ("C'D", False), ("_x", True), ("", True)
+        ])
 
-class MmcifLinesToMmcifBlockTests(TestCase):
 
-    def test_can_make_category_blocks(self):
-        blocks = mmcif_lines_to_mmcif_blocks([
-         "data_1", "_AAA.x 100", "_BBB.x 200", "_BBB.y 200", "_CCC.z 300"
+    def test_can_ignore_comments(self):
+        self.assertEqual(list(mmcif_lines_to_tokens(
+         ["# comment", "1 C#N '#' # more", "2"]
+        )), [
+         ("1", False), ("C#N", False), ("#", True), ("2", False)
         ])
-        self.assertEqual(blocks, [
-         {"category": "AAA", "lines": ["_AAA.x 100"]},
-         {"category": "BBB", "lines": ["_BBB.x 200", "_BBB.y 200"]},
-         {"category": "CCC", "lines": ["_CCC.z 300"]}
+
+
+    def test_can_tokenize_text_fields(self):
+        self.assertEqual(list(mmcif_lines_to_tokens(
+         ["_a.b", "; line 1 ", "line 'two'", "", ";", "1", ";unclosed"]
+        )), [
+         ("_a.b", False), ("line 1 line 'two'", True), ("1", False),
+         ("unclosed", True)
         ])
 
 
-    def test_can_make_loop_blocks(self):
-        blocks = mmcif_lines_to_mmcif_blocks([
-         "data_1", "loop_", "_AAA.x", "100", "loop_", "_BBB.x", "_BBB.y", "11", "12", "13"
+    @patch("atomium.files.mmcif.skip_categories")
+    def test_can_skip_categories(self, mock_skip):
+        mock_skip.return_value = iter(["_a.b 1"])
+        self.assertEqual(list(mmcif_lines_to_tokens(["X", "Y"], ("c",))), [
+         ("_a.b", False), ("1", False)
         ])
-        self.assertEqual(blocks, [
-         {"category": "AAA", "lines": ["loop_", "_AAA.x", "100"]},
-         {"category": "BBB", "lines": ["loop_", "_BBB.x", "_BBB.y", "11", "12", "13"]},
+        mock_skip.assert_called_with(["X", "Y"], ("c",))
+
+
+    def test_can_tokenize_lines_lazily(self):
+        lines = iter(["_a.b 1", "_a.c 2"])
+        tokens = mmcif_lines_to_tokens(lines)
+        self.assertEqual(next(tokens), ("_a.b", False))
+        self.assertEqual(next(lines), "_a.c 2")
+
+
+
+class CategorySkippingTests(TestCase):
+
+    def test_can_skip_loops(self):
+        lines = [
+         "_a.x 1", "#", "loop_", "_b.x", "_b.y", "ATOM 1", "ATOM 2", "#",
+         "loop_", "_c.x", "loop 1", "data 2", "loop_", "", "_b.z", "1", "_d.x 2"
+        ]
+        self.assertEqual(list(skip_categories(lines, ("b",))), [
+         "_a.x 1", "#", "#", "loop_", "_c.x", "loop 1", "data 2", "_d.x 2"
         ])
 
 
-    def test_can_make_mixed_blocks(self):
-        blocks = mmcif_lines_to_mmcif_blocks([
-         "data_1", "_AAA.x 100", "loop_", "_111.x", "100", "_BBB.x 200",
-         "_BBB.y 200", "loop_", "_222.x", "_222.y", "11", "12", "13", "_CCC.z 300"
+    def test_can_skip_single_values(self):
+        lines = ["_b.x 1", "_b.y", "2", "_c.x 3", "_b.z 4", "loop_"]
+        self.assertEqual(list(skip_categories(lines, ("b",))), [
+         "_c.x 3", "loop_"
         ])
-        self.assertEqual(blocks, [
-         {"category": "AAA", "lines": ["_AAA.x 100"]},
-          {"category": "111", "lines": ["loop_", "_111.x", "100"]},
-         {"category": "BBB", "lines": ["_BBB.x 200", "_BBB.y 200"]},
-          {"category": "222", "lines": ["loop_", "_222.x", "_222.y", "11", "12", "13"]},
-         {"category": "CCC", "lines": ["_CCC.z 300"]}
+
+
+    def test_can_skip_text_fields(self):
+        lines = [
+         "_b.x", ";", "_c.x 1", ";", "_c.y", ";", "_b.z", ";", "data_2"
+        ]
+        self.assertEqual(list(skip_categories(lines, ("b",))), [
+         "_c.y", ";", "_b.z", ";", "data_2"
         ])
 
 
 
-class CategoryBlockToDictTests(TestCase):
+class LoopTableTests(TestCase):
 
-    def test_can_convert_category_block_to_dict(self):
-        d = category_block_to_dict({"category": "AA", "lines": [
-         "_AA.one XXX", "_AA.two 'YYY ZZZ'", "_AA.three 1.2.3"
-        ]})
-        self.assertEqual(d, [{
-         "one": "XXX", "two": "YYY ZZZ", "three": "1.2.3"
-        }])
+    def setUp(self):
+        self.table = LoopTable(["a", "b", "c"], ["1", "2", "3", "4", "5", "6"])
 
 
-    def test_can_move_string_in_category_block(self):
-        d = category_block_to_dict({"category": "AA", "lines": [
-         "_AA.one XXX", "_AA.two", "'YYY ZZZ'", "_AA.three 1.2.3"
-        ]})
-        self.assertEqual(d, [{
-         "one": "XXX", "two": "YYY ZZZ", "three": "1.2.3"
-        }])
+    def test_can_create_loop_table(self):
+        self.assertEqual(self.table._columns, {
+         "a": ["1", "4"], "b": ["2", "5"], "c": ["3", "6"]
+        })
+        self.assertEqual(self.table._length, 2)
 
 
-class LoopBlockToListTests(TestCase):
+    def test_can_create_loop_table_with_incomplete_row(self):
+        table = LoopTable(["a", "b"], ["1", "2", "3"])
+        self.assertEqual(table._columns, {"a": ["1", "3"], "b": ["2"]})
+        self.assertEqual(table._length, 2)
 
-    @patch("atomium.files.mmcif.split_values")
-    def test_can_convert_loop_block_to_list(self, mock_split):
-        mock_split.side_effect = [["1", "2", "3"], ["Wu, N.", "5", "6"]]
-        l = loop_block_to_list({"category": "AA", "lines": [
-         "loop_", "_AA.one", "_AA.two", "_AA.three", "1 2 3", "'Wu, N.'    5  6"
-        ]})
-        self.assertEqual(l, [{
-         "one": "1", "two": "2", "three": "3"
-        }, {
-         "one": "Wu, N.", "two": "5", "three": "6"
-        }])
-        mock_split.assert_any_call("1 2 3")
-        mock_split.assert_any_call("'Wu, N.'    5  6")
-
-
-    @patch("atomium.files.mmcif.split_values")
-    def test_can_convert_loop_block_to_list_broken_lines(self, mock_split):
-        mock_split.side_effect = [["1", "2", "3"], ["Wu, N."], ["5", "6"]]
-        l = loop_block_to_list({"category": "AA", "lines": [
-         "loop_", "_AA.one", "_AA.two", "_AA.three", "1 2 3", "'Wu, N.'", "    5  6"
-        ]})
-        self.assertEqual(l, [{
-         "one": "1", "two": "2", "three": "3"
-        }, {
-         "one": "Wu, N.", "two": "5", "three": "6"
-        }])
-        mock_split.assert_any_call("1 2 3")
-        mock_split.assert_any_call("'Wu, N.'")
-        mock_split.assert_any_call("    5  6")
 
+    def test_can_create_empty_loop_table(self):
+        table = LoopTable(["a", "b"], [])
+        self.assertEqual(table._columns, {"a": [], "b": []})
+        self.assertEqual(table._length, 0)
+        table = LoopTable([], [])
+        self.assertEqual(table._length, 0)
 
 
-class ValueSplittingTests(TestCase):
+    def test_loop_table_keeps_column_order(self):
+        table = LoopTable(["c", "a", "b"], ["1", "2", "3"])
+        self.assertIsInstance(table._columns, OrderedDict)
+        self.assertEqual(table.names, ("c", "a", "b"))
+        self.assertIsInstance(table[0], OrderedDict)
+        self.assertEqual(list(table[0]), ["c", "a", "b"])
 
-    def test_can_split_basic_line(self):
-        self.assertEqual(split_values("1 2 3"), ["1", "2", "3"])
 
+    def test_loop_table_repr(self):
+        self.assertEqual(repr(self.table), "<LoopTable (3 columns, 2 rows)>")
+        table = LoopTable(["a"], ["1"])
+        self.assertEqual(repr(table), "<LoopTable (1 column, 1 row)>")
 
-    def test_can_split_string_line(self):
-        self.assertEqual(split_values("1 '2 5' 3"), ["1", "2 5", "3"])
-        self.assertEqual(split_values("1 \"2 5\" 3"), ["1", "2 5", "3"])
 
+    def test_loop_table_length(self):
+        self.assertEqual(len(self.table), 2)
 
-    def test_can_split_string_line_with_quote(self):
-        self.assertEqual(split_values("1 '2 '5' 3"), ["1", "2 '5", "3"])
 
+    def test_can_get_rows(self):
+        self.assertEqual(self.table[0], {"a": "1", "b": "2", "c": "3"})
+        self.assertEqual(self.table[-1], {"a": "4", "b": "5", "c": "6"})
+        with self.assertRaises(IndexError):
+            self.table[2]
+        with self.assertRaises(IndexError):
+            self.table[-3]
 
 
-class QuoteStrippingTests(TestCase):
+    def test_can_get_incomplete_row(self):
+        table = LoopTable(["a", "b"], ["1", "2", "3"])
+        self.assertEqual(table[1], {"a": "3"})
 
-    def test_can_strip_quotes(self):
-        d = {
-         "A": {
-          "1": "20", "2": '"34"'
-         }, "B": [{
-          "3": "30", "4": '"34"'
-         }, {
-          "3": "50", "4": '"34 dfe"'
-         }]
-        }
-        strip_quotes(d)
-        self.assertEqual(d, {
-         "A": {
-          "1": "20", "2": '34'
-         }, "B": [{
-          "3": "30", "4": '34'
-         }, {
-          "3": "50", "4": '34 dfe'
-         }]
-        })
+
+    def test_can_slice_rows(self):
+        self.assertEqual(self.table[1:], [{"a": "4", "b": "5", "c": "6"}])
+        self.assertEqual(self.table[5:], [])
+
+
+    def test_can_iterate_rows(self):
+        self.assertEqual(list(self.table), [
+         {"a": "1", "b": "2", "c": "3"}, {"a": "4", "b": "5", "c": "6"}
+        ])
+
+
+    def test_loop_table_equality(self):
+        rows = [{"a": "1", "b": "2", "c": "3"}, {"a": "4", "b": "5", "c": "6"}]
+        self.assertEqual(self.table, rows)
+        self.assertEqual(rows, self.table)
+        self.assertEqual(self.table, LoopTable(["a", "b", "c"], [str(n) for n in range(1, 7)]))
+        self.assertNotEqual(self.table, rows[:1])
+        self.assertNotEqual(self.table, "table")
+
+
+    def test_can_get_names(self):
+        self.assertEqual(self.table.names, ("a", "b", "c"))
+
+
+    def test_can_get_column(self):
+        self.assertEqual(self.table.column("b"), ["2", "5"])
+        with self.assertRaises(KeyError):
+            self.table.column("d")
 
 
 
@@ -205,7 +250,13 @@ class MmcifDictToDataDictTests(TestCase):
         mock_exp.assert_called_with({"A": "B"}, DATA_DICT)
         mock_qual.assert_called_with({"A": "B"}, DATA_DICT)
         mock_geom.assert_called_with({"A": "B"}, DATA_DICT)
-        mock_mod.assert_called_with({"A": "B"}, DATA_DICT)
+        mock_mod.assert_called_with({"A": "B"}, DATA_DICT, None)
+
+
+    @patch("atomium.files.mmcif.update_models_list")
+    def test_can_pass_filters_to_models(self, mock_mod):
+        mmcif_dict_to_data_dict({"A": "B"}, model=1, hydrogens=False)
+        mock_mod.assert_called_with({"A": "B"}, DATA_DICT, 1, hydrogens=False)
 
 
 
@@ -316,7 +367,10 @@ class GeometryDictUpdatingTests(TestCase):
     @patch("atomium.files.mmcif.assign_metrics_to_assembly")
     @patch("atomium.files.mmcif.assign_transformations_to_assembly")
     def test_can_update_geometry_dict(self, mock_tran, mock_met, mock_soft):
-        mmcif_dict = {"pdbx_struct_assembly": [{"id": "1"}, {"id": "2"}]}
+        mmcif_dict = {
+         "pdbx_struct_assembly": [{"id": "1"}, {"id": "2"}],
+         "pdbx_struct_oper_list": [{"id": "1"}, {"id": "2"}]
+        }
         d = deepcopy(DATA_DICT)
         update_geometry_dict(mmcif_dict, d)
         self.assertEqual(d["geometry"]["assemblies"], [{
@@ -330,25 +384,21 @@ class GeometryDictUpdatingTests(TestCase):
         mock_soft.assert_any_call(d["geometry"]["assemblies"][1], mmcif_dict)
         mock_met.assert_any_call(d["geometry"]["assemblies"][0], mmcif_dict)
         mock_met.assert_any_call(d["geometry"]["assemblies"][1], mmcif_dict)
-        mock_tran.assert_any_call(d["geometry"]["assemblies"][0], mmcif_dict)
-        mock_tran.assert_any_call(d["geometry"]["assemblies"][1], mmcif_dict)
+        operators = {"1": {"id": "1"}, "2": {"id": "2"}}
+        mock_tran.assert_any_call(d["geometry"]["assemblies"][0], mmcif_dict, operators)
+        mock_tran.assert_any_call(d["geometry"]["assemblies"][1], mmcif_dict, operators)
 
 
 
 class ModelsListUpdatingTests(TestCase):
 
-    @patch("atomium.files.mmcif.atom_line_to_atom_dict")
+    @patch("atomium.files.mmcif.atom_site_to_atom_dicts")
     @patch("atomium.files.mmcif.generate_higher_structures")
     def test_can_create_models(self, mock_gen, mock_atom):
         mmcif_dict = {
-         "atom_site": [
-          {"pdbx_PDB_model_num": 1, "id": 1},
-          {"pdbx_PDB_model_num": 1, "id": 2},
-          {"pdbx_PDB_model_num": 1, "id": 3},
-          {"pdbx_PDB_model_num": 2, "id": 4},
-          {"pdbx_PDB_model_num": 2, "id": 5},
-          {"pdbx_PDB_model_num": 2, "id": 6}
-         ],
+         "atom_site": LoopTable(["pdbx_PDB_model_num", "id"], [
+          "1", "1", "1", "2", "1", "3", "2", "4", "2", "5", "2", "6"
+         ]),
          "pdbx_poly_seq_scheme": [
           {"pdb_strand_id": "A", "mon_id": "VAL"}, {"pdb_strand_id": "A", "mon_id": "TYR"},
           {"pdb_strand_id": "B", "mon_id": "TRP"}, {"pdb_strand_id": "B", "mon_id": "MET"},
@@ -361,9 +411,10 @@ class ModelsListUpdatingTests(TestCase):
         mock_gen.side_effect = lambda models: [
          [m["chains"].append({"id": n, "full_sequence": []}) for n in "AB"] for m in models
         ]
-        mock_atom.side_effect = [{"id": n, "anisotropy": []} for n in range(1, 7)]
+        mock_atom.return_value = [{"id": n, "anisotropy": []} for n in range(1, 7)]
         d = deepcopy(DATA_DICT)
         update_models_list(mmcif_dict, d)
+        mock_atom.assert_called_with(mmcif_dict["atom_site"], None)
         self.assertEqual(d["models"], [{
          "atoms": [{"id": n, "anisotropy": [0, 0, 0, 0, 0, 0]} for n in range(1, 3)] +
           [{"id": 3, "anisotropy": [0.0123, 0.0234, 0.0345, 0.0456, 0.0567, 0.0678]}],
@@ -377,6 +428,58 @@ class ModelsListUpdatingTests(TestCase):
         mock_gen.assert_called_with(d["models"])
 
 
+    @patch("atomium.files.mmcif.atom_site_to_atom_dicts")
+    @patch("atomium.files.mmcif.atom_site_rows")
+    @patch("atomium.files.mmcif.atom_filter")
+    @patch("atomium.files.mmcif.generate_higher_structures")
+    def test_can_create_models_from_filtered_rows(self, mock_gen, mock_filter, mock_rows, mock_atom):
+        atom_site = LoopTable(["pdbx_PDB_model_num", "id"], [
+         "1", "1", "1", "2", "2", "3", "2", "4"
+        ])
+        mock_rows.return_value = [1, 2]
+        mock_atom.return_value = [{"id": n, "anisotropy": []} for n in (2, 3)]
+        d = deepcopy(DATA_DICT)
+        update_models_list({"atom_site": atom_site}, d, 2, water=False)
+        mock_filter.assert_called_with(water=False)
+        mock_rows.assert_called_with(atom_site, [1, 1, 2, 2], 2, mock_filter.return_value)
+        mock_atom.assert_called_with(atom_site, [1, 2])
+        self.assertEqual([[a["id"] for a in m["atoms"]] for m in d["models"]], [[2], [3]])
+
+
+    @patch("atomium.files.mmcif.atom_site_rows")
+    def test_can_create_no_models_if_all_rows_filtered(self, mock_rows):
+        mock_rows.return_value = []
+        d = deepcopy(DATA_DICT)
+        atom_site = LoopTable(["pdbx_PDB_model_num", "id"], ["1", "1"])
+        update_models_list({"atom_site": atom_site}, d, 3)
+        self.assertEqual(d["models"], [])
+
+
+    def test_can_create_no_models_without_atom_site(self):
+        d = deepcopy(DATA_DICT)
+        update_models_list({"pdbx_poly_seq_scheme": []}, d)
+        self.assertEqual(d["models"], [])
+
+
+
+class TableIndexingTests(TestCase):
+
+    def test_can_index_table(self):
+        table = [{"id": "1", "v": "A"}, {"id": "2", "v": "B"}, {"id": "1", "v": "C"}]
+        self.assertEqual(table_index(table, "id"), {"1": table[0], "2": table[1]})
+
+
+    def test_can_convert_keys(self):
+        table = [{"id": "1", "v": "A"}, {"id": "2", "v": "B"}]
+        index = table_index(table, "id", convert=float)
+        self.assertEqual(index, {1.0: table[0], 2.0: table[1]})
+        self.assertIs(index[1], table[0])
+
+
+    def test_can_index_empty_table(self):
+        self.assertEqual(table_index([], "id"), {})
+
+
 
 class AssemblySoftwareAssigningTests(TestCase):
 
@@ -484,6 +587,25 @@ class AssemblyTransformationsAssigningTests(TestCase):
         }])
 
 
+    @patch("atomium.files.mmcif.get_transformation_ids")
+    def test_can_assign_transformations_from_indexed_operators(self, mock_get):
+        mock_get.return_value = ["10", "13"]
+        assembly = {"id": 2, "transformations": []}
+        mmcif_dict = {"pdbx_struct_assembly_gen": [{
+         "assembly_id": "2", "oper_expression": "C", "asym_id_list": "A"
+        }], "pdbx_struct_oper_list": []}
+        operators = {"10": {
+         "id": "10", "vector[1]": "1", "vector[2]": "2", "vector[3]": "3",
+         **{"matrix[{}][{}]".format(x, y): str(x * y)
+          for x in (1, 2, 3) for y in (1, 2, 3)}
+        }}
+        assign_transformations_to_assembly(assembly, mmcif_dict, operators)
+        self.assertEqual(assembly["transformations"], [{
+         "chains": ["A"], "vector": [1.0, 2.0, 3.0],
+         "matrix": [[1.0, 2.0, 3.0], [2.0, 4.0, 6.0], [3.0, 6.0, 9.0]]
+        }])
+
+
 
 class TransformationIdGettingTests(TestCase):
 
@@ -511,60 +633,150 @@ class TransformationIdGettingTests(TestCase):
 
 
 
-class AtomLineToAtomDictTests(TestCase):
+class AtomSiteToAtomDictsTests(TestCase):
 
     def setUp(self):
-        self.d = {
-         "group_PDB": "ATOM",
-         "id": "26962",
-         "type_symbol": "O",
-         "label_atom_id": "O1",
-         "label_alt_id": "A",
-         "label_comp_id": "GLY",
-         "label_asym_id": "B",
-         "label_entity_id": "2",
-         "label_seq_id": "13",
-         "pdbx_PDB_ins_code": "C",
-         "Cartn_x": "199.639",
-         "Cartn_y": "91.034",
-         "Cartn_z": "-25.211",
-         "occupancy": "0.70",
-         "B_iso_or_equiv": "11.21",
-         "pdbx_formal_charge": "-2",
-         "auth_seq_id": "13",
-         "auth_comp_id": "TRP",
-         "auth_asym_id": "B",
-         "auth_atom_id": "O",
-         "pdbx_PDB_model_num": "1"
-        }
+        self.names = [
+         "group_PDB", "id", "type_symbol", "label_atom_id", "label_alt_id",
+         "label_comp_id", "label_seq_id", "pdbx_PDB_ins_code", "Cartn_x",
+         "Cartn_y", "Cartn_z", "occupancy", "B_iso_or_equiv",
+         "pdbx_formal_charge", "auth_seq_id", "auth_asym_id"
+        ]
+        self.values = [
+         "ATOM", "1", "N", "N", ".", "VAL", "1", "?", "1.5", "2.5", "3.5",
+         "0.5", "10.5", "1", "11", "A",
+         "HETATM", "2", "C", "C1", "A", "HOH", ".", "B", "-1.5", "-2.5",
+         "-3.5", "1.0", "?", "?", "12", "B"
+        ]
 
 
-    def test_can_convert_empty_line_to_atom(self):
-        for k in self.d: self.d[k] = "."
-        atom = atom_line_to_atom_dict(self.d)
-        self.assertEqual(atom, deepcopy(ATOM_DICT))
+    def test_can_convert_atom_site(self):
+        atoms = atom_site_to_atom_dicts(LoopTable(self.names, self.values))
+        self.assertEqual(atoms, [{
+         "id": 1, "element": "N", "name": "N", "alt_loc": None,
+         "x": 1.5, "y": 2.5, "z": 3.5, "occupancy": 0.5, "bfactor": 10.5,
+         "charge": 1.0, "residue_id": 11, "residue_name": "VAL",
+         "residue_insert": "", "chain_id": "A", "anisotropy": [],
+         "polymer": True, "full_res_id": "A:11"
+        }, {
+         "id": 2, "element": "C", "name": "C1", "alt_loc": "A",
+         "x": -1.5, "y": -2.5, "z": -3.5, "occupancy": 1.0, "bfactor": None,
+         "charge": 0, "residue_id": 12, "residue_name": "HOH",
+         "residue_insert": "B", "chain_id": "B", "anisotropy": [],
+         "polymer": False, "full_res_id": "B:12B"
+        }])
 
 
-    def test_can_get_atom(self):
-        atom = atom_line_to_atom_dict(self.d)
-        self.assertEqual(atom, {
-         "id": 26962, "name": "O1",
-         "alt_loc": "A", "residue_name": "GLY",
-         "chain_id": "B", "residue_id": 13, "residue_insert": "C",
-         "x": 199.639, "y": 91.034, "z": -25.211,
-         "occupancy": 0.7, "bfactor": 11.21, "anisotropy": [],
-         "element": "O", "charge": -2, "polymer": True, "full_res_id": "B:13C"
-        })
+    def test_atom_dicts_follow_template(self):
+        atoms = atom_site_to_atom_dicts(LoopTable(self.names, self.values))
+        self.assertEqual(list(atoms[0].keys()), list(ATOM_DICT.keys()))
+        self.assertIsNot(atoms[0]["anisotropy"], atoms[1]["anisotropy"])
+        self.assertIsNot(atoms[0]["anisotropy"], ATOM_DICT["anisotropy"])
 
 
-    def test_can_get_hetatm(self):
-        self.d["label_seq_id"] = "."
-        atom = atom_line_to_atom_dict(self.d)
-        self.assertEqual(atom, {
-         "id": 26962, "name": "O1",
-         "alt_loc": "A", "residue_name": "GLY",
-         "chain_id": "B", "residue_id": 13, "residue_insert": "C",
-         "x": 199.639, "y": 91.034, "z": -25.211,
-         "occupancy": 0.7, "bfactor": 11.21, "anisotropy": [],
-         "element": "O", "charge": -2, "polymer": False, "full_res_id": "B:13C"
-        })
+    def test_can_convert_row_dicts(self):
+        table = LoopTable(self.names, self.values)
+        self.assertEqual(
+         atom_site_to_atom_dicts(list(table)), atom_site_to_atom_dicts(table)
+        )
+
+
+    def test_can_convert_some_rows(self):
+        table = LoopTable(self.names, self.values)
+        self.assertEqual(
+         atom_site_to_atom_dicts(table, [1]), atom_site_to_atom_dicts(table)[1:]
+        )
+        self.assertEqual(atom_site_to_atom_dicts(table, []), [])
+
+
+    def test_can_handle_missing_columns(self):
+        atoms = atom_site_to_atom_dicts(LoopTable(["id", "Cartn_x"], ["5", "1"]))
+        self.assertEqual(atoms, [{
+         "id": 5, "element": None, "name": None, "alt_loc": None,
+         "x": 1.0, "y": None, "z": None, "occupancy": 1, "bfactor": None,
+         "charge": 0, "residue_id": None, "residue_name": None,
+         "residue_insert": "", "chain_id": None, "anisotropy": [],
+         "polymer": False, "full_res_id": None
+        }])
+
+
+    def test_can_handle_no_atoms(self):
+        self.assertEqual(atom_site_to_atom_dicts(LoopTable(self.names, [])), [])
+
+
+
+class AtomSiteRowsTests(TestCase):
+
+    def setUp(self):
+        self.atom_site = LoopTable([
+         "auth_asym_id", "label_comp_id", "type_symbol", "label_alt_id",
+         "auth_seq_id", "pdbx_PDB_ins_code"
+        ], [
+         "A", "VAL", "N", ".", "1", "?", "A", "VAL", "H", "A", "1", "?",
+         "B", "HOH", "O", ".", "2", "?", "A", "VAL", "N", ".", "1", "?"
+        ])
+        self.model_nums = [1, 1, 1, 2]
+
+
+    def test_no_rows_if_nothing_filtered(self):
+        self.assertIsNone(atom_site_rows(self.atom_site, self.model_nums))
+
+
+    def test_can_select_model(self):
+        self.assertEqual(atom_site_rows(self.atom_site, self.model_nums, 1), [0, 1, 2])
+        self.assertEqual(atom_site_rows(self.atom_site, self.model_nums, 2), [3])
+        self.assertEqual(atom_site_rows(self.atom_site, self.model_nums, 3), [])
+
+
+    def test_models_are_numbered_in_file_order(self):
+        model_nums = [5, 5, 3, 1]
+        self.assertEqual(atom_site_rows(self.atom_site, model_nums, 1), [0, 1])
+        self.assertEqual(atom_site_rows(self.atom_site, model_nums, 2), [2])
+        self.assertEqual(atom_site_rows(self.atom_site, model_nums, 3), [3])
+
+
+    def test_can_filter_rows(self):
+        keep = Mock(side_effect=[True, False, True])
+        rows = atom_site_rows(self.atom_site, self.model_nums, 1, keep)
+        self.assertEqual(rows, [0, 2])
+        keep.assert_any_call("A", "VAL", "N", None, (1, "A", "1", "?"))
+        keep.assert_any_call("A", "VAL", "H", "A", (1, "A", "1", "?"))
+        keep.assert_any_call("B", "HOH", "O", None, (1, "B", "2", "?"))
+
+
+
+class TableColumnTests(TestCase):
+
+    def test_can_get_loop_table_column(self):
+        table = LoopTable(["a", "b"], ["1", "2", "3", "4"])
+        self.assertIs(table_column(table, "a"), table._columns["a"])
+        self.assertEqual(table_column(table, "c", "?"), ["?", "?"])
+
+
+    def test_can_get_list_column(self):
+        table = [{"a": "1", "b": "2"}, {"a": "3"}]
+        self.assertEqual(table_column(table, "a"), ["1", "3"])
+        self.assertEqual(table_column(table, "b", "?"), ["2", "?"])
+
+
+
+class ColumnConversionTests(TestCase):
+
+    def test_can_convert_float_column(self):
+        values = convert_column(["1.5", "-2", "3e2"], float, None)
+        self.assertEqual(values, [1.5, -2.0, 300.0])
+        self.assertIsInstance(values[0], float)
+
+
+    def test_can_convert_float_column_with_missing_values(self):
+        self.assertEqual(
+         convert_column(["1.5", "?", "."], float, 0), [1.5, 0, 0]
+        )
+
+
+    def test_can_convert_int_column(self):
+        self.assertEqual(convert_column(["1", "?", "-3"], int, None), [1, None, -3])
+
+
+    def test_can_keep_string_column(self):
+        self.assertEqual(convert_column(["A", ".", "B"], None, ""), ["A", "", "B"])
@@ -1,8 +1,10 @@
 from copy import deepcopy
 from datetime import date
+import numpy as np
 from unittest import TestCase
 from unittest.mock import Mock, patch, PropertyMock, MagicMock
 from atomium.files.pdb import *
+from atomium.files.data import ATOM_DICT
 
 class PdbStringToPdbDictTests(TestCase):
 
@@ -27,6 +29,116 @@ class PdbStringToPdbDictTests(TestCase):
 
 
 
+    def test_can_read_pdb_header_only(self):
+        lines = [
+         "HEADER    ABC", "REMARK  2 RES", "ATOM  1", "HETATM 5", "CONECT 7"
+        ]
+        self.assertEqual(pdb_string_to_pdb_dict("\n".join(lines), True), {
+         "HEADER": ["    ABC"], "REMARK": {"2": ["RES"]}, "MODEL": []
+        })
+        self.assertEqual(pdb_string_to_pdb_dict("HEADER    ABC", True), {
+         "HEADER": ["    ABC"], "MODEL": []
+        })
+
+
+
+class PdbLinesToPdbDictTests(TestCase):
+
+    def test_can_turn_pdb_lines_to_pdb_dict(self):
+        lines = [
+         "REC1  CONTENTS1\n", "REMARK  1 ABC\n", "ATOM  1\n", "TER\n",
+         "HETATM 11\n", "CONECT 7\n", "\n"
+        ]
+        self.assertEqual(pdb_lines_to_pdb_dict(iter(lines)), {
+         "REC1": ["CONTENTS1"], "REMARK": {"1": ["ABC"]},
+         "MODEL": [{"ATOM": ["1"], "HETATM": [" 11"], "TER": [""]}],
+         "CONECT": [" 7"]
+        })
+        self.assertEqual(
+         pdb_lines_to_pdb_dict(iter(lines)),
+         pdb_string_to_pdb_dict("".join(lines))
+        )
+
+
+    def test_can_read_pdb_header_only_from_lines(self):
+        lines = iter(["HEADER    ABC\n", "REMARK  2 RES\n", "ATOM  1\n", "CONECT 7\n"])
+        self.assertEqual(pdb_lines_to_pdb_dict(lines, True), {
+         "HEADER": ["    ABC"], "REMARK": {"2": ["RES"]}, "MODEL": []
+        })
+        self.assertEqual(list(lines), ["CONECT 7\n"])
+
+
+
+class PdbHeaderLinesTests(TestCase):
+
+    def test_can_yield_lines_before_coordinates(self):
+        lines = iter(["HEADER    ABC\n", "TITLE     T\n", "MODEL        1\n", "ATOM  1\n"])
+        self.assertEqual(list(pdb_header_lines(lines)), [
+         "HEADER    ABC\n", "TITLE     T\n"
+        ])
+        self.assertEqual(next(lines), "ATOM  1\n")
+
+
+
+class PdbLinesToModelDictsTests(TestCase):
+
+    def test_can_yield_models_one_at_a_time(self):
+        lines = iter([
+         "HEADER    ABC", "REMARK   2 RES", "MODEL        1", "ATOM      1",
+         "TER", "HETATM    2", "ENDMDL", "MODEL        2", "ATOM      3",
+         "ENDMDL", "CONECT 7"
+        ])
+        pdb_dict = {}
+        models = pdb_lines_to_model_dicts(lines, pdb_dict)
+        self.assertEqual(next(models), {
+         "ATOM": ["    1"], "TER": [""], "HETATM": ["    2"]
+        })
+        self.assertEqual(pdb_dict, {
+         "HEADER": ["    ABC"], "REMARK": {"2": [" RES"]}
+        })
+        self.assertEqual(next(lines), "MODEL        2")
+        self.assertEqual(list(models), [])
+        self.assertEqual(pdb_dict["CONECT"], [" 7"])
+
+
+    def test_can_yield_single_model_without_model_records(self):
+        lines = ["HEADER    ABC", "", "ATOM      1", "ANISOU    1", "CONECT 7"]
+        pdb_dict = {}
+        self.assertEqual(list(pdb_lines_to_model_dicts(lines, pdb_dict)), [
+         {"ATOM": [], "HETATM": ["    1"], "ANISOU": ["    1"]}
+        ])
+        self.assertEqual(pdb_dict, {"HEADER": ["    ABC"], "CONECT": [" 7"]})
+
+
+    def test_can_yield_unclosed_model(self):
+        lines = ["MODEL        1", "ATOM      1", "TER", "ENDMDL", "MODEL 2", "ATOM      2"]
+        self.assertEqual(list(pdb_lines_to_model_dicts(lines, {})), [
+         {"ATOM": ["    1"], "TER": [""]}, {"ATOM": [], "HETATM": ["    2"]}
+        ])
+
+
+
+class ModelLinesToModelDictTests(TestCase):
+
+    def test_can_sort_model_lines(self):
+        self.assertEqual(model_lines_to_model_dict([
+         ("ATOM", "1"), ("ANISOU", "2"), ("HETATM", "3"), ("TER", ""),
+         ("ATOM", "4"), ("HETATM", "5")
+        ]), {
+         "ATOM": ["1", "3"], "ANISOU": ["2"], "TER": [""], "HETATM": ["4", "5"]
+        })
+
+
+    def test_can_handle_no_ter_records(self):
+        self.assertEqual(model_lines_to_model_dict([("ATOM", "1")]), {
+         "ATOM": [], "HETATM": ["1"]
+        })
+
+
+    def test_can_handle_no_lines(self):
+        self.assertEqual(model_lines_to_model_dict([]), {"ATOM": []})
+
+
 class PdbDictToDataDictTests(TestCase):
 
     @patch("atomium.files.pdb.update_description_dict")
@@ -40,7 +152,13 @@ class PdbDictToDataDictTests(TestCase):
         mock_exp.assert_called_with({"A": "B"}, DATA_DICT)
         mock_qual.assert_called_with({"A": "B"}, DATA_DICT)
         mock_geo.assert_called_with({"A": "B"}, DATA_DICT)
-        mock_mdls.assert_called_with({"A": "B"}, DATA_DICT)
+        mock_mdls.assert_called_with({"A": "B"}, DATA_DICT, None)
+
+
+    @patch("atomium.files.pdb.update_models_list")
+    def test_can_pass_filters_to_models(self, mock_mdls):
+        pdb_dict_to_data_dict({"A": "B"}, model=2, water=False)
+        mock_mdls.assert_called_with({"A": "B"}, DATA_DICT, 2, water=False)
 
 
 
@@ -100,7 +218,7 @@ class GeometryDictUpdatingTests(TestCase):
 
 class ModelListUpdatingTests(TestCase):
 
-    @patch("atomium.files.pdb.atom_line_to_atom_dict")
+    @patch("atomium.files.pdb.atom_lines_to_atom_dicts")
     @patch("atomium.files.pdb.generate_higher_structures")
     @patch("atomium.files.pdb.assign_anisou")
     @patch("atomium.files.pdb.extract_sequence")
@@ -108,12 +226,10 @@ class ModelListUpdatingTests(TestCase):
     def test_can_update_single_model(self, mock_con, mock_seq, mock_an, mock_gen, mock_at):
         pdb_dict = {"MODEL": [{"ATOM": ["at1", "at2", "at3"], "HETATM": ["ht1", "ht2", "ht3"]}]}
         data_dict = {"models": []}
-        mock_at.side_effect = ({"id": 1}, {"id": 2}, {"id": 3}, {"id": 4}, {"id": 5}, {"id": 6})
+        mock_at.side_effect = ([{"id": 1}, {"id": 2}, {"id": 3}], [{"id": 4}, {"id": 5}, {"id": 6}])
         update_models_list(pdb_dict, data_dict)
-        for a in pdb_dict["MODEL"][0]["ATOM"]:
-            mock_at.assert_any_call(a)
-        for a in pdb_dict["MODEL"][0]["HETATM"]:
-            mock_at.assert_any_call(a, polymer=False)
+        mock_at.assert_any_call(["at1", "at2", "at3"], True)
+        mock_at.assert_any_call(["ht1", "ht2", "ht3"], False)
         self.assertEqual(data_dict, {"models": [{
          "atoms": [{"id": 1}, {"id": 2}, {"id": 3}, {"id": 4}, {"id": 5}, {"id": 6}],
          "chains": [], "residues": [], "ligands": [], "connections": []
@@ -124,7 +240,7 @@ class ModelListUpdatingTests(TestCase):
         mock_con.assert_called_with(pdb_dict, data_dict["models"])
 
 
-    @patch("atomium.files.pdb.atom_line_to_atom_dict")
+    @patch("atomium.files.pdb.atom_lines_to_atom_dicts")
     @patch("atomium.files.pdb.generate_higher_structures")
     @patch("atomium.files.pdb.assign_anisou")
     @patch("atomium.files.pdb.extract_sequence")
@@ -132,12 +248,14 @@ class ModelListUpdatingTests(TestCase):
     def test_can_update_multiple_model(self, mock_con, mock_seq, mock_an, mock_gen, mock_at):
         pdb_dict = {"MODEL": [{"ATOM": ["at1", "at2"], "HETATM": ["ht1", "ht2"]}, {"ATOM": ["at3"], "HETATM": ["ht3"]}]}
         data_dict = {"models": []}
-        mock_at.side_effect = ({"id": 1}, {"id": 2}, {"id": 4}, {"id": 5}, {"id": 1}, {"id": 4})
+        mock_at.side_effect = (
+         [{"id": 1}, {"id": 2}], [{"id": 4}, {"id": 5}], [{"id": 1}], [{"id": 4}]
+        )
         update_models_list(pdb_dict, data_dict)
-        for a in pdb_dict["MODEL"][0]["ATOM"] + pdb_dict["MODEL"][1]["ATOM"]:
-            mock_at.assert_any_call(a)
-        for a in pdb_dict["MODEL"][0]["HETATM"] + pdb_dict["MODEL"][1]["HETATM"]:
-            mock_at.assert_any_call(a, polymer=False)
+        mock_at.assert_any_call(["at1", "at2"], True)
+        mock_at.assert_any_call(["ht1", "ht2"], False)
+        mock_at.assert_any_call(["at3"], True)
+        mock_at.assert_any_call(["ht3"], False)
         self.assertEqual(data_dict, {"models": [{
          "atoms": [{"id": 1}, {"id": 2}, {"id": 4}, {"id": 5}],
          "chains": [], "residues": [], "ligands": [], "connections": []
@@ -152,6 +270,119 @@ class ModelListUpdatingTests(TestCase):
         mock_con.assert_called_with(pdb_dict, data_dict["models"])
 
 
+    @patch("atomium.files.pdb.model_dict_to_data_model")
+    @patch("atomium.files.pdb.atom_filter")
+    @patch("atomium.files.pdb.generate_higher_structures")
+    @patch("atomium.files.pdb.extract_sequence")
+    @patch("atomium.files.pdb.extract_connections")
+    def test_can_select_model_and_filter_atoms(self, mock_con, mock_seq, mock_gen, mock_filter, mock_mod):
+        pdb_dict = {"MODEL": ["m1", "m2", "m3"]}
+        data_dict = {"models": []}
+        update_models_list(pdb_dict, data_dict, 2, chains=["A"])
+        mock_filter.assert_called_with(chains=["A"])
+        mock_mod.assert_called_once_with("m2", mock_filter.return_value)
+        self.assertEqual(data_dict["models"], [mock_mod.return_value])
+        data_dict = {"models": []}
+        update_models_list(pdb_dict, data_dict, 4)
+        self.assertEqual(data_dict["models"], [])
+
+
+    @patch("atomium.files.pdb.model_dict_to_data_model")
+    @patch("atomium.files.pdb.atom_filter")
+    @patch("atomium.files.pdb.generate_higher_structures")
+    @patch("atomium.files.pdb.extract_sequence")
+    @patch("atomium.files.pdb.extract_connections")
+    def test_filtered_empty_models_are_dropped(self, mock_con, mock_seq, mock_gen, mock_filter, mock_mod):
+        pdb_dict = {"MODEL": ["m1", "m2"]}
+        models = [{"atoms": []}, {"atoms": [1]}]
+        mock_mod.side_effect = models
+        data_dict = {"models": []}
+        update_models_list(pdb_dict, data_dict, chains=["B"])
+        self.assertEqual(data_dict["models"], [models[1]])
+        mock_filter.return_value = None
+        mock_mod.side_effect = models
+        data_dict = {"models": []}
+        update_models_list(pdb_dict, data_dict)
+        self.assertEqual(data_dict["models"], models)
+
+
+
+class ModelDictToDataModelTests(TestCase):
+
+    @patch("atomium.files.pdb.atom_lines_to_atom_dicts")
+    @patch("atomium.files.pdb.assign_anisou")
+    def test_can_make_data_model(self, mock_an, mock_at):
+        model_dict = {"ATOM": ["at1", "at2"], "HETATM": ["ht1"]}
+        mock_at.side_effect = ([{"id": 1}, {"id": 2}], [{"id": 3}])
+        model = model_dict_to_data_model(model_dict)
+        mock_at.assert_any_call(["at1", "at2"], True)
+        mock_at.assert_any_call(["ht1"], False)
+        self.assertEqual(model, {
+         "atoms": [{"id": 1}, {"id": 2}, {"id": 3}],
+         "chains": [], "residues": [], "ligands": [], "connections": []
+        })
+        mock_an.assert_called_with(model_dict, model)
+
+
+    @patch("atomium.files.pdb.atom_lines_to_atom_dicts")
+    @patch("atomium.files.pdb.assign_anisou")
+    @patch("atomium.files.pdb.keep_atom_line")
+    def test_can_filter_atom_lines(self, mock_keep, mock_an, mock_at):
+        model_dict = {"ATOM": ["at1", "at2"], "HETATM": ["ht1"]}
+        mock_keep.side_effect = lambda line, keep: line != "at2"
+        mock_at.side_effect = ([{"id": 1}], [{"id": 3}])
+        model = model_dict_to_data_model(model_dict, "KEEP")
+        mock_keep.assert_any_call("at2", "KEEP")
+        mock_at.assert_any_call(["at1"], True)
+        mock_at.assert_any_call(["ht1"], False)
+        self.assertEqual(model["atoms"], [{"id": 1}, {"id": 3}])
+
+
+    @patch("atomium.files.pdb.atom_lines_to_atom_dicts")
+    @patch("atomium.files.pdb.assign_anisou")
+    def test_can_make_data_model_from_empty_model(self, mock_an, mock_at):
+        mock_at.return_value = []
+        model = model_dict_to_data_model({})
+        mock_at.assert_any_call([], True)
+        mock_at.assert_any_call([], False)
+        self.assertEqual(model["atoms"], [])
+
+
+
+class AtomLineKeepingTests(TestCase):
+
+    def test_can_pass_record_values_to_filter(self):
+        keep = Mock()
+        line = "    1  N  AVAL A  11A     49.668  24.248  10.436  0.50 25.00           N"
+        self.assertIs(keep_atom_line(line, keep), keep.return_value)
+        keep.assert_called_with("A", "VAL", "N", "A", "A  11A")
+
+
+    def test_blank_values_are_none(self):
+        keep = Mock()
+        keep_atom_line("    1  N   VAL    11      49.668  24.248  10.436", keep)
+        keep.assert_called_with(None, "VAL", None, None, "   11 ")
+
+
+
+class PdbLinesToDataModelsTests(TestCase):
+
+    @patch("atomium.files.pdb.pdb_lines_to_model_dicts")
+    @patch("atomium.files.pdb.model_dict_to_data_model")
+    @patch("atomium.files.pdb.generate_higher_structures")
+    @patch("atomium.files.pdb.extract_sequence")
+    def test_can_yield_data_models(self, mock_seq, mock_gen, mock_mod, mock_dicts):
+        mock_dicts.return_value = iter(["m1", "m2"])
+        mock_mod.side_effect = [{"id": 1}, {"id": 2}]
+        models = pdb_lines_to_data_models("lines")
+        self.assertEqual(next(models), {"id": 1})
+        self.assertEqual(mock_dicts.call_args[0][0], "lines")
+        mock_mod.assert_called_with("m1")
+        mock_gen.assert_called_with([{"id": 1}])
+        mock_seq.assert_called_with(mock_dicts.call_args[0][1], [{"id": 1}])
+        self.assertEqual(list(models), [{"id": 2}])
+        mock_gen.assert_called_with([{"id": 2}])
+
 
 class HeaderExtractionTests(TestCase):
 
@@ -539,6 +770,121 @@ class AtomLineToAtomDictTests(TestCase):
 
 
 
+class AtomLinesToAtomDictsTests(TestCase):
+
+    def setUp(self):
+        self.lines = [
+         "  107  N1 AGLY B  13C     12.681  37.302 -25.211 0.70  15.56           N2-",
+         "  108  CA  GLY B  14     -0.000    .5      5.     1.00                C",
+         " " * 74,
+         "  109 ZN   ZN     -5       1.0     2.0     3.0                        ZN1+"
+        ]
+
+
+    def test_can_convert_atom_lines(self):
+        atoms = atom_lines_to_atom_dicts(self.lines)
+        self.assertEqual(atoms, [atom_line_to_atom_dict(l) for l in self.lines])
+        self.assertEqual(atoms[0]["charge"], -2)
+        self.assertEqual(atoms[1]["x"], 0)
+        self.assertEqual(atoms[3]["full_res_id"], ":-5")
+
+
+    def test_can_convert_hetatm_lines(self):
+        atoms = atom_lines_to_atom_dicts(self.lines, polymer=False)
+        self.assertEqual(atoms, [
+         atom_line_to_atom_dict(l, polymer=False) for l in self.lines
+        ])
+
+
+    def test_can_convert_no_lines(self):
+        self.assertEqual(atom_lines_to_atom_dicts([]), [])
+
+
+    @patch("atomium.files.pdb.atom_line_to_atom_dict")
+    def test_can_parse_bad_lines_separately(self, mock_at):
+        self.lines[1] = self.lines[1][:30] + "x" + self.lines[1][31:]
+        self.lines.append("  110")
+        mock_at.side_effect = [{"id": 1}, {"id": 2}]
+        atoms = atom_lines_to_atom_dicts(self.lines)
+        mock_at.assert_any_call(self.lines[1], True)
+        mock_at.assert_any_call(self.lines[4], True)
+        self.assertEqual(mock_at.call_count, 2)
+        self.assertEqual(atoms[0]["id"], 107)
+        self.assertEqual(atoms[1]["id"], 1)
+        self.assertEqual(atoms[4]["id"], 2)
+
+
+    def test_bad_lines_raise_the_same_errors(self):
+        self.lines[1] = self.lines[1][:30] + "x" + self.lines[1][31:]
+        with self.assertRaises(ValueError):
+            atom_lines_to_atom_dicts(self.lines)
+
+
+    @patch("atomium.files.pdb.atom_line_to_atom_dict")
+    def test_can_parse_non_ascii_lines_separately(self, mock_at):
+        self.lines[0] = self.lines[0].replace("GLY", "GLé")
+        mock_at.side_effect = [1, 2, 3, 4]
+        atoms = atom_lines_to_atom_dicts(self.lines, polymer=False)
+        for line in self.lines: mock_at.assert_any_call(line, False)
+        self.assertEqual(atoms, [1, 2, 3, 4])
+
+
+
+class NumberDecodingTests(TestCase):
+
+    def table(self, *values):
+        return np.array(
+         [(" " + value).ljust(8) for value in values], dtype="S8"
+        ).view(np.uint8).reshape(len(values), 8).copy()
+
+
+    def test_can_decode_floats(self):
+        values, bad = decode_numbers(self.table("1.5", "-0.25", "     ", "7"), 1, 8)
+        self.assertEqual(values, [1.5, -0.25, None, 7.0])
+        self.assertIsInstance(values[3], float)
+        self.assertEqual(bad, [])
+
+
+    def test_can_decode_integers(self):
+        values, bad = decode_numbers(self.table("15", "-3", "    "), 1, 6, int, 0)
+        self.assertEqual(values, [15, -3, 0])
+        self.assertIsInstance(values[0], int)
+        self.assertEqual(bad, [])
+
+
+    def test_can_find_bad_values(self):
+        values, bad = decode_numbers(self.table("1.5", "1.x", "  ", "2"), 1, 8)
+        self.assertEqual(values[0::2], [1.5, None])
+        self.assertEqual(values[3], 2)
+        self.assertEqual(bad, [1])
+        values, bad = decode_numbers(self.table("1.5", "2"), 1, 8, int)
+        self.assertEqual(values[1], 2)
+        self.assertEqual(bad, [0])
+
+
+
+class TextColumnTests(TestCase):
+
+    def test_can_decode_text_column(self):
+        table = np.array(
+         [" CA A", " N   ", "     "], dtype="S5"
+        ).view(np.uint8).reshape(3, 5)
+        self.assertEqual(text_column(table, 0, 4), ["CA", "N", ""])
+        self.assertEqual(text_column(table, 4, 5), ["A", "", ""])
+
+
+
+class ChargeValueTests(TestCase):
+
+    def test_can_get_charge_value(self):
+        self.assertEqual(charge_value("2"), 2)
+        self.assertEqual(charge_value("-1"), -1)
+        self.assertEqual(charge_value("2-"), -2)
+        self.assertEqual(charge_value("1+"), 1)
+        with self.assertRaises(ValueError): charge_value("X")
+
+
+
 class AnisouAssingingTests(TestCase):
 
     def test_can_assign_anisou(self):
@@ -608,6 +954,10 @@ class ConnectionExtractionTests(TestCase):
              {"atom": 1179, "bond_to": [746, 1184, 1195, 1203, 1211, 1222]},
              {"atom": 1221, "bond_to": [544, 1017, 1020, 1022]}
             ])
+        self.assertIsNot(models[0]["connections"], models[1]["connections"])
+        for con1, con2 in zip(models[0]["connections"], models[1]["connections"]):
+            self.assertIsNot(con1, con2)
+            self.assertIsNot(con1["bond_to"], con2["bond_to"])
 
 
 
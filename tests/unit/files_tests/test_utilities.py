@@ -1,5 +1,13 @@
+import io
 from unittest import TestCase
 from unittest.mock import Mock, patch, PropertyMock, MagicMock
+import gzip
+import bz2
+import lzma
+import mmap
+import requests
+from concurrent.futures import Future
+from atomium.files import utilities
 from atomium.files.utilities import *
 
 class DetermineFileTypeTests(TestCase):
@@ -10,6 +18,13 @@ class DetermineFileTypeTests(TestCase):
         self.assertEqual(determine_file_type("/a/d.e/c.xyz", ""), "xyz")
 
 
+    def test_can_recognise_compressed_endings(self):
+        self.assertEqual(determine_file_type("/a/d.e/c.pdb.gz", ""), "pdb")
+        self.assertEqual(determine_file_type("/a/d.e/c.cif.bz2", ""), "cif")
+        self.assertEqual(determine_file_type("/a/d.e/c.xyz.xz", ""), "xyz")
+        self.assertEqual(determine_file_type("/a/pdb1lol.ent.gz", ""), "pdb")
+
+
     def test_can_recognise_pdb_content(self):
         self.assertEqual(determine_file_type(
          "/a/d.e/c", "HEADER\nATOM\nHETATM"
@@ -28,43 +43,679 @@ class DetermineFileTypeTests(TestCase):
         ), "xyz")
 
 
+    def test_can_recognise_bytes_content(self):
+        self.assertEqual(determine_file_type("c", b"HEADER\nATOM"), "pdb")
+        self.assertEqual(determine_file_type("c", b"loop_\n_a\nATOM"), "cif")
+        self.assertEqual(determine_file_type("c", b"header\n1 2 3"), "xyz")
+
+
+
+class FileExtensionTests(TestCase):
+
+    def test_can_get_file_extension(self):
+        self.assertEqual(file_extension("/a/d.e/c.pdb"), "pdb")
+        self.assertEqual(file_extension("/a/d.e/c.ent"), "pdb")
+        self.assertEqual(file_extension("c.cif.gz"), "cif")
+        self.assertEqual(file_extension("c.xyz.bz2"), "xyz")
+        self.assertEqual(file_extension("c.pdb.xz"), "pdb")
+
+
+    def test_unknown_extensions_give_none(self):
+        self.assertIsNone(file_extension("/a/d.e/c"))
+        self.assertIsNone(file_extension("c.txt"))
+        self.assertIsNone(file_extension("c.gz"))
+        self.assertIsNone(file_extension(""))
+
+
+
+class FileTypeDetectionTests(TestCase):
+
+    @patch("atomium.files.utilities.open_buffer")
+    def test_extension_is_used_first(self, mock_buffer):
+        self.assertEqual(detect_file_type("a/b.cif.gz"), "cif")
+        self.assertFalse(mock_buffer.called)
+
+
+    @patch("atomium.files.utilities.open_buffer")
+    @patch("atomium.files.utilities.open_stream")
+    def test_can_detect_from_buffer(self, mock_stream, mock_buffer):
+        buffer = mock_buffer.return_value
+        buffer.find.side_effect = lambda s: 1 if s == b"\nATOM" else -1
+        self.assertEqual(detect_file_type("a/b"), "pdb")
+        mock_buffer.assert_called_with("a/b")
+        buffer.close.assert_called_with()
+        self.assertFalse(mock_stream.called)
+
+
+    @patch("atomium.files.utilities.open_buffer")
+    @patch("atomium.files.utilities.open_stream")
+    def test_can_detect_from_stream(self, mock_stream, mock_buffer):
+        mock_buffer.return_value = None
+        f = mock_stream.return_value.__enter__.return_value
+        f.read.return_value = "loop_\n_atom\nATOM"
+        self.assertEqual(detect_file_type("a/b.gz"), "cif")
+        mock_stream.assert_called_with("a/b.gz")
+
+
 
 class OpeningTests(TestCase):
 
     def setUp(self):
-        self.patch1 = patch("builtins.open")
-        self.patch2 = patch("atomium.files.utilities.parse_string")
-        self.mock_open = self.patch1.start()
+        self.patch1 = patch("atomium.files.utilities.open_stream")
+        self.patch2 = patch("atomium.files.utilities.parse_stream")
+        self.patch3 = patch("atomium.files.utilities.open_buffer")
+        self.patch4 = patch("atomium.files.utilities.parse_bytes")
+        self.mock_stream = self.patch1.start()
         self.mock_parse = self.patch2.start()
-        open_return = MagicMock()
-        mock_file = Mock()
-        open_return.__enter__.return_value = mock_file
-        mock_file.read.return_value = "returnstring"
-        self.mock_open.return_value = open_return
+        self.mock_buffer = self.patch3.start()
+        self.mock_bytes = self.patch4.start()
+        self.mock_buffer.return_value = None
+        self.mock_file = self.mock_stream.return_value.__enter__.return_value
+        self.mock_file.read.return_value = "returnstring"
 
 
     def tearDown(self):
         self.patch1.stop()
         self.patch2.stop()
+        self.patch3.stop()
+        self.patch4.stop()
+
+
+    def test_can_open_buffer(self):
+        self.mock_buffer.return_value = b"ATOM"
+        f = open(b"ATOM", 1, a=2)
+        self.mock_buffer.assert_called_with(b"ATOM")
+        self.mock_bytes.assert_called_with(b"ATOM", "", 1, a=2)
+        self.assertFalse(self.mock_stream.called)
+        self.assertIs(f, self.mock_bytes.return_value)
+
+
+    def test_mapped_buffer_is_closed(self):
+        self.mock_buffer.return_value = Mock()
+        f = open("path/to/file.pdb")
+        self.mock_bytes.assert_called_with(
+         self.mock_buffer.return_value, "path/to/file.pdb"
+        )
+        self.mock_buffer.return_value.close.assert_called_with()
+        self.mock_bytes.side_effect = ValueError
+        with self.assertRaises(ValueError):
+            open("path/to/file.pdb")
+        self.assertEqual(self.mock_buffer.return_value.close.call_count, 2)
 
 
     def test_can_open_file(self):
         f = open("path/to/file", 1, a=2)
-        self.mock_open.assert_called_with("path/to/file")
-        self.mock_parse.assert_called_with("returnstring", "path/to/file", 1, a=2)
+        self.mock_stream.assert_called_with("path/to/file")
+        self.mock_parse.assert_called_with(self.mock_file, "path/to/file", 1, a=2)
         self.assertIs(f, self.mock_parse.return_value)
 
 
+    def test_can_open_bytes(self):
+        f = open(b"ATOM", 1)
+        self.mock_stream.assert_called_with(b"ATOM")
+        self.mock_parse.assert_called_with(self.mock_file, "", 1)
+
+
+    def test_can_open_file_object(self):
+        f = Mock()
+        f.name = "path/to/file.pdb.gz"
+        open(f)
+        self.mock_stream.assert_called_with(f)
+        self.mock_parse.assert_called_with(self.mock_file, "path/to/file.pdb.gz")
+        f.name = 3
+        open(f)
+        self.mock_parse.assert_called_with(self.mock_file, "")
+
+
+    @patch("atomium.files.utilities.parse_cached_string")
+    def test_can_open_file_with_cache(self, mock_cached):
+        f = open("path/to/file", 1, a=2, cache_dir="dir", cache_size=10)
+        self.assertFalse(self.mock_buffer.called)
+        self.mock_stream.assert_called_with("path/to/file")
+        mock_cached.assert_called_with(
+         "returnstring", "path/to/file", "dir", 10, 1, a=2
+        )
+        self.assertFalse(self.mock_parse.called)
+        self.assertIs(f, mock_cached.return_value)
+
+
+    @patch("atomium.files.utilities.parse_cached_string")
+    def test_can_open_pdb_header_only_with_cache(self, mock_cached):
+        self.mock_file.__iter__ = Mock(return_value=iter([
+         "HEADER    ABC\n", "ATOM      1\n", "ATOM      2\n"
+        ]))
+        f = open("path/to/file.pdb.gz", header_only=True, cache_dir="dir")
+        mock_cached.assert_called_with(
+         "HEADER    ABC\n", "path/to/file.pdb.gz", "dir", CACHE_SIZE,
+         header_only=True
+        )
+        self.assertFalse(self.mock_file.read.called)
+
+
+    @patch("atomium.files.utilities.parse_cached_string")
+    def test_can_open_mmcif_header_only_with_cache(self, mock_cached):
+        f = open("path/to/file.cif", header_only=True, cache_dir="dir")
+        mock_cached.assert_called_with(
+         "returnstring", "path/to/file.cif", "dir", CACHE_SIZE,
+         header_only=True
+        )
+
+
+
+class CachedStringParsingTests(TestCase):
+
+    def setUp(self):
+        self.patch1 = patch("atomium.files.utilities.load_from_cache")
+        self.patch2 = patch("atomium.files.utilities.save_to_cache")
+        self.patch3 = patch("atomium.files.utilities.parse_string")
+        self.patch4 = patch("atomium.files.utilities.cache_key")
+        self.mock_load = self.patch1.start()
+        self.mock_save = self.patch2.start()
+        self.mock_parse = self.patch3.start()
+        self.mock_key = self.patch4.start()
+        self.mock_key.return_value = "abc"
+
+
+    def tearDown(self):
+        for p in (self.patch1, self.patch2, self.patch3, self.patch4):
+            p.stop()
+
+
+    def test_can_load_data_dict_from_cache(self):
+        d = parse_cached_string("ATOM", "a.pdb", "dir", 10, data_dict=True)
+        self.mock_key.assert_called_with("ATOM", "pdb", "data", False)
+        self.mock_load.assert_called_with("dir", "abc")
+        self.assertFalse(self.mock_parse.called)
+        self.assertFalse(self.mock_save.called)
+        self.assertIs(d, self.mock_load.return_value)
+
+
+    def test_can_load_file_dict_from_cache(self):
+        d = parse_cached_string("ATOM", "a.cif", "dir", 10, file_dict=True)
+        self.mock_key.assert_called_with("ATOM", "cif", "file", False)
+        self.assertIs(d, self.mock_load.return_value)
+
+
+    def test_can_store_parsed_dict_in_cache(self):
+        self.mock_load.return_value = None
+        d = parse_cached_string("ATOM", "a.pdb", "dir", 10, True)
+        self.mock_parse.assert_called_with(
+         "ATOM", "a.pdb", file_dict=True, data_dict=True, header_only=False
+        )
+        self.mock_save.assert_called_with(
+         "dir", "abc", self.mock_parse.return_value, 10
+        )
+        self.assertIs(d, self.mock_parse.return_value)
+
+
+    def test_filtered_dicts_are_cached_separately(self):
+        self.mock_load.return_value = None
+        parse_cached_string("ATOM", "a.cif", "dir", 10, water=False, model=1)
+        self.mock_key.assert_called_with(
+         "ATOM", "cif", "data", False, ("model", 1), ("water", False)
+        )
+        self.mock_parse.assert_called_with(
+         "ATOM", "a.cif", file_dict=False, data_dict=True, header_only=False,
+         water=False, model=1
+        )
+
+
+    def test_header_only_dicts_are_cached_separately(self):
+        self.mock_load.return_value = None
+        parse_cached_string("ATOM", "a.cif", "dir", 10, data_dict=True, header_only=True)
+        self.mock_key.assert_called_with("ATOM", "cif", "data", True)
+        self.mock_parse.assert_called_with(
+         "ATOM", "a.cif", file_dict=False, data_dict=True, header_only=True
+        )
+
+
+    @patch("atomium.files.utilities.data_dict_to_file")
+    def test_can_make_file_from_cached_data_dict(self, mock_file):
+        f = parse_cached_string("ATOM", "a.xyz", "dir", 10)
+        self.mock_key.assert_called_with("ATOM", "xyz", "data", False)
+        mock_file.assert_called_with(self.mock_load.return_value)
+        self.assertIs(f, mock_file.return_value)
+        self.assertEqual(f._filetype, "xyz")
+
+
+
+
+class StreamOpeningTests(TestCase):
+
+    def setUp(self):
+        self.contents = b"HEADER\nATOM\n"
+
+
+    @patch("builtins.open")
+    def test_can_open_plain_stream(self, mock_open):
+        mock_open.return_value = io.BytesIO(self.contents)
+        with open_stream("path/to/file.pdb") as f:
+            mock_open.assert_called_with("path/to/file.pdb", "rb")
+            self.assertEqual(list(f), ["HEADER\n", "ATOM\n"])
+
+
+    @patch("gzip.open")
+    def test_can_open_gzipped_stream(self, mock_open):
+        f = open_stream("path/to/file.pdb.gz")
+        mock_open.assert_called_with("path/to/file.pdb.gz", "rt")
+        self.assertIs(f, mock_open.return_value)
+
+
+    @patch("bz2.open")
+    @patch("lzma.open")
+    def test_can_open_other_compressed_streams(self, mock_xz, mock_bz2):
+        self.assertIs(open_stream("file.cif.bz2"), mock_bz2.return_value)
+        mock_bz2.assert_called_with("file.cif.bz2", "rt")
+        self.assertIs(open_stream("file.cif.xz"), mock_xz.return_value)
+        mock_xz.assert_called_with("file.cif.xz", "rt")
+
+
+    @patch("builtins.open")
+    @patch("bz2.open")
+    def test_can_recognise_compression_from_contents(self, mock_bz2, mock_open):
+        binary = io.BytesIO(bz2.compress(self.contents))
+        mock_open.return_value = binary
+        f = open_stream("path/to/file")
+        self.assertTrue(binary.closed)
+        mock_bz2.assert_called_with("path/to/file", "rt")
+        self.assertIs(f, mock_bz2.return_value)
+
+
+    def test_can_open_bytes(self):
+        for compress in (lambda b: b, gzip.compress, bz2.compress, lzma.compress):
+            with open_stream(compress(self.contents)) as f:
+                self.assertEqual(f.read(), "HEADER\nATOM\n")
+
+
+    def test_can_open_file_object(self):
+        binary = io.BytesIO(gzip.compress(self.contents))
+        with open_stream(binary) as f:
+            self.assertEqual(f.read(), "HEADER\nATOM\n")
+        self.assertFalse(binary.closed)
+
+
+
+class BufferOpeningTests(TestCase):
+
+    @patch("builtins.open")
+    @patch("mmap.mmap")
+    def test_can_map_file(self, mock_mmap, mock_open):
+        mock_mmap.return_value = b"HEADER\nATOM\n"
+        f = mock_open.return_value.__enter__.return_value
+        self.assertEqual(open_buffer("path/to/file.pdb"), b"HEADER\nATOM\n")
+        mock_open.assert_called_with("path/to/file.pdb", "rb")
+        mock_mmap.assert_called_with(
+         f.fileno.return_value, 0, access=mmap.ACCESS_READ
+        )
+
+
+    @patch("builtins.open")
+    @patch("mmap.mmap")
+    def test_cannot_map_empty_file(self, mock_mmap, mock_open):
+        mock_mmap.side_effect = ValueError
+        self.assertIsNone(open_buffer("path/to/file.pdb"))
+
+
+    @patch("builtins.open")
+    @patch("mmap.mmap")
+    def test_cannot_map_compressed_file(self, mock_mmap, mock_open):
+        mock_mmap.return_value = MagicMock()
+        mock_mmap.return_value.__getitem__.return_value = b"BZh91A"
+        self.assertIsNone(open_buffer("path/to/file"))
+        mock_mmap.return_value.close.assert_called_with()
+        self.assertIsNone(open_buffer("path/to/file.pdb.gz"))
+        self.assertEqual(mock_mmap.call_count, 1)
+
+
+    def test_can_use_bytes(self):
+        self.assertEqual(open_buffer(b"ATOM"), b"ATOM")
+        self.assertIsNone(open_buffer(gzip.compress(b"ATOM")))
+        self.assertIsNone(open_buffer(io.BytesIO(b"ATOM")))
+
+
+
+class BufferLinesTests(TestCase):
+
+    def test_can_get_lines(self):
+        self.assertEqual(list(buffer_lines(b"A 1\n\nB 2\nC")), [
+         "A 1", "", "B 2", "C"
+        ])
+        self.assertEqual(list(buffer_lines(b"A 1\nB 2\n")), ["A 1", "B 2"])
+        self.assertEqual(list(buffer_lines(b"")), [])
+
+
+    def test_can_get_lines_in_chunks(self):
+        lines = buffer_lines(b"A 1\nB 2\nC 3\n\xc3\x85 4", chunk_size=5)
+        self.assertEqual(next(lines), "A 1")
+        self.assertEqual(next(lines), "B 2")
+        self.assertEqual(list(lines), ["C 3", "\u00c5 4"])
+
+
+    def test_can_remove_carriage_returns(self):
+        self.assertEqual(list(buffer_lines(b"A\r\nB\r\nC\r\n", chunk_size=1)), [
+         "A", "B", "C"
+        ])
+
+
+
+class ModelIteratingTests(TestCase):
+
+    @patch("atomium.files.utilities.open_stream")
+    @patch("atomium.files.utilities.pdb_lines_to_data_models")
+    @patch("atomium.files.utilities.model_dict_to_model")
+    def test_can_iterate_pdb_models(self, mock_model, mock_models, mock_stream):
+        mock_file = mock_stream.return_value.__enter__.return_value
+        mock_models.return_value = iter(["m1", "m2"])
+        mock_model.side_effect = ["model1", "model2"]
+        models = iter_models("path/to/file.pdb.gz")
+        self.assertEqual(next(models), "model1")
+        mock_stream.assert_called_with("path/to/file.pdb.gz")
+        mock_models.assert_called_with(mock_file)
+        mock_model.assert_called_with("m1")
+        self.assertEqual(list(models), ["model2"])
+
+
+    @patch("atomium.files.utilities.open")
+    @patch("atomium.files.utilities.open_stream")
+    def test_can_iterate_other_models(self, mock_stream, mock_open):
+        mock_open.return_value.models = ("model1", "model2")
+        models = list(iter_models("path/to/file.cif.gz"))
+        self.assertEqual(models, ["model1", "model2"])
+        mock_open.assert_called_with("path/to/file.cif.gz")
+        self.assertFalse(mock_stream.called)
+
+
+    @patch("atomium.files.utilities.detect_file_type")
+    @patch("atomium.files.utilities.open")
+    @patch("atomium.files.utilities.open_stream")
+    def test_file_contents_are_examined(self, mock_stream, mock_open, mock_detect):
+        mock_detect.return_value = "cif"
+        mock_open.return_value.models = ("model1",)
+        self.assertEqual(list(iter_models("path/to/file")), ["model1"])
+        mock_detect.assert_called_with("path/to/file")
+        mock_open.assert_called_with("path/to/file")
+        self.assertFalse(mock_stream.called)
+
+
+
+class AtomIteratingTests(TestCase):
+
+    @patch("atomium.files.utilities.open_stream")
+    @patch("atomium.files.utilities.pdb_lines_to_model_dicts")
+    @patch("atomium.files.utilities.model_dict_to_data_model")
+    def test_can_iterate_atoms(self, mock_model, mock_models, mock_stream):
+        mock_file = mock_stream.return_value.__enter__.return_value
+        mock_models.return_value = iter(["m1", "m2"])
+        mock_model.side_effect = [{"atoms": [1, 2]}, {"atoms": [3]}]
+        atoms = list(iter_atoms("path/to/file.pdb"))
+        self.assertEqual(atoms, [1, 2, 3])
+        mock_stream.assert_called_with("path/to/file.pdb")
+        mock_models.assert_called_with(mock_file, {})
+        mock_model.assert_any_call("m1")
+        mock_model.assert_any_call("m2")
+
+
+    @patch("atomium.files.utilities.detect_file_type")
+    @patch("atomium.files.utilities.open")
+    @patch("atomium.files.utilities.open_stream")
+    def test_can_iterate_other_atoms(self, mock_stream, mock_open, mock_detect):
+        mock_detect.return_value = "cif"
+        mock_open.return_value = {"models": [{"atoms": [1, 2]}, {"atoms": [3]}]}
+        self.assertEqual(list(iter_atoms("path/to/file")), [1, 2, 3])
+        mock_detect.assert_called_with("path/to/file")
+        mock_open.assert_called_with("path/to/file", data_dict=True)
+        self.assertFalse(mock_stream.called)
+
+
+class ManyOpeningTests(TestCase):
+
+    def setUp(self):
+        self.patch1 = patch("atomium.files.utilities.open_files")
+        self.patch2 = patch("atomium.files.utilities.open_in_pool")
+        self.mock_open = self.patch1.start()
+        self.mock_pool = self.patch2.start()
+        self.mock_open.side_effect = lambda c, f, h, k: [
+         (p, "pdb", {p: f}) for p in c
+        ]
+        self.mock_pool.side_effect = lambda c, w, f, h, k: (
+         (p, "pdb", {p: w}) for chunk in c for p in chunk
+        )
+
+
+    def tearDown(self):
+        self.patch1.stop()
+        self.patch2.stop()
+
+
+    def test_can_open_many_data_dicts(self):
+        results = open_many(
+         iter(["a.pdb", "b.cif", "c.xyz"]), data_dict=True, workers=2,
+         chunksize=2, header_only=True, model=1
+        )
+        self.assertFalse(self.mock_pool.called)
+        self.assertEqual(list(results), [
+         ("a.pdb", {"a.pdb": 2}), ("b.cif", {"b.cif": 2}),
+         ("c.xyz", {"c.xyz": 2})
+        ])
+        chunks, workers, file_dict, header_only, filters = \
+         self.mock_pool.call_args[0]
+        self.assertEqual((workers, file_dict, header_only, filters), (
+         2, False, True, {"model": 1}
+        ))
+
+
+    def test_can_open_many_in_chunks(self):
+        self.mock_pool.side_effect = lambda c, *a: (
+         (str(c), None, {}) for c in c
+        )
+        results = list(open_many(
+         ["a", "b", "c", "d", "e"], data_dict=True, workers=2, chunksize=2
+        ))
+        self.assertEqual([r[0] for r in results], [
+         "['a', 'b']", "['c', 'd']", "['e']"
+        ])
+
+
+    def test_can_open_many_without_processes(self):
+        results = list(open_many(["a.pdb", "b.pdb"], file_dict=True, workers=0))
+        self.assertEqual(results, [("a.pdb", {"a.pdb": True}), ("b.pdb", {
+         "b.pdb": True
+        })])
+        self.assertFalse(self.mock_pool.called)
+        self.mock_open.assert_called_with(["b.pdb"], True, False, {})
+
+
+    @patch("os.cpu_count")
+    def test_default_workers_depend_on_cpus(self, mock_count):
+        mock_count.return_value = 4
+        list(open_many(["a"], data_dict=True))
+        self.assertEqual(self.mock_pool.call_args[0][1], 4)
+        self.mock_pool.reset_mock()
+        mock_count.return_value = 1
+        list(open_many(["a"], data_dict=True))
+        self.assertFalse(self.mock_pool.called)
+        self.assertTrue(self.mock_open.called)
+
+
+    @patch("atomium.files.utilities.data_dict_to_file")
+    def test_can_open_many_files(self, mock_file):
+        error = ValueError()
+        self.mock_pool.side_effect = lambda *a: iter([
+         ("a.pdb.gz", "pdb", {"a": 1}), ("b", None, error),
+         ("c", "cif", {"c": 1})
+        ])
+        mock_file.side_effect = lambda d: Mock(d=d)
+        results = list(open_many(["a.pdb.gz", "b", "c"], workers=2))
+        self.assertEqual(results[0][0], "a.pdb.gz")
+        self.assertEqual(results[0][1].d, {"a": 1})
+        self.assertEqual(results[0][1]._filetype, "pdb")
+        self.assertEqual(results[1], ("b", error))
+        self.assertEqual(results[2][1]._filetype, "cif")
+        self.assertEqual(mock_file.call_count, 2)
+
+
+    @patch("atomium.files.utilities.walk_files")
+    def test_can_open_directory(self, mock_walk):
+        mock_walk.return_value = iter(["dir/a.pdb"])
+        results = list(open_many("dir", data_dict=True, workers=2))
+        mock_walk.assert_called_with("dir")
+        self.assertEqual(results, [("dir/a.pdb", {"dir/a.pdb": 2})])
+
+
+
+class PoolOpeningTests(TestCase):
+
+    def setUp(self):
+        self.patch1 = patch("atomium.files.utilities.ProcessPoolExecutor")
+        self.mock_executor = self.patch1.start()
+        self.pool = self.mock_executor.return_value.__enter__.return_value
+        self.submitted = []
+        def submit(func, chunk, *args):
+            future = Future()
+            if chunk == ["bad"]:
+                future.set_exception(ValueError("bad"))
+            else:
+                future.set_result([(path, "pdb", args) for path in chunk])
+            self.submitted.append(chunk)
+            return future
+        self.pool.submit.side_effect = submit
+
+
+    def tearDown(self):
+        self.patch1.stop()
+
+
+    def test_can_open_chunks_in_pool(self):
+        results = list(open_in_pool(iter([["a", "b"], ["c"]]), 3, True, False, {}))
+        self.mock_executor.assert_called_with(3)
+        self.assertEqual(sorted(results), [
+         ("a", "pdb", (True, False, {})), ("b", "pdb", (True, False, {})),
+         ("c", "pdb", (True, False, {}))
+        ])
+        self.pool.submit.assert_called_with(open_files, ["c"], True, False, {})
+
+
+    def test_pool_is_not_overfilled(self):
+        chunks = iter([[n] for n in range(10)])
+        results = open_in_pool(chunks, 2, False, False, {})
+        next(results)
+        self.assertEqual(self.submitted, [[0], [1], [2], [3]])
+        self.assertEqual(len(list(results)), 9)
+        self.assertEqual(len(self.submitted), 10)
+
+
+    def test_failed_chunks_give_exceptions(self):
+        results = list(open_in_pool(iter([["bad"]]), 2, False, False, {}))
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0][:2], ("bad", None))
+        self.assertIsInstance(results[0][2], ValueError)
+
+
+    def test_pending_chunks_are_cancelled(self):
+        futures = []
+        def submit(func, chunk, *args):
+            futures.append(Future())
+            if chunk == ["a"]: futures[-1].set_result([("a", "pdb", 1)])
+            return futures[-1]
+        self.pool.submit.side_effect = submit
+        results = open_in_pool(iter([["a"], ["b"], ["c"]]), 1, False, False, {})
+        self.assertEqual(next(results), ("a", "pdb", 1))
+        results.close()
+        self.assertEqual(len(futures), 2)
+        self.assertTrue(futures[1].cancelled())
+
+
+
+class FileOpeningTests(TestCase):
+
+    @patch("atomium.files.utilities.open")
+    @patch("atomium.files.utilities.detect_file_type")
+    def test_can_open_files(self, mock_detect, mock_open):
+        error = ValueError()
+        mock_open.side_effect = [{"a": 1}, error]
+        mock_detect.return_value = "cif"
+        results = open_files(["a", "b.cif"], True, True, {"model": 1})
+        self.assertEqual(results, [
+         ("a", "cif", {"a": 1}), ("b.cif", None, error)
+        ])
+        mock_open.assert_called_with(
+         "b.cif", file_dict=True, data_dict=True, header_only=True, model=1
+        )
+        mock_detect.assert_called_once_with("a")
+
+
+    @patch("atomium.files.utilities.open")
+    @patch("atomium.files.utilities.detect_file_type")
+    def test_can_open_files_without_filters(self, mock_detect, mock_open):
+        open_files(["a.pdb"])
+        mock_open.assert_called_with(
+         "a.pdb", file_dict=False, data_dict=True, header_only=False
+        )
+
+
+
+class FileWalkingTests(TestCase):
+
+    @patch("os.walk")
+    def test_can_walk_files(self, mock_walk):
+        directories = ["pdb", "mmCIF"]
+        mock_walk.return_value = iter([
+         ("dir", directories, ["x.txt", "b.xyz", "a.pdb"]),
+         ("dir/mmCIF", [], ["1lol.cif.gz"]),
+         ("dir/pdb", [], ["pdb1lol.ent.gz", "README"])
+        ])
+        self.assertEqual(list(walk_files("dir")), [
+         "dir/a.pdb", "dir/b.xyz", "dir/mmCIF/1lol.cif.gz",
+         "dir/pdb/pdb1lol.ent.gz"
+        ])
+        mock_walk.assert_called_with("dir")
+        self.assertEqual(directories, ["mmCIF", "pdb"])
+
+
+    @patch("os.walk")
+    def test_can_walk_files_of_some_types(self, mock_walk):
+        mock_walk.return_value = iter([("dir", [], ["a.pdb", "b.cif", "c.xyz"])])
+        self.assertEqual(list(walk_files("dir", ("cif",))), ["dir/b.cif"])
+
+
 
 class FetchingTests(TestCase):
 
+    @patch("atomium.files.utilities.fetch_string")
+    @patch("atomium.files.utilities.parse_string")
+    def test_can_fetch(self, mock_parse, mock_fetch):
+        mock_fetch.return_value = ("FILE", "1XXX.pdb")
+        f = fetch("1XXX", 1, a=2)
+        mock_fetch.assert_called_with(
+         "1XXX", None, None, CACHE_SIZE, None, 0, TIMEOUT
+        )
+        mock_parse.assert_called_with("FILE", "1XXX.pdb", 1, a=2)
+        self.assertIs(f, mock_parse.return_value)
+
+
+    @patch("atomium.files.utilities.fetch_string")
+    @patch("atomium.files.utilities.parse_string")
+    def test_can_fetch_with_options(self, mock_parse, mock_fetch):
+        mock_fetch.return_value = ("FILE", "1XXX.pdb")
+        f = fetch(
+         "1XXX", mirror="m", download_dir="d", download_size=10,
+         download_age=5, retries=2, timeout=3, data_dict=True
+        )
+        mock_fetch.assert_called_with("1XXX", "m", "d", 10, 5, 2, 3)
+        mock_parse.assert_called_with("FILE", "1XXX.pdb", data_dict=True)
+        self.assertIs(f, mock_parse.return_value)
+
+
+
+class StringFetchingTests(TestCase):
+
     def setUp(self):
-        self.patch1 = patch("atomium.files.utilities.get")
-        self.mock_get = self.patch1.start()
-        self.response = Mock(status_code=200, text="FILE")
-        self.mock_get.return_value = self.response
-        self.patch2 = patch("atomium.files.utilities.parse_string")
-        self.mock_parse = self.patch2.start()
+        self.patch1 = patch("atomium.files.utilities.download")
+        self.mock_download = self.patch1.start()
+        self.mock_download.return_value = "FILE"
+        self.patch2 = patch("atomium.files.utilities.find_in_mirror")
+        self.mock_mirror = self.patch2.start()
+        self.mock_mirror.return_value = None
 
 
     def tearDown(self):
@@ -73,31 +724,294 @@ class FetchingTests(TestCase):
 
 
     def test_can_fetch_pdb_code(self):
-        f = fetch("1XXX", 1, a=2)
-        self.mock_get.assert_called_with("https://files.rcsb.org/view/1xxx.pdb")
-        self.mock_parse.assert_called_with("FILE", "1XXX.pdb", 1, a=2)
-        self.assertIs(f, self.mock_parse.return_value)
+        self.assertEqual(fetch_string("1XXX"), ("FILE", "1XXX.pdb"))
+        self.mock_download.assert_called_with(
+         "https://files.rcsb.org/view/1xxx.pdb", None, CACHE_SIZE, None, 0,
+         timeout=TIMEOUT
+        )
+        self.assertFalse(self.mock_mirror.called)
 
 
     def test_can_fetch_mmcif(self):
-        f = fetch("1XXX.cif", 1, a=2)
-        self.mock_get.assert_called_with("https://files.rcsb.org/view/1xxx.cif")
-        self.mock_parse.assert_called_with("FILE", "1XXX.cif", 1, a=2)
-        self.assertIs(f, self.mock_parse.return_value)
+        self.assertEqual(fetch_string("1XXX.cif"), ("FILE", "1XXX.cif"))
+        self.mock_download.assert_called_with(
+         "https://files.rcsb.org/view/1xxx.cif", None, CACHE_SIZE, None, 0,
+         timeout=TIMEOUT
+        )
 
 
     def test_can_fetch_url(self):
-        f = fetch("https://url/", 1, a=2)
-        self.mock_get.assert_called_with("https://url/")
-        self.mock_parse.assert_called_with("FILE", "https://url/", 1, a=2)
-        self.assertIs(f, self.mock_parse.return_value)
+        self.assertEqual(fetch_string("https://url/"), ("FILE", "https://url/"))
+        self.mock_download.assert_called_with(
+         "https://url/", None, CACHE_SIZE, None, 0, timeout=TIMEOUT
+        )
+
+
+    def test_can_fetch_into_download_directory(self):
+        fetch_string("1XXX", None, "dir", 10, 5, 3, 20)
+        self.mock_download.assert_called_with(
+         "https://files.rcsb.org/view/1xxx.pdb", "dir", 10, 5, 3, timeout=20
+        )
+
+
+    def test_can_fetch_missing_file_when_mirror_given(self):
+        self.assertEqual(fetch_string("1XXX", "m"), ("FILE", "1XXX.pdb"))
+        self.mock_mirror.assert_called_with("m", "1XXX.pdb")
+        self.assertTrue(self.mock_download.called)
+
+
+    @patch("atomium.files.utilities.open_stream")
+    def test_can_fetch_from_mirror(self, mock_stream):
+        self.mock_mirror.return_value = "m/pdb1xxx.ent.gz"
+        mock_stream.return_value.__enter__.return_value.read.return_value = "M"
+        self.assertEqual(fetch_string("1XXX", "m"), ("M", "1XXX.pdb"))
+        mock_stream.assert_called_with("m/pdb1xxx.ent.gz")
+        self.assertFalse(self.mock_download.called)
+
+
+
+class ManyFetchingTests(TestCase):
+
+    def setUp(self):
+        self.patch1 = patch("atomium.files.utilities.fetch_string")
+        self.mock_fetch = self.patch1.start()
+        self.mock_fetch.side_effect = lambda i, **k: ("ATOM " + i, i + ".pdb")
+        self.patch2 = patch("atomium.files.utilities.parse_string")
+        self.mock_parse = self.patch2.start()
+        self.mock_parse.side_effect = lambda s, i, f, d, h: {"s": s, "f": f}
+        self.patch3 = patch("atomium.files.utilities.ProcessPoolExecutor")
+        self.mock_pool = self.patch3.start()
+        pool = self.mock_pool.return_value
+        pool.submit.side_effect = lambda f, *a, **k: Mock(**{"result.return_value": f(*a, **k)})
+
+
+    def tearDown(self):
+        self.patch1.stop()
+        self.patch2.stop()
+        self.patch3.stop()
+
+
+    def test_can_fetch_many_data_dicts(self):
+        dicts = fetch_many(["A", "B", "C"], data_dict=True, processes=2, a=1)
+        self.assertEqual(dicts, [
+         {"s": "ATOM A", "f": False}, {"s": "ATOM B", "f": False},
+         {"s": "ATOM C", "f": False}
+        ])
+        self.mock_fetch.assert_any_call("B", retries=3, a=1)
+        self.mock_parse.assert_any_call("ATOM C", "C.pdb", False, True, False)
+        self.mock_pool.assert_called_with(2)
+        self.assertEqual(self.mock_pool.return_value.submit.call_count, 3)
+        self.mock_pool.return_value.shutdown.assert_called_with()
+
+
+    def test_can_fetch_many_file_dicts(self):
+        dicts = fetch_many(["A", "B"], file_dict=True, processes=2, retries=1)
+        self.assertEqual(dicts, [
+         {"s": "ATOM A", "f": True}, {"s": "ATOM B", "f": True}
+        ])
+        self.mock_fetch.assert_any_call("B", retries=1)
+
+
+    @patch("atomium.files.utilities.data_dict_to_file")
+    def test_can_fetch_many_files(self, mock_file):
+        mock_file.side_effect = lambda d: Mock(d=d)
+        files = fetch_many(["A", "B"], processes=2)
+        self.assertEqual([f.d for f in files], [
+         {"s": "ATOM A", "f": False}, {"s": "ATOM B", "f": False}
+        ])
+        self.assertEqual([f._filetype for f in files], ["pdb", "pdb"])
+
+
+    def test_can_fetch_many_without_processes(self):
+        dicts = fetch_many(["A", "B"], data_dict=True, processes=0)
+        self.assertEqual(dicts, [
+         {"s": "ATOM A", "f": False}, {"s": "ATOM B", "f": False}
+        ])
+        self.assertFalse(self.mock_pool.called)
+
+
+    @patch("os.cpu_count")
+    def test_default_processes_depend_on_cpus(self, mock_count):
+        mock_count.return_value = 4
+        fetch_many(["A"], data_dict=True)
+        self.mock_pool.assert_called_with(4)
+        self.mock_pool.reset_mock()
+        mock_count.return_value = 1
+        fetch_many(["A"], data_dict=True)
+        self.assertFalse(self.mock_pool.called)
+
+
+    def test_can_fetch_many_headers(self):
+        fetch_many(["A"], data_dict=True, processes=2, header_only=True)
+        self.mock_parse.assert_called_with("ATOM A", "A.pdb", False, True, True)
+
+
+    def test_can_fetch_many_filtered(self):
+        self.mock_parse.side_effect = lambda s, i, f, d, h, **k: {"s": s, "k": k}
+        dicts = fetch_many(["A"], data_dict=True, processes=2, model=1, a=1)
+        self.assertEqual(dicts, [{"s": "ATOM A", "k": {"model": 1}}])
+        self.mock_fetch.assert_called_with("A", retries=3, a=1)
 
 
-    def test_fetching_throws_value_error_if_404(self):
+    def test_fetching_errors_are_raised(self):
+        self.mock_fetch.side_effect = ValueError
+        with self.assertRaises(ValueError):
+            fetch_many(["A"], processes=2)
+        self.mock_pool.return_value.shutdown.assert_called_with()
+
+
+
+class MirrorSearchingTests(TestCase):
+
+    @patch("os.path.exists")
+    def test_can_find_divided_pdb_file(self, mock_exists):
+        mock_exists.side_effect = lambda path: path == "m/pdb/xx/pdb1xxx.ent.gz"
+        self.assertEqual(find_in_mirror("m", "1XXX.pdb"), "m/pdb/xx/pdb1xxx.ent.gz")
+
+
+    @patch("os.path.exists")
+    def test_can_find_divided_mmcif_file(self, mock_exists):
+        mock_exists.side_effect = lambda path: path == "m/mmCIF/xx/1xxx.cif.gz"
+        self.assertEqual(find_in_mirror("m", "1XXX.cif"), "m/mmCIF/xx/1xxx.cif.gz")
+
+
+    @patch("os.path.exists")
+    def test_can_find_flat_files(self, mock_exists):
+        for path in ("m/pdb1xxx.ent.gz", "m/pdb1xxx.ent", "m/1xxx.pdb.gz",
+         "m/1xxx.pdb"):
+            mock_exists.side_effect = lambda p: p == path
+            self.assertEqual(find_in_mirror("m", "1XXX.pdb"), path)
+        for path in ("m/1xxx.cif.gz", "m/1xxx.cif"):
+            mock_exists.side_effect = lambda p: p == path
+            self.assertEqual(find_in_mirror("m", "1XXX.cif"), path)
+
+
+    @patch("os.path.exists")
+    def test_missing_files_return_none(self, mock_exists):
+        mock_exists.return_value = False
+        self.assertIsNone(find_in_mirror("m", "1XXX.pdb"))
+        mock_exists.return_value = True
+        self.assertIsNone(find_in_mirror("m", "1XXX.mmtf"))
+
+
+
+class DownloadingTests(TestCase):
+
+    def setUp(self):
+        self.patch1 = patch("atomium.files.utilities.get_session")
+        self.mock_session = self.patch1.start()
+        self.mock_get = self.mock_session.return_value.get
+        self.response = Mock(status_code=200, text="FILE")
+        self.mock_get.return_value = self.response
+        self.patch2 = patch("atomium.files.utilities.load_download")
+        self.mock_load = self.patch2.start()
+        self.patch3 = patch("atomium.files.utilities.save_download")
+        self.mock_save = self.patch3.start()
+
+
+    def tearDown(self):
+        self.patch1.stop()
+        self.patch2.stop()
+        self.patch3.stop()
+
+
+    def test_can_download(self):
+        self.assertEqual(download("https://url/"), "FILE")
+        self.mock_get.assert_called_with("https://url/", timeout=TIMEOUT)
+        self.assertFalse(self.mock_load.called)
+        self.assertFalse(self.mock_save.called)
+
+
+    def test_downloading_throws_value_error_if_404(self):
         self.response.status_code = 404
+        self.mock_load.return_value = None
         with self.assertRaises(ValueError):
-            fetch("1XXX")
-        self.assertFalse(self.mock_parse.called)
+            download("https://url/", "dir")
+        self.assertFalse(self.mock_save.called)
+
+
+    @patch("time.sleep")
+    def test_can_retry_busy_responses(self, mock_sleep):
+        busy = Mock(status_code=503)
+        self.mock_get.side_effect = [busy, busy, self.response]
+        self.assertEqual(download("https://url/", retries=3, backoff=2), "FILE")
+        self.assertEqual(self.mock_get.call_count, 3)
+        self.assertEqual(
+         [c[0][0] for c in mock_sleep.call_args_list], [2, 4]
+        )
+
+
+    @patch("time.sleep")
+    def test_can_retry_connection_errors(self, mock_sleep):
+        self.mock_get.side_effect = [
+         requests.ConnectionError, requests.Timeout, self.response
+        ]
+        self.assertEqual(download("https://url/", retries=2), "FILE")
+        self.assertEqual(mock_sleep.call_count, 2)
+
+
+    @patch("time.sleep")
+    def test_can_retry_timeouts(self, mock_sleep):
+        self.mock_get.side_effect = [requests.Timeout, self.response]
+        self.assertEqual(download("https://url/", retries=1, timeout=5), "FILE")
+        self.assertEqual(self.mock_get.call_count, 2)
+        self.mock_get.assert_called_with("https://url/", timeout=5)
+        mock_sleep.assert_called_once_with(1)
+        self.mock_get.side_effect = requests.Timeout
+        with self.assertRaises(requests.Timeout):
+            download("https://url/", retries=1, timeout=5)
+
+
+    @patch("time.sleep")
+    def test_retries_can_run_out(self, mock_sleep):
+        self.mock_get.side_effect = requests.ConnectionError
+        with self.assertRaises(requests.ConnectionError):
+            download("https://url/", retries=2)
+        self.assertEqual(self.mock_get.call_count, 3)
+        self.mock_get.side_effect = None
+        self.mock_get.return_value = Mock(status_code=429)
+        with self.assertRaises(ValueError):
+            download("https://url/", retries=1)
+
+
+    @patch("time.sleep")
+    def test_missing_files_are_not_retried(self, mock_sleep):
+        self.response.status_code = 404
+        with self.assertRaises(ValueError):
+            download("https://url/", retries=2)
+        self.assertEqual(self.mock_get.call_count, 1)
+        self.assertFalse(mock_sleep.called)
+
+
+    def test_can_download_from_download_directory(self):
+        self.assertIs(
+         download("https://url/", "dir", 10, 5), self.mock_load.return_value
+        )
+        self.mock_load.assert_called_with("dir", "https://url/", 5)
+        self.assertFalse(self.mock_get.called)
+
+
+    def test_can_download_into_download_directory(self):
+        self.mock_load.return_value = None
+        self.assertEqual(download("https://url/", "dir", 10, 5), "FILE")
+        self.mock_get.assert_called_with("https://url/", timeout=TIMEOUT)
+        self.mock_save.assert_called_with("dir", "https://url/", "FILE", 10, 5)
+
+
+
+class SessionTests(TestCase):
+
+    @patch("requests.Session")
+    @patch("requests.adapters.HTTPAdapter")
+    def test_session_is_created_once(self, mock_adapter, mock_session):
+        with patch("atomium.files.utilities.SESSION", None):
+            session = get_session()
+            self.assertIs(get_session(), session)
+        self.assertIs(session, mock_session.return_value)
+        mock_session.assert_called_once_with()
+        mock_adapter.assert_called_once_with(pool_maxsize=POOL_SIZE)
+        session.mount.assert_any_call("http://", mock_adapter.return_value)
+        session.mount.assert_any_call("https://", mock_adapter.return_value)
 
 
 
@@ -127,7 +1041,7 @@ class FetchingOverSshTests(TestCase):
         f = fetch_over_ssh("HOST", "USER", "/path/", 1, a=2)
         self.mock_client.set_missing_host_key_policy.assert_called_with("POLICY")
         self.mock_client.load_system_host_keys.assert_called_with()
-        self.mock_client.connect.assert_called_with(hostname="HOST", username="USER")
+        self.mock_client.connect.assert_called_with(hostname="HOST", username="USER", port=22)
         self.mock_client.exec_command.assert_called_with("less /path/")
         self.mock_client.close.assert_called_with()
         self.mock_parse.assert_called_with("STRING", "/path/", 1, a=2)
@@ -139,7 +1053,7 @@ class FetchingOverSshTests(TestCase):
         self.mock_client.set_missing_host_key_policy.assert_called_with("POLICY")
         self.assertFalse(self.mock_client.load_system_host_keys.called)
         self.mock_client.connect.assert_called_with(
-         hostname="HOST", username="USER", password="xxx"
+         hostname="HOST", username="USER", password="xxx", port=22
         )
         self.mock_client.exec_command.assert_called_with("less /path/")
         self.mock_client.close.assert_called_with()
@@ -156,6 +1070,141 @@ class FetchingOverSshTests(TestCase):
 
 
 
+class ManyFetchingOverSshTests(TestCase):
+
+    @patch("atomium.files.utilities.get_sftp")
+    @patch("atomium.files.utilities.read_over_sftp")
+    @patch("atomium.files.utilities.parse_string")
+    def test_can_fetch_many_files_over_one_session(self, mock_parse, mock_read, mock_sftp):
+        mock_read.side_effect = ["S1", "S2"]
+        mock_parse.side_effect = ["F1", "F2"]
+        files = fetch_many_over_ssh(
+         "HOST", "USER", ["/a.pdb", "/b.cif.gz"], 1, password="xxx", a=2
+        )
+        mock_sftp.assert_called_once_with("HOST", "USER", "xxx", 22)
+        mock_read.assert_any_call(mock_sftp.return_value, "/a.pdb")
+        mock_read.assert_any_call(mock_sftp.return_value, "/b.cif.gz")
+        mock_parse.assert_any_call("S1", "/a.pdb", 1, a=2)
+        mock_parse.assert_any_call("S2", "/b.cif.gz", 1, a=2)
+        self.assertEqual(files, ["F1", "F2"])
+
+
+
+class SshConnectingTests(TestCase):
+
+    def setUp(self):
+        self.patch1 = patch("paramiko.SSHClient")
+        self.mock_ssh = self.patch1.start()
+        self.patch2 = patch("paramiko.AutoAddPolicy")
+        self.patch2.start().return_value = "POLICY"
+
+
+    def tearDown(self):
+        self.patch1.stop()
+        self.patch2.stop()
+
+
+    def test_can_connect_with_keys(self):
+        client = connect_over_ssh("HOST", "USER")
+        self.assertIs(client, self.mock_ssh.return_value)
+        client.set_missing_host_key_policy.assert_called_with("POLICY")
+        client.load_system_host_keys.assert_called_with()
+        client.connect.assert_called_with(hostname="HOST", username="USER", port=22)
+        self.assertFalse(client.close.called)
+
+
+    def test_can_connect_with_password_and_port(self):
+        client = connect_over_ssh("HOST", "USER", "xxx", 2222)
+        self.assertFalse(client.load_system_host_keys.called)
+        client.connect.assert_called_with(
+         hostname="HOST", username="USER", password="xxx", port=2222
+        )
+
+
+    def test_failed_connection_is_closed(self):
+        self.mock_ssh.return_value.connect.side_effect = OSError
+        with self.assertRaises(OSError):
+            connect_over_ssh("HOST", "USER")
+        self.mock_ssh.return_value.close.assert_called_with()
+
+
+
+class SftpGettingTests(TestCase):
+
+    def setUp(self):
+        self.patch1 = patch("atomium.files.utilities.connect_over_ssh")
+        self.mock_connect = self.patch1.start()
+        self.client = self.mock_connect.return_value
+        self.client.get_transport.return_value.is_active.return_value = True
+
+
+    def tearDown(self):
+        self.patch1.stop()
+        close_ssh_sessions()
+
+
+    def test_can_open_session(self):
+        sftp = get_sftp("HOST", "USER", "xxx")
+        self.mock_connect.assert_called_with("HOST", "USER", "xxx", 22)
+        self.assertIs(sftp, self.client.open_sftp.return_value)
+
+
+    def test_sessions_are_reused(self):
+        sftp = get_sftp("HOST", "USER")
+        self.assertIs(get_sftp("HOST", "USER"), sftp)
+        self.assertEqual(self.mock_connect.call_count, 1)
+        get_sftp("HOST2", "USER")
+        get_sftp("HOST", "USER2")
+        get_sftp("HOST", "USER", port=2222)
+        self.assertEqual(self.mock_connect.call_count, 4)
+
+
+    def test_lost_sessions_are_replaced(self):
+        get_sftp("HOST", "USER")
+        self.client.get_transport.return_value.is_active.return_value = False
+        new_client = Mock()
+        self.mock_connect.return_value = new_client
+        sftp = get_sftp("HOST", "USER")
+        self.client.close.assert_called_with()
+        self.assertIs(sftp, new_client.open_sftp.return_value)
+
+
+    def test_connection_closed_if_sftp_fails(self):
+        self.client.open_sftp.side_effect = OSError
+        with self.assertRaises(OSError):
+            get_sftp("HOST", "USER")
+        self.client.close.assert_called_with()
+        self.assertEqual(utilities.SSH_SESSIONS, {})
+
+
+    def test_can_close_sessions(self):
+        get_sftp("HOST", "USER")
+        close_ssh_sessions()
+        self.client.close.assert_called_with()
+        self.assertEqual(utilities.SSH_SESSIONS, {})
+
+
+
+class SftpReadingTests(TestCase):
+
+    def setUp(self):
+        self.sftp, self.f = MagicMock(), MagicMock()
+        self.sftp.open.return_value.__enter__.return_value = self.f
+
+
+    def test_can_read_file_with_prefetching(self):
+        self.f.read.return_value = b"STRING"
+        self.assertEqual(read_over_sftp(self.sftp, "/a.pdb"), "STRING")
+        self.sftp.open.assert_called_with("/a.pdb", "rb")
+        self.f.prefetch.assert_called_with()
+
+
+    def test_can_read_gzipped_file(self):
+        self.f.read.return_value = gzip.compress(b"STRING")
+        self.assertEqual(read_over_sftp(self.sftp, "/a.pdb.gz"), "STRING")
+
+
+
 class StringParsingTests(TestCase):
 
     def setUp(self):
@@ -165,6 +1214,11 @@ class StringParsingTests(TestCase):
         self.mock_cont = self.patch2.start()
 
 
+    def tearDown(self):
+        self.patch1.stop()
+        self.patch2.stop()
+
+
     @patch("atomium.files.utilities.pdb_string_to_pdb_dict")
     @patch("atomium.files.utilities.pdb_dict_to_data_dict")
     def test_can_parse_pdb(self, mock_data, mock_pdb):
@@ -173,7 +1227,7 @@ class StringParsingTests(TestCase):
         mock_data.return_value = {"DATA": "DICT"}
         pdb = parse_string("returnstring", "path/to/file")
         self.mock_type.assert_called_with("path/to/file", "returnstring")
-        mock_pdb.assert_called_with("returnstring")
+        mock_pdb.assert_called_with("returnstring", False)
         mock_data.assert_called_with({"PDB": "DICT"})
         self.mock_cont.assert_called_with({"DATA": "DICT"})
         self.assertIs(pdb, self.mock_cont.return_value)
@@ -188,7 +1242,7 @@ class StringParsingTests(TestCase):
         mock_data.return_value = {"DATA": "DICT"}
         pdb = parse_string("returnstring", "path/to/file", data_dict=True)
         self.mock_type.assert_called_with("path/to/file", "returnstring")
-        mock_pdb.assert_called_with("returnstring")
+        mock_pdb.assert_called_with("returnstring", False)
         mock_data.assert_called_with({"PDB": "DICT"})
         self.assertEqual(pdb, {"DATA": "DICT"})
 
@@ -199,10 +1253,20 @@ class StringParsingTests(TestCase):
         mock_pdb.return_value = {"PDB": "DICT"}
         pdb = parse_string("returnstring", "path/to/file", file_dict=True)
         self.mock_type.assert_called_with("path/to/file", "returnstring")
-        mock_pdb.assert_called_with("returnstring")
+        mock_pdb.assert_called_with("returnstring", False)
         self.assertEqual(pdb, {"PDB": "DICT"})
 
 
+    @patch("atomium.files.utilities.pdb_string_to_pdb_dict")
+    @patch("atomium.files.utilities.pdb_dict_to_data_dict")
+    def test_can_parse_pdb_header(self, mock_data, mock_pdb):
+        self.mock_type.return_value = "pdb"
+        pdb = parse_string("returnstring", "path/to/file", header_only=True)
+        mock_pdb.assert_called_with("returnstring", True)
+        mock_data.assert_called_with(mock_pdb.return_value)
+        self.assertIs(pdb, self.mock_cont.return_value)
+
+
     @patch("atomium.files.utilities.mmcif_string_to_mmcif_dict")
     @patch("atomium.files.utilities.mmcif_dict_to_data_dict")
     def test_can_parse_mmcif(self, mock_data, mock_mmcif):
@@ -211,7 +1275,7 @@ class StringParsingTests(TestCase):
         mock_data.return_value = {"DATA": "DICT"}
         mmcif = parse_string("returnstring", "path/to/file")
         self.mock_type.assert_called_with("path/to/file", "returnstring")
-        mock_mmcif.assert_called_with("returnstring")
+        mock_mmcif.assert_called_with("returnstring", False)
         mock_data.assert_called_with({"MMCIF": "DICT"})
         self.mock_cont.assert_called_with({"DATA": "DICT"})
         self.assertIs(mmcif, self.mock_cont.return_value)
@@ -226,7 +1290,7 @@ class StringParsingTests(TestCase):
         mock_data.return_value = {"DATA": "DICT"}
         mmcif = parse_string("returnstring", "path/to/file", data_dict=True)
         self.mock_type.assert_called_with("path/to/file", "returnstring")
-        mock_mmcif.assert_called_with("returnstring")
+        mock_mmcif.assert_called_with("returnstring", False)
         mock_data.assert_called_with({"MMCIF": "DICT"})
         self.assertEqual(mmcif, {"DATA": "DICT"})
 
@@ -237,10 +1301,33 @@ class StringParsingTests(TestCase):
         mock_mmcif.return_value = {"MMCIF": "DICT"}
         mmcif = parse_string("returnstring", "path/to/file", file_dict=True)
         self.mock_type.assert_called_with("path/to/file", "returnstring")
-        mock_mmcif.assert_called_with("returnstring")
+        mock_mmcif.assert_called_with("returnstring", False)
         self.assertEqual(mmcif, {"MMCIF": "DICT"})
 
 
+    @patch("atomium.files.utilities.pdb_string_to_pdb_dict")
+    @patch("atomium.files.utilities.pdb_dict_to_data_dict")
+    def test_can_parse_pdb_with_filters(self, mock_data, mock_pdb):
+        self.mock_type.return_value = "pdb"
+        parse_string("returnstring", "path/to/file", model=1, water=False)
+        mock_data.assert_called_with(mock_pdb.return_value, model=1, water=False)
+
+
+    @patch("atomium.files.utilities.mmcif_string_to_mmcif_dict")
+    @patch("atomium.files.utilities.mmcif_dict_to_data_dict")
+    def test_can_parse_mmcif_with_filters(self, mock_data, mock_mmcif):
+        self.mock_type.return_value = "cif"
+        parse_string("returnstring", "path/to/file", data_dict=True, chains=["A"])
+        mock_data.assert_called_with(mock_mmcif.return_value, chains=["A"])
+
+
+    @patch("atomium.files.utilities.mmcif_string_to_mmcif_dict")
+    def test_can_parse_mmcif_header(self, mock_mmcif):
+        self.mock_type.return_value = "cif"
+        parse_string("returnstring", "path/to/file", True, header_only=True)
+        mock_mmcif.assert_called_with("returnstring", True)
+
+
     @patch("atomium.files.utilities.xyz_string_to_xyz_dict")
     @patch("atomium.files.utilities.xyz_dict_to_data_dict")
     def test_can_parse_xyz(self, mock_data, mock_xyz):
@@ -269,6 +1356,110 @@ class StringParsingTests(TestCase):
         self.assertEqual(xyz, {"DATA": "DICT"})
 
 
+class BytesParsingTests(TestCase):
+
+    @patch("atomium.files.utilities.determine_file_type")
+    @patch("atomium.files.utilities.buffer_lines")
+    @patch("atomium.files.utilities.lines_to_file_dict")
+    @patch("atomium.files.utilities.convert_file_dict")
+    def test_can_parse_bytes(self, mock_convert, mock_dict, mock_lines, mock_type):
+        parsed = parse_bytes(b"ATOM", "path", 1, 2, True, water=False)
+        mock_type.assert_called_with("path", b"ATOM")
+        mock_lines.assert_called_with(b"ATOM")
+        mock_dict.assert_called_with(
+         mock_lines.return_value, mock_type.return_value, True
+        )
+        mock_convert.assert_called_with(
+         mock_dict.return_value, mock_type.return_value, 1, 2, water=False
+        )
+        self.assertIs(parsed, mock_convert.return_value)
+
+
+    def test_can_parse_pdb_bytes(self):
+        data = parse_bytes(b"HEADER    X\nATOM      1  N   VAL A  11       3.696"
+         b"  33.898  63.219  1.00 21.50           N\n", "", data_dict=True)
+        self.assertEqual(data["models"][0]["atoms"][0]["x"], 3.696)
+        self.assertEqual(data["models"][0]["chains"][0]["id"], "A")
+
+
+
+class StreamParsingTests(TestCase):
+
+    @patch("atomium.files.utilities.lines_to_file_dict")
+    @patch("atomium.files.utilities.convert_file_dict")
+    def test_can_parse_stream(self, mock_convert, mock_dict):
+        f = ["ATOM 1\n", "ATOM 2"]
+        parsed = parse_stream(f, "path/to/file.ent.gz", 1, 2, True, water=False)
+        self.assertEqual(list(mock_dict.call_args[0][0]), ["ATOM 1", "ATOM 2"])
+        self.assertEqual(mock_dict.call_args[0][1:], ("pdb", True))
+        mock_convert.assert_called_with(
+         mock_dict.return_value, "pdb", 1, 2, water=False
+        )
+        self.assertIs(parsed, mock_convert.return_value)
+
+
+    @patch("atomium.files.utilities.parse_string")
+    def test_can_parse_stream_of_unknown_type(self, mock_parse):
+        f = Mock()
+        parsed = parse_stream(f, "path/to/file", header_only=True, model=1)
+        mock_parse.assert_called_with(
+         f.read.return_value, "path/to/file", False, False, True, model=1
+        )
+        self.assertIs(parsed, mock_parse.return_value)
+
+
+
+class LinesToFileDictTests(TestCase):
+
+    @patch("atomium.files.utilities.pdb_lines_to_pdb_dict")
+    def test_can_parse_pdb_lines(self, mock_pdb):
+        d = lines_to_file_dict(["line"], "pdb", True)
+        mock_pdb.assert_called_with(["line"], True)
+        self.assertIs(d, mock_pdb.return_value)
+
+
+    @patch("atomium.files.utilities.mmcif_lines_to_mmcif_dict")
+    def test_can_parse_mmcif_lines(self, mock_mmcif):
+        d = lines_to_file_dict(["line"], "cif")
+        mock_mmcif.assert_called_with(["line"], False)
+        self.assertIs(d, mock_mmcif.return_value)
+
+
+    @patch("atomium.files.utilities.xyz_lines_to_xyz_dict")
+    def test_can_parse_xyz_lines(self, mock_xyz):
+        d = lines_to_file_dict(["line"], "xyz", True)
+        mock_xyz.assert_called_with(["line"])
+        self.assertIs(d, mock_xyz.return_value)
+
+
+
+class FileDictConvertingTests(TestCase):
+
+    @patch("atomium.files.utilities.pdb_dict_to_data_dict")
+    @patch("atomium.files.utilities.data_dict_to_file")
+    def test_can_convert_pdb_dict_to_file(self, mock_file, mock_data):
+        f = convert_file_dict({"PDB": "DICT"}, "pdb", chains=["A"])
+        mock_data.assert_called_with({"PDB": "DICT"}, chains=["A"])
+        mock_file.assert_called_with(mock_data.return_value)
+        self.assertIs(f, mock_file.return_value)
+        self.assertEqual(f._filetype, "pdb")
+
+
+    @patch("atomium.files.utilities.mmcif_dict_to_data_dict")
+    def test_can_convert_mmcif_dict_to_data_dict(self, mock_data):
+        d = convert_file_dict({"CIF": "DICT"}, "cif", data_dict=True)
+        mock_data.assert_called_with({"CIF": "DICT"})
+        self.assertIs(d, mock_data.return_value)
+
+
+    def test_can_keep_file_dict(self):
+        self.assertEqual(
+         convert_file_dict({"XYZ": "DICT"}, "xyz", file_dict=True),
+         {"XYZ": "DICT"}
+        )
+
+
+
 @patch("atomium.files.utilities.xyz_string_to_xyz_dict")
 def test_can_parse_xyz_dfile_dict(self, mock_xyz):
     self.mock_type.return_value = "xyz"
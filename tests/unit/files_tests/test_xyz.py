@@ -2,6 +2,7 @@ from copy import deepcopy
 from unittest import TestCase
 from unittest.mock import Mock, patch, PropertyMock, MagicMock
 from atomium.files.xyz import *
+from atomium.files.data import MODEL_DICT, ATOM_DICT
 
 class XyzStringToXyzDictTests(TestCase):
 
@@ -34,6 +35,13 @@ class XyzStringToXyzDictTests(TestCase):
         })
 
 
+    def test_can_turn_xyz_lines_to_xyz_dict(self):
+        self.lines.insert(0, "11")
+        self.assertEqual(xyz_lines_to_xyz_dict(iter(self.lines)), {
+         "header_lines": ["11"], "atom_lines": self.lines[2:]
+        })
+
+
 
 class XyzDictToDataDictTests(TestCase):
 
@@ -1,6 +1,11 @@
 from unittest import TestCase
 from unittest.mock import patch, Mock, PropertyMock
-from atomium.models.structures import AtomStructure
+import numpy as np
+from atomium.models.structures import AtomStructure, gather_locations
+from atomium.models.structures import scatter_locations, packed_model
+from atomium.models.structures import round_locations
+from atomium.models.structures import register_atoms, set_atoms_structure
+from atomium.models.structures import count_child, atom_structures
 from atomium.models.atoms import Atom
 
 class AtomStructureTest(TestCase):
@@ -11,6 +16,8 @@ class AtomStructureTest(TestCase):
         self.atom3 = Mock(Atom, mass=4, element="C", name="NY")
         self.atom1.id, self.atom2.id, self.atom3.id = 500, 500, 700
         self.atoms = [self.atom1, self.atom2, self.atom3]
+        for atom in self.atoms:
+            atom._ligand, atom._residue, atom._chain, atom._model = [None] * 4
 
 
 
@@ -32,6 +39,23 @@ class AtomStructureCreationTests(AtomStructureTest):
         })
 
 
+    def test_can_initialise_atom_structure(self):
+        structure = AtomStructure.__new__(AtomStructure)
+        structure._initialise(self.atoms, 10, "ABC")
+        self.assertEqual(structure._atoms, set(self.atoms))
+        self.assertEqual(structure._id_atoms, {
+         500: {self.atom1, self.atom2}, 700: {self.atom3}
+        })
+        self.assertEqual(structure._children, {
+         "ligand": {}, "residue": {}, "chain": {}, "model": {}
+        })
+        self.assertEqual(structure._indexes, {})
+        self.assertTrue(structure._registered)
+        self.assertEqual(structure._id, "10")
+        self.assertEqual(structure._name, "ABC")
+        for atom in self.atoms: self.assertIsNone(atom._model)
+
+
     def test_atom_structure_will_accept_atom_structures(self):
         structure = Mock(AtomStructure)
         structure._atoms = set(self.atoms[1:])
@@ -62,6 +86,15 @@ class AtomStructureCreationTests(AtomStructureTest):
         finally: AtomStructure.__name__ = "AtomStructure"
 
 
+    def test_atom_structure_registers_children(self):
+        self.atom1._chain, self.atom2._chain, self.atom3._residue = 1, 1, 2
+        structure = AtomStructure(*self.atoms)
+        self.assertEqual(structure._children, {
+         "ligand": {}, "residue": {2: 1}, "chain": {1: 2}, "model": {}
+        })
+        self.assertEqual(structure._indexes, {})
+
+
     def test_can_create_structure_with_id(self):
         structure = AtomStructure(id=100)
         self.assertEqual(structure._id, "100")
@@ -306,6 +339,68 @@ class AtomStructureGettingTests(AtomStructureTest):
 
 
 
+    def test_can_get_objects_from_registry(self):
+        try:
+            AtomStructure.__name__ = "Model"
+            structure = AtomStructure(self.atom1, self.atom2, self.atom3)
+            structure._children["chain"] = {10: 2, 11: 1}
+            self.atom1._chain = 12
+            self.assertEqual(structure._get("chain"), {10, 11})
+        finally: AtomStructure.__name__ = "AtomStructure"
+
+
+    def test_unregistered_structures_look_at_atoms(self):
+        try:
+            AtomStructure.__name__ = "Model"
+            structure = AtomStructure(self.atom1, self.atom2, self.atom3)
+            structure._children["chain"] = {10: 2, 11: 1}
+            self.atom1._chain, self.atom2._chain, self.atom3._chain = 12, 12, 13
+            structure._registered = False
+            self.assertEqual(structure._get("chain"), {12, 13})
+        finally: AtomStructure.__name__ = "AtomStructure"
+
+
+    def test_can_get_objects_by_id_from_index(self):
+        objects = [Mock(_id="AAA"), Mock(_id="BBB"), Mock(_id="AAA")]
+        try:
+            AtomStructure.__name__ = "Model"
+            structure = AtomStructure()
+            structure._children["chain"] = {o: 1 for o in objects}
+            self.assertEqual(structure._get("chain", id="AAA"), {
+             objects[0], objects[2]
+            })
+            self.assertEqual(structure._indexes, {"chain": {"_id": {
+             "AAA": [objects[0], objects[2]], "BBB": [objects[1]]
+            }}})
+        finally: AtomStructure.__name__ = "AtomStructure"
+
+
+    def test_can_get_objects_by_name_from_index(self):
+        objects = [Mock(_name="AAA"), Mock(_name="BBB"), Mock(_name="CCC")]
+        try:
+            AtomStructure.__name__ = "Model"
+            structure = AtomStructure()
+            structure._children["residue"] = {o: 1 for o in objects}
+            self.assertEqual(structure._get("residue", name="BBB"), {objects[1]})
+            self.assertEqual(structure._indexes, {"residue": {"_name": {
+             "AAA": [objects[0]], "BBB": [objects[1]], "CCC": [objects[2]]
+            }}})
+            self.assertEqual(structure._get("residue", name="DDD"), set())
+        finally: AtomStructure.__name__ = "AtomStructure"
+
+
+    def test_can_get_objects_by_water_status_from_index(self):
+        objects = [Mock(_name="HOH"), Mock(_name="BBB"), Mock(_name="WAT")]
+        try:
+            AtomStructure.__name__ = "Model"
+            structure = AtomStructure()
+            structure._children["ligand"] = {o: 1 for o in objects}
+            self.assertEqual(structure._get("ligand"), set(objects))
+            self.assertEqual(structure._get("ligand", water=False), {objects[1]})
+            self.assertEqual(structure._get("ligand", water=True), set(objects))
+        finally: AtomStructure.__name__ = "AtomStructure"
+
+
 class AtomStructureIdTests(AtomStructureTest):
 
     def test_structure_id_property(self):
@@ -327,45 +422,311 @@ class AtomStructureNameTests(AtomStructureTest):
         self.assertEqual(structure._name, "HIS")
 
 
+    def test_updating_name_discards_indexes(self):
+        try:
+            AtomStructure.__name__ = "Residue"
+            structure = AtomStructure(self.atom1, self.atom2, name="VAL")
+            chain = AtomStructure()
+            chain._indexes = {"residue": {}, "chain": {}}
+            self.atom1._chain = chain
+            structure._indexes = {"residue": {}}
+            structure.name = "HIS"
+            self.assertEqual(structure._name, "HIS")
+            self.assertEqual(structure._indexes, {})
+            self.assertEqual(chain._indexes, {"chain": {}})
+        finally: AtomStructure.__name__ = "AtomStructure"
+
+
+
+class AtomRegisteringTests(AtomStructureTest):
+
+    @patch("atomium.models.structures.count_child")
+    def test_can_register_atoms(self, mock_count):
+        self.atom1._chain, self.atom2._chain, self.atom3._chain = 1, 1, 2
+        self.atom1._residue, self.atom2._residue = 3, 4
+        register_atoms("S", self.atoms, -1)
+        mock_count.assert_any_call("S", "chain", 1, -2)
+        mock_count.assert_any_call("S", "chain", 2, -1)
+        mock_count.assert_any_call("S", "residue", 3, -1)
+        mock_count.assert_any_call("S", "residue", 4, -1)
+        self.assertEqual(mock_count.call_count, 4)
+
+
+
+class AtomsStructureSettingTests(AtomStructureTest):
+
+    def setUp(self):
+        AtomStructureTest.setUp(self)
+        self.old, self.model = Mock(AtomStructure), Mock(AtomStructure)
+        self.new = Mock(AtomStructure)
+        self.old._atoms, self.new._atoms = set(), set()
+        self.old._registered = self.new._registered = True
+        for atom in self.atoms[:2]:
+            atom._residue, atom._model = self.old, self.model
+        self.atom3._residue = self.new
+
+
+    @patch("atomium.models.structures.count_child")
+    def test_can_move_atoms_to_structure(self, mock_count):
+        set_atoms_structure(self.atoms, "residue", self.new)
+        for atom in self.atoms: self.assertIs(atom._residue, self.new)
+        for container in (self.old, self.model, self.new):
+            mock_count.assert_any_call(container, "residue", self.old, -2)
+            mock_count.assert_any_call(container, "residue", self.new, 2)
+        self.assertEqual(mock_count.call_count, 6)
+
+
+    @patch("atomium.models.structures.count_child")
+    def test_can_remove_atoms_from_structure(self, mock_count):
+        set_atoms_structure(self.atoms[:2], "residue", None)
+        for atom in self.atoms[:2]: self.assertIsNone(atom._residue)
+        mock_count.assert_any_call(self.old, "residue", self.old, -2)
+        mock_count.assert_any_call(self.model, "residue", self.old, -2)
+        self.assertEqual(mock_count.call_count, 2)
+        self.assertTrue(self.old._registered)
+
+
+    @patch("atomium.models.structures.count_child")
+    def test_structures_still_holding_atoms_stop_trusting_registry(self, mock_count):
+        self.old._atoms = {self.atom1}
+        set_atoms_structure(self.atoms, "residue", self.new)
+        self.assertFalse(self.old._registered)
+        self.assertTrue(self.new._registered)
+
+
+
+class ChildCountingTests(TestCase):
+
+    def setUp(self):
+        self.structure = Mock(_children={"chain": {"A": 2}})
+        self.structure._indexes = {"chain": {}, "model": {}}
+
+
+    def test_can_increase_child_count(self):
+        count_child(self.structure, "chain", "A", 3)
+        self.assertEqual(self.structure._children, {"chain": {"A": 5}})
+        self.assertEqual(self.structure._indexes, {"chain": {}, "model": {}})
+
+
+    def test_can_add_child(self):
+        count_child(self.structure, "chain", "B", 3)
+        self.assertEqual(self.structure._children, {"chain": {"A": 2, "B": 3}})
+        self.assertEqual(self.structure._indexes, {"model": {}})
+
+
+    def test_can_decrease_child_count(self):
+        count_child(self.structure, "chain", "A", -1)
+        self.assertEqual(self.structure._children, {"chain": {"A": 1}})
+        self.assertEqual(self.structure._indexes, {"chain": {}, "model": {}})
+
+
+    def test_can_remove_child(self):
+        count_child(self.structure, "chain", "A", -2)
+        self.assertEqual(self.structure._children, {"chain": {}})
+        self.assertEqual(self.structure._indexes, {"model": {}})
+
+
+
+class AtomStructuresTests(AtomStructureTest):
+
+    def test_can_get_structures_of_atoms(self):
+        self.atom1._chain, self.atom2._chain, self.atom3._residue = 1, 1, 2
+        self.atom2._model = 3
+        self.assertEqual(atom_structures(self.atoms), {1, 2, 3})
+        self.assertEqual(atom_structures([]), set())
+
 
 class AtomStructureTrimmingTests(AtomStructureTest):
 
-    def test_can_trim_structure(self):
+    @patch("atomium.models.structures.scatter_locations")
+    @patch("atomium.models.structures.gather_locations")
+    def test_can_trim_structure(self, mock_gather, mock_scatter):
+        mock_gather.return_value = ("ATOMS", "LOCATIONS")
         structure = AtomStructure(self.atom1, self.atom2, self.atom3)
         structure.trim(108)
-        self.atom1.trim.assert_called_with(108)
-        self.atom2.trim.assert_called_with(108)
-        self.atom3.trim.assert_called_with(108)
+        mock_gather.assert_called_with(structure._atoms)
+        mock_scatter.assert_called_with("ATOMS", "LOCATIONS", 108)
+
+
+    @patch("atomium.models.structures.scatter_locations")
+    @patch("atomium.models.structures.gather_locations")
+    def test_can_not_trim_structure(self, mock_gather, mock_scatter):
+        structure = AtomStructure(self.atom1, self.atom2, self.atom3)
+        structure.trim(None)
+        self.assertFalse(mock_gather.called)
+        self.assertFalse(mock_scatter.called)
 
 
 
 class AtomStructureTranslationTests(AtomStructureTest):
 
+    def setUp(self):
+        AtomStructureTest.setUp(self)
+        self.patch1 = patch("atomium.models.structures.gather_locations")
+        self.patch2 = patch("atomium.models.structures.scatter_locations")
+        self.mock_gather = self.patch1.start()
+        self.mock_scatter = self.patch2.start()
+        self.locations = np.array([[1, 2, 3], [4, 5, 6], [7, 8, 9]], dtype=float)
+        self.mock_gather.return_value = (self.atoms, self.locations)
+
+
+    def tearDown(self):
+        self.patch1.stop()
+        self.patch2.stop()
+
+
     def test_structure_translation(self):
         structure = AtomStructure(self.atom1, self.atom2, self.atom3)
-        structure.translate(5, 4, -2, a=1, b=2)
-        for atom in self.atoms:
-            atom.translate.assert_called_with(5, 4, -2, a=1, b=2)
+        structure.translate(5, 4, -2)
+        self.mock_gather.assert_called_with(structure._atoms)
+        atoms, locations, trim = self.mock_scatter.call_args[0]
+        self.assertIs(atoms, self.atoms)
+        self.assertEqual(locations.tolist(), [[6, 6, 1], [9, 9, 4], [12, 12, 7]])
+        self.assertEqual(trim, 12)
 
 
+    def test_structure_translation_with_vector_and_trim(self):
+        structure = AtomStructure(self.atom1, self.atom2, self.atom3)
+        structure.translate((5, 4, -2), trim=None)
+        atoms, locations, trim = self.mock_scatter.call_args[0]
+        self.assertEqual(locations.tolist(), [[6, 6, 1], [9, 9, 4], [12, 12, 7]])
+        self.assertIsNone(trim)
+
 
-class AtomStructureTransformationTests(AtomStructureTest):
+
+class AtomStructureTransformationTests(AtomStructureTranslationTests):
 
     def test_structure_transformation(self):
         structure = AtomStructure(self.atom1, self.atom2, self.atom3)
-        structure.transform(5, 4, -2, a=1, b=2)
-        for atom in self.atoms:
-            atom.transform.assert_called_with(5, 4, -2, a=1, b=2)
+        structure.transform([[0, -1, 0], [1, 0, 0], [0, 0, 2]], trim=3)
+        self.mock_gather.assert_called_with(structure._atoms)
+        atoms, locations, trim = self.mock_scatter.call_args[0]
+        self.assertIs(atoms, self.atoms)
+        self.assertEqual(locations.tolist(), [[-2, 1, 6], [-5, 4, 12], [-8, 7, 18]])
+        self.assertEqual(trim, 3)
 
 
 
 class AtomStructureRotationTests(AtomStructureTest):
 
-    def test_structure_rotation(self):
+    @patch("atomium.models.structures.AtomStructure.transform")
+    @patch("atomium.models.structures.rotation_matrix")
+    def test_structure_rotation(self, mock_matrix, mock_transform):
         structure = AtomStructure(self.atom1, self.atom2, self.atom3)
-        structure.rotate(5, 4, -2, a=1, b=2)
-        for atom in self.atoms:
-            atom.rotate.assert_called_with(5, 4, -2, a=1, b=2)
+        structure.rotate(5, "x", -2, a=1)
+        mock_matrix.assert_called_with(5, "x")
+        mock_transform.assert_called_with(mock_matrix.return_value, -2, a=1)
+
+
+
+class LocationGatheringTests(TestCase):
+
+    def test_can_gather_atom_locations(self):
+        atoms = [Atom("C", 1, 2, 3), Atom("C", 4, 5, 6)]
+        gathered, locations = gather_locations(atoms)
+        self.assertEqual(gathered, atoms)
+        self.assertEqual(locations.tolist(), [[1, 2, 3], [4, 5, 6]])
+
+
+    def test_integer_locations_stay_integers(self):
+        atoms = [Atom("C", 1, 2, 3), Atom("C", 4, 5, 6)]
+        gathered, locations = gather_locations(atoms)
+        self.assertEqual(locations.dtype.kind, "i")
+        atoms[1].move_to(4.5, 5, 6)
+        gathered, locations = gather_locations(atoms)
+        self.assertEqual(locations.dtype.kind, "f")
+
+
+    def test_can_gather_no_locations(self):
+        atoms, locations = gather_locations(set())
+        self.assertEqual(atoms, [])
+        self.assertEqual(locations.shape, (0, 3))
+
+
+    def test_can_gather_packed_locations(self):
+        model = Mock(_coordinates=np.array([[1, 2, 3], [4, 5, 6], [7, 8, 9]]))
+        atoms = [Mock(_row=2, _model=model), Mock(_row=0, _model=model)]
+        gathered, locations = gather_locations(atoms)
+        self.assertEqual(locations.tolist(), [[7, 8, 9], [1, 2, 3]])
+
+
+
+class LocationScatteringTests(TestCase):
+
+    def test_can_scatter_atom_locations(self):
+        atoms = [Atom("C", 1, 2, 3), Atom("C", 4, 5, 6)]
+        scatter_locations(atoms, np.array([[1.23, 2, 3], [7, 8, 9]]), 1)
+        self.assertEqual(atoms[0].location, (1.2, 2, 3))
+        self.assertEqual(atoms[1].location, (7, 8, 9))
+        scatter_locations(atoms, np.array([[1.23, 2, 3], [7, 8, 9]]))
+        self.assertEqual(atoms[0].location, (1.23, 2, 3))
+
+
+    def test_scattered_locations_match_atom_trim(self):
+        atoms = [Atom("C", 1, 2, 3), Atom("C", 1, 2, 3)]
+        scatter_locations(atoms[:1], np.array([[2.675, 2, 3]]), 2)
+        atoms[1].move_to(2.675, 2, 3)
+        atoms[1].trim(2)
+        self.assertEqual(atoms[0].location, atoms[1].location)
+        self.assertEqual(atoms[0].location, (2.67, 2, 3))
+
+
+    def test_integer_locations_stay_integers(self):
+        atoms = [Atom("C", 1, 2, 3)]
+        scatter_locations(atoms, np.array([[4, 5, 6]]), 12)
+        self.assertTrue(all(isinstance(v, int) for v in atoms[0].location))
+
+
+    def test_can_scatter_packed_locations(self):
+        model = Mock(_coordinates=np.zeros((3, 3)), _spatial_index="INDEX")
+        atoms = [Mock(_row=2, _model=model), Mock(_row=0, _model=model)]
+        scatter_locations(atoms, np.array([[1.23, 2, 3], [7, 8, 9]]), 1)
+        self.assertEqual(
+         model._coordinates.tolist(), [[7, 8, 9], [0, 0, 0], [1.2, 2, 3]]
+        )
+        self.assertIsNone(model._spatial_index)
+
+
+
+class LocationRoundingTests(TestCase):
+
+    def test_can_leave_locations_unrounded(self):
+        self.assertEqual(
+         round_locations(np.array([[1.23, 2, 3]])), [[1.23, 2, 3]]
+        )
+
+
+    def test_locations_are_rounded_like_python(self):
+        locations = round_locations(np.array([[2.675, 1.005, -0.125]]), 2)
+        self.assertEqual(locations, [[2.67, 1.0, -0.12]])
+        self.assertEqual(locations, [[round(2.675, 2), round(1.005, 2), -0.12]])
+
+
+    def test_integers_are_kept(self):
+        locations = round_locations(np.array([[1, 2, 3]]), 2)
+        self.assertEqual(locations, [[1, 2, 3]])
+        self.assertTrue(all(isinstance(v, int) for v in locations[0]))
+
+
+
+class PackedModelTests(TestCase):
+
+    def test_can_detect_packed_model(self):
+        model = Mock()
+        atoms = [Mock(_row=2, _model=model), Mock(_row=0, _model=model)]
+        self.assertIs(packed_model(atoms), model)
+
+
+    def test_unpacked_atoms_have_no_packed_model(self):
+        model = Mock()
+        self.assertIsNone(packed_model([]))
+        self.assertIsNone(packed_model([Mock(_row=None, _model=model)]))
+        self.assertIsNone(packed_model(
+         [Mock(_row=2, _model=model), Mock(_row=None, _model=model)]
+        ))
+        self.assertIsNone(packed_model(
+         [Mock(_row=2, _model=model), Mock(_row=1, _model=Mock())]
+        ))
 
 
 
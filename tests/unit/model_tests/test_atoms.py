@@ -1,7 +1,7 @@
 import math
 from unittest import TestCase
 from unittest.mock import patch, Mock, PropertyMock
-from atomium.models.atoms import Atom
+from atomium.models.atoms import Atom, ZERO_ANISOTROPY
 
 class AtomCreationTests(TestCase):
 
@@ -13,8 +13,8 @@ class AtomCreationTests(TestCase):
         self.assertEqual(atom._name, None)
         self.assertEqual(atom._charge, 0)
         self.assertEqual(atom._bfactor, 0)
-        self.assertEqual(atom._anisotropy, [0, 0, 0, 0, 0, 0])
-        self.assertEqual(atom._bonded_atoms, set())
+        self.assertIs(atom._anisotropy, ZERO_ANISOTROPY)
+        self.assertEqual(atom._bonded_atoms, None)
         self.assertEqual(atom._residue, None)
         self.assertEqual(atom._ligand, None)
         self.assertEqual(atom._chain, None)
@@ -46,6 +46,18 @@ class AtomCreationTests(TestCase):
         self.assertEqual(atom._bfactor, 1.1)
 
 
+    def test_atom_strings_are_interned(self):
+        atom = Atom("".join(["C", "L"]), name="".join(["C", "L", "1"]))
+        atom2 = Atom("".join(["C", "L"]), name="".join(["C", "L", "1"]))
+        self.assertIs(atom._element, atom2._element)
+        self.assertIs(atom._name, atom2._name)
+
+
+    def test_atom_has_no_dict(self):
+        with self.assertRaises(AttributeError):
+            Atom("C").__dict__
+
+
     def test_can_create_atom_with_anisotropy(self):
         atom = Atom("C", anisotropy=[2, 5, 3, 2, 5, 6])
         self.assertEqual(atom._anisotropy, [2, 5, 3, 2, 5, 6])
@@ -191,6 +203,30 @@ class AtomAnisotropyTests(TestCase):
         self.assertIs(atom._anisotropy, atom.anisotropy)
 
 
+    def test_zero_anisotropy_property(self):
+        atom = Atom("C", anisotropy=[0, 0, 0, 0, 0.0, 0])
+        self.assertIs(atom._anisotropy, ZERO_ANISOTROPY)
+        self.assertEqual(atom.anisotropy, [0, 0, 0, 0, 0, 0])
+        self.assertIs(atom._anisotropy, atom.anisotropy)
+        self.assertEqual(ZERO_ANISOTROPY, (0, 0, 0, 0, 0, 0))
+
+
+    def test_zero_anisotropy_can_be_changed_in_place(self):
+        atoms = [Atom("C"), Atom("C")]
+        atoms[0].anisotropy[0] = 1
+        self.assertEqual(atoms[0].anisotropy, [1, 0, 0, 0, 0, 0])
+        self.assertEqual(atoms[1].anisotropy, [0, 0, 0, 0, 0, 0])
+        self.assertEqual(ZERO_ANISOTROPY, (0, 0, 0, 0, 0, 0))
+
+
+    def test_can_update_anisotropy(self):
+        atom = Atom("C")
+        atom.anisotropy = (1, 2, 3, 4, 5, 6)
+        self.assertEqual(atom._anisotropy, [1, 2, 3, 4, 5, 6])
+        atom.anisotropy = [0] * 6
+        self.assertIs(atom._anisotropy, ZERO_ANISOTROPY)
+
+
 
 class AtomLocationTests(TestCase):
 
@@ -200,6 +236,34 @@ class AtomLocationTests(TestCase):
 
 
 
+class AtomMovedTests(TestCase):
+
+    def test_moving_atom_discards_model_spatial_index(self):
+        atom = Atom("C", 20, 30, 50)
+        atom._model = Mock(_spatial_index="INDEX")
+        atom._moved()
+        self.assertIsNone(atom._model._spatial_index)
+
+
+    def test_moving_atom_with_no_model(self):
+        atom = Atom("C", 20, 30, 50)
+        atom._moved()
+
+
+    @patch("atomium.models.atoms.Atom._moved")
+    def test_coordinate_changes_report_movement(self, mock_moved):
+        atom = Atom("C", 20, 30, 50)
+        atom.x, atom.y, atom.z = 1, 2, 3
+        self.assertEqual(mock_moved.call_count, 3)
+        atom.move_to(4, 5, 6)
+        self.assertEqual(mock_moved.call_count, 4)
+        atom.trim(None)
+        self.assertEqual(mock_moved.call_count, 4)
+        atom.trim(2)
+        self.assertEqual(mock_moved.call_count, 5)
+
+
+
 class AtomTrimmingTests(TestCase):
 
     def test_can_not_round_atom_location(self):
@@ -440,6 +504,11 @@ class AtomBondedAtomTests(TestCase):
         self.assertEqual(atom.bonded_atoms, {1, 2, 3})
 
 
+    def test_bonded_atoms_property_with_no_bonds(self):
+        atom = Atom("C", 2, 3, 5)
+        self.assertEqual(atom.bonded_atoms, set())
+
+
 
 class AtomBondingTests(TestCase):
 
@@ -451,6 +520,13 @@ class AtomBondingTests(TestCase):
         self.assertEqual(atom2._bonded_atoms, {atom})
 
 
+    def test_bonding_creates_bond_sets(self):
+        atom, atom2 = Atom("C"), Atom("C")
+        atom.bond_to(atom2)
+        self.assertEqual(atom._bonded_atoms, {atom2})
+        self.assertEqual(atom2._bonded_atoms, {atom})
+
+
 
 class AtomUnbondingTests(TestCase):
 
@@ -467,7 +543,7 @@ class AtomUnbondingTests(TestCase):
         atom = Atom("C")
         atom2 = Mock(_bonded_atoms=set())
         atom.unbond_from(atom2)
-        self.assertEqual(atom._bonded_atoms, set())
+        self.assertEqual(atom._bonded_atoms, None)
         self.assertEqual(atom2._bonded_atoms, set())
 
 
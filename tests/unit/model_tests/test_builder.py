@@ -0,0 +1,199 @@
+from unittest import TestCase
+from unittest.mock import patch, Mock
+from collections import OrderedDict
+from atomium.models.builder import ModelBuilder, new_structure, share_atoms
+from atomium.models.atoms import Atom
+from atomium.models.molecules import Model, Chain, Residue, Ligand
+
+class ModelBuilderCreationTests(TestCase):
+
+    def test_can_create_builder(self):
+        builder = ModelBuilder()
+        self.assertEqual(builder._atoms, [])
+        self.assertEqual(builder._chains, {})
+        self.assertEqual(builder._hets, {})
+        self.assertIsInstance(builder._chains, OrderedDict)
+        self.assertIsInstance(builder._hets, OrderedDict)
+
+
+    def test_builder_repr(self):
+        builder = ModelBuilder()
+        self.assertEqual(repr(builder), "<ModelBuilder (0 atoms)>")
+        builder._atoms = [1]
+        self.assertEqual(repr(builder), "<ModelBuilder (1 atom)>")
+
+
+
+class ChainAddingTests(TestCase):
+
+    def test_can_add_chain(self):
+        builder = ModelBuilder()
+        builder.add_chain("A", rep="MV")
+        builder.add_chain(None)
+        self.assertEqual(builder._chains, {"A": ["MV", []], None: ["", []]})
+
+
+    def test_can_update_chain_rep(self):
+        builder = ModelBuilder()
+        builder._chains["A"] = ["", [1]]
+        builder.add_chain("A", rep="MV")
+        self.assertEqual(builder._chains, {"A": ["MV", [1]]})
+
+
+
+class AtomAddingTests(TestCase):
+
+    def setUp(self):
+        self.builder = ModelBuilder()
+        self.atoms = [Mock(
+         _model=None, _chain=None, _residue=None, _ligand=None
+        ) for _ in range(5)]
+
+
+    def test_can_add_atoms(self):
+        self.builder.add_atom(self.atoms[0])
+        self.builder.add_atom(self.atoms[1], "A")
+        self.builder.add_atom(self.atoms[2], "A", "A1", "VAL")
+        self.builder.add_atom(self.atoms[3], "A", "A1", "XXX", False)
+        self.builder.add_atom(self.atoms[4], None, "A2", "HOH", False)
+        self.assertEqual(self.builder._atoms, self.atoms)
+        self.assertEqual(self.builder._chains, {"A": ["", [self.atoms[1]]]})
+        self.assertEqual(self.builder._hets, {
+         ("A", "A1"): [True, "VAL", self.atoms[2:4]],
+         (None, "A2"): [False, "HOH", [self.atoms[4]]]
+        })
+
+
+    def test_can_add_atoms_to_chain_with_no_id(self):
+        self.builder.add_chain(None)
+        self.builder.add_atom(self.atoms[0])
+        self.assertEqual(self.builder._chains, {None: ["", [self.atoms[0]]]})
+
+
+    def test_cannot_add_atom_in_structure(self):
+        for attribute in ("_model", "_chain", "_residue", "_ligand"):
+            atom = Mock(_model=None, _chain=None, _residue=None, _ligand=None)
+            setattr(atom, attribute, Mock())
+            with self.assertRaises(ValueError):
+                self.builder.add_atom(atom)
+        self.assertEqual(self.builder._atoms, [])
+
+
+
+class BuildingTests(TestCase):
+
+    def setUp(self):
+        self.atoms = [Atom("C", n, 0, 0, id=n, name="CA") for n in range(8)]
+        self.builder = ModelBuilder()
+        self.builder.add_chain("B", rep="XV")
+        self.builder.add_atom(self.atoms[0], "A", "A1", "VAL")
+        self.builder.add_atom(self.atoms[1], "A", "A1", "VAL")
+        self.builder.add_atom(self.atoms[2], "A", "A100", "XMP", False)
+        self.builder.add_atom(self.atoms[3], "A", "A2", "TYR")
+        self.builder.add_atom(self.atoms[4], "B", "B1", "VAL")
+        self.builder.add_atom(self.atoms[5], "B")
+        self.builder.add_atom(self.atoms[6], None, "W1", "HOH", False)
+        self.builder.add_atom(self.atoms[7])
+
+
+    def test_can_build_model(self):
+        model = self.builder.build()
+        self.assertIsInstance(model, Model)
+        self.assertEqual(model.atoms(), set(self.atoms))
+        self.assertEqual(len(model.chains()), 2)
+        self.assertEqual(len(model.residues()), 3)
+        self.assertEqual(len(model.ligands()), 2)
+        chain_a, chain_b = model.chain("A"), model.chain("B")
+        self.assertEqual(chain_a.atoms(), set(self.atoms[:4]))
+        self.assertEqual(chain_b.atoms(), set(self.atoms[4:6]))
+        self.assertEqual(chain_a.rep_sequence, "")
+        self.assertEqual(chain_b.rep_sequence, "XV")
+        self.assertEqual([r.id for r in chain_a], ["A1", "A2"])
+        self.assertEqual(chain_a.sequence, "VY")
+        res1, res2 = chain_a.residues()
+        self.assertIs(res1.next, res2)
+        self.assertIsNone(res1.previous)
+        self.assertIsNone(model.residue("B1").previous)
+        self.assertEqual(res1.name, "VAL")
+        self.assertEqual(res1.atoms(), set(self.atoms[:2]))
+        self.assertIs(self.atoms[0].residue, res1)
+        self.assertIs(self.atoms[0].chain, chain_a)
+        self.assertIs(self.atoms[0].model, model)
+        water = model.ligand("W1")
+        self.assertIsNone(water.chain)
+        self.assertIs(water.model, model)
+        self.assertEqual(model.ligands(water=False), {model.ligand("A100")})
+        self.assertIsNone(self.atoms[7].chain)
+        self.assertIs(self.atoms[7].model, model)
+        self.assertIs(model.atom(3), self.atoms[3])
+
+
+    def test_built_model_matches_created_model(self):
+        model = self.builder.build()
+        atoms = [atom.copy() for atom in self.atoms]
+        created = Model(*atoms)
+        res1 = Residue(*atoms[:2], id="A1", name="VAL")
+        res2 = Residue(atoms[3], id="A2", name="TYR")
+        res3 = Residue(atoms[4], id="B1", name="VAL")
+        res1.next = res2
+        Chain(res1, res2, Ligand(atoms[2], id="A100", name="XMP"), id="A")
+        Chain(res3, atoms[5], id="B", rep="XV")
+        Ligand(atoms[6], id="W1", name="HOH")
+        structures = lambda m: sorted(
+         [m, *m.chains(), *m.residues(), *m.ligands()],
+         key=lambda s: (s.__class__.__name__, s.id or "")
+        )
+        describe = lambda s: (s.__class__.__name__, s.id, s.name)
+        for built, made in zip(structures(model), structures(created)):
+            self.assertEqual(describe(built), describe(made))
+            self.assertEqual(set(built.__dict__), set(made.__dict__))
+            self.assertEqual(
+             {k: len(v) for k, v in built._id_atoms.items()},
+             {k: len(v) for k, v in made._id_atoms.items()}
+            )
+            for name in built._children:
+                self.assertEqual(
+                 sorted((describe(s), n) for s, n in built._children[name].items()),
+                 sorted((describe(s), n) for s, n in made._children[name].items())
+                )
+
+
+
+class StructureCreationTests(TestCase):
+
+    def test_can_create_structure(self):
+        atoms = [Mock(id=1), Mock(id=2), Mock(id=1)]
+        chain = new_structure(Chain, atoms, 10, "A")
+        self.assertIsInstance(chain, Chain)
+        self.assertEqual(chain._atoms, set(atoms))
+        self.assertEqual(chain._id_atoms, {1: {atoms[0], atoms[2]}, 2: {atoms[1]}})
+        self.assertEqual(chain._children, {
+         "ligand": {}, "residue": {}, "chain": {}, "model": {}
+        })
+        self.assertEqual(chain._indexes, {})
+        self.assertEqual(chain._id, "10")
+        self.assertEqual(chain._name, "A")
+        for atom in atoms: self.assertIsInstance(atom._chain, Mock)
+
+
+    def test_can_create_structure_without_id_or_name(self):
+        model = new_structure(Model, [])
+        self.assertIsNone(model._id)
+        self.assertIsNone(model._name)
+
+
+
+class AtomSharingTests(TestCase):
+
+    def test_can_share_atoms(self):
+        chain = new_structure(Chain, [])
+        model = new_structure(Model, [])
+        share_atoms(chain, model, 5)
+        self.assertEqual(chain._children["model"], {model: 5})
+        self.assertEqual(model._children["chain"], {chain: 5})
+
+
+    def test_can_share_atoms_with_self(self):
+        chain = new_structure(Chain, [])
+        share_atoms(chain, chain, 5)
+        self.assertEqual(chain._children["chain"], {chain: 5})
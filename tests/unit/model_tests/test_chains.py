@@ -1,6 +1,7 @@
 from unittest import TestCase
 from unittest.mock import patch, Mock, PropertyMock
-from atomium.models.molecules import Chain
+from atomium.models.molecules import Chain, Residue
+from atomium.models.molecules import order_residues, invalidate_residue_order
 from atomium.models.structures import AtomStructure
 from atomium.models.exceptions import SequenceConnectivityError
 
@@ -26,6 +27,15 @@ class ChainCreationTests(TestCase):
         self.assertEqual(chain._rep_sequence, "ABC")
 
 
+    @patch("atomium.models.structures.AtomStructure._initialise")
+    def test_can_initialise_chain(self, mock_init):
+        chain = Chain.__new__(Chain)
+        chain._initialise(["a"], "A")
+        mock_init.assert_called_with(chain, ["a"], "A")
+        self.assertEqual(chain._rep_sequence, "")
+        self.assertIsNone(chain._residues)
+
+
 
 class ChainMembershipPropertiesTests(TestCase):
 
@@ -59,6 +69,119 @@ class ChainIndexingTests(TestCase):
 
 
 
+class ChainIterationTests(TestCase):
+
+    @patch("atomium.models.molecules.Chain.residues")
+    def test_can_iterate_chain(self, mock_residues):
+        chain = Chain()
+        mock_residues.return_value = (1, 2, 4)
+        self.assertEqual(list(chain), [1, 2, 4])
+
+
+
+class ChainAddingTests(TestCase):
+
+    @patch("atomium.models.structures.AtomStructure.add")
+    def test_adding_forgets_residue_order(self, mock_add):
+        chain = Chain()
+        chain._residues = (1, 2)
+        chain.add("obj")
+        mock_add.assert_called_with(chain, "obj")
+        self.assertIsNone(chain._residues)
+
+
+
+class ChainRemovingTests(TestCase):
+
+    @patch("atomium.models.structures.AtomStructure.remove")
+    def test_removing_forgets_residue_order(self, mock_remove):
+        chain = Chain()
+        chain._residues = (1, 2)
+        chain.remove("obj")
+        mock_remove.assert_called_with(chain, "obj")
+        self.assertIsNone(chain._residues)
+
+
+
+class ChainResiduesTests(TestCase):
+
+    def setUp(self):
+        self.residues = [Mock(Residue) for _ in range(3)]
+        self.chain = Chain()
+
+
+    @patch("atomium.models.molecules.Chain._get")
+    @patch("atomium.models.molecules.order_residues")
+    def test_can_get_ordered_residues(self, mock_order, mock_get):
+        mock_get.return_value = set(self.residues)
+        mock_order.return_value = tuple(self.residues)
+        self.assertEqual(self.chain.residues(), tuple(self.residues))
+        mock_get.assert_called_with("residue")
+        mock_order.assert_called_with(set(self.residues))
+        self.assertEqual(self.chain.residues(), tuple(self.residues))
+        self.assertEqual(mock_order.call_count, 1)
+
+
+    @patch("atomium.models.molecules.Chain._get")
+    @patch("atomium.models.molecules.order_residues")
+    def test_can_filter_ordered_residues(self, mock_order, mock_get):
+        self.chain._residues = tuple(self.residues)
+        mock_get.return_value = {self.residues[2], self.residues[0]}
+        self.assertEqual(
+         self.chain.residues(name="VAL"), (self.residues[0], self.residues[2])
+        )
+        mock_get.assert_called_with("residue", name="VAL")
+        self.assertFalse(mock_order.called)
+
+
+
+class ResidueOrderingTests(TestCase):
+
+    def setUp(self):
+        self.residues = [Mock(Residue) for _ in range(5)]
+        for res1, res2 in zip(self.residues[:-1], self.residues[1:]):
+            res1.next, res2.previous = res2, res1
+        self.residues[0].previous, self.residues[-1].next = None, None
+
+
+    def test_can_order_residues(self):
+        self.assertEqual(
+         order_residues(set(self.residues[1:4])), tuple(self.residues[1:4])
+        )
+        self.assertEqual(order_residues(set(self.residues)), tuple(self.residues))
+
+
+    def test_can_order_no_residues(self):
+        self.assertEqual(order_residues(set()), ())
+
+
+    def test_can_leave_out_unconnected_residues(self):
+        other = Mock(Residue, next=None, previous=None)
+        residues = order_residues({self.residues[0], other})
+        self.assertIn(residues, ((self.residues[0],), (other,)))
+
+
+    def test_can_handle_cycles(self):
+        self.residues[0].previous = self.residues[-1]
+        self.residues[-1].next = self.residues[0]
+        self.assertEqual(set(order_residues(set(self.residues))), set(self.residues))
+
+
+
+class ResidueOrderInvalidationTests(TestCase):
+
+    def test_can_invalidate_residue_order(self):
+        chains = [Mock(_residues=(1,)), Mock(_residues=(2,))]
+        residues = [
+         Mock(_atoms={Mock(_chain=chains[0]), Mock(_chain=None)}),
+         Mock(_atoms={Mock(_chain=chains[1])})
+        ]
+        invalidate_residue_order(residues[0], None, residues[1], "x")
+        self.assertIsNone(chains[0]._residues)
+        self.assertIsNone(chains[1]._residues)
+
+
+
 class ChainCorrectCheckingTests(TestCase):
 
     def setUp(self):
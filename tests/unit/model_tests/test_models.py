@@ -2,12 +2,76 @@ from unittest import TestCase
 from unittest.mock import patch, Mock, PropertyMock
 from atomium.models.molecules import Model
 from atomium.models.structures import AtomStructure
+from atomium.models.atoms import Atom
 
 class ModelCreationTests(TestCase):
 
     def test_can_create_model(self):
         model = Model()
         self.assertIsInstance(model, AtomStructure)
+        self.assertIsNone(model._spatial_index)
+
+
+    @patch("atomium.models.structures.AtomStructure._initialise")
+    def test_can_initialise_model(self, mock_init):
+        model = Model.__new__(Model)
+        model._initialise(["a"], 1)
+        mock_init.assert_called_with(model, ["a"], 1)
+        for attribute in (
+         "_spatial_index", "_packed_atoms", "_coordinates", "_bfactors",
+         "_charges", "_elements", "_element_indices"
+        ):
+            self.assertIsNone(getattr(model, attribute))
+
+
+
+class ModelAddingTests(TestCase):
+
+    @patch("atomium.models.structures.AtomStructure.add")
+    def test_adding_discards_spatial_index(self, mock_add):
+        model = Model()
+        model._spatial_index = "INDEX"
+        atom = Mock(Atom, _row=None)
+        model.add(atom)
+        mock_add.assert_called_with(model, atom)
+        self.assertIsNone(model._spatial_index)
+
+
+
+class ModelRemovingTests(TestCase):
+
+    @patch("atomium.models.structures.AtomStructure.remove")
+    def test_removing_discards_spatial_index(self, mock_remove):
+        model = Model()
+        model._spatial_index = "INDEX"
+        model.remove(1)
+        mock_remove.assert_called_with(model, 1)
+        self.assertIsNone(model._spatial_index)
+
+
+
+class ModelAtomsInSphereTests(TestCase):
+
+    @patch("atomium.models.molecules.CellList")
+    def test_can_build_spatial_index(self, mock_cells):
+        atoms = [Mock(), Mock()]
+        model = Model()
+        model._atoms = set(atoms)
+        mock_cells.return_value.atoms_in_sphere.return_value = {atoms[0]}
+        self.assertEqual(model.atoms_in_sphere(1, 2, 3, 4), {atoms[0]})
+        mock_cells.assert_called_with(set(atoms))
+        mock_cells.return_value.atoms_in_sphere.assert_called_with(1, 2, 3, 4)
+        self.assertIs(model._spatial_index, mock_cells.return_value)
+
+
+    @patch("atomium.models.molecules.CellList")
+    def test_can_reuse_spatial_index(self, mock_cells):
+        model = Model()
+        atom = Mock()
+        model._spatial_index = Mock()
+        model._spatial_index.atoms_in_sphere.return_value = {atom}
+        self.assertEqual(model.atoms_in_sphere(1, 2, 3, 4), {atom})
+        self.assertFalse(mock_cells.called)
 
 
 
@@ -57,3 +121,113 @@ class ModelCopyingTests(TestCase):
             self.assertEqual(new_model._atoms, set(atoms[:-1] + [atoms[-1].copy.return_value]))
         finally:
             patcher.stop()
+
+
+
+class ModelPackingTests(TestCase):
+
+    def setUp(self):
+        self.atoms = [
+         Atom("C", 1, 2, 3, id=1, bfactor=1.5),
+         Atom("N", 4, 5, 6, id=2, charge=-1),
+         Atom("C", 7, 8, 9, id=3)
+        ]
+        self.model = Model(*self.atoms)
+
+
+    def test_models_start_unpacked(self):
+        self.assertFalse(self.model.packed)
+        self.assertIsNone(self.model._coordinates)
+        self.assertIsNone(self.model._packed_atoms)
+
+
+    def test_can_pack_model(self):
+        self.model.pack()
+        self.assertTrue(self.model.packed)
+        self.assertEqual(self.model._coordinates.shape, (3, 3))
+        self.assertEqual(self.model._elements, ["C", "N"])
+        for atom in self.atoms:
+            row = atom._row
+            self.assertIs(self.model._packed_atoms[row], atom)
+            self.assertEqual(self.model._coordinates[row].tolist(), list(atom.location))
+            self.assertEqual(self.model._bfactors[row], atom.bfactor)
+            self.assertEqual(self.model._charges[row], atom.charge)
+            self.assertEqual(
+             self.model._elements[self.model._element_indices[row]], atom.element
+            )
+            self.assertFalse(hasattr(atom, "_x"))
+
+
+    def test_packed_atoms_read_and_write_arrays(self):
+        self.model.pack()
+        atom = self.atoms[1]
+        self.assertEqual(atom.location, (4, 5, 6))
+        self.assertEqual(atom.charge, -1)
+        atom.x, atom.bfactor, atom.charge = 10, 2.5, 1
+        atom.element = "O"
+        self.assertEqual(self.model._coordinates[atom._row].tolist(), [10, 5, 6])
+        self.assertEqual(self.model._bfactors[atom._row], 2.5)
+        self.assertEqual(self.model._charges[atom._row], 1)
+        self.assertEqual(self.model._elements[self.model._element_indices[atom._row]], "O")
+        atom.move_to(0, 0, 0)
+        self.assertEqual(atom.location, (0, 0, 0))
+
+
+    def test_can_unpack_model(self):
+        self.model.pack()
+        self.atoms[0].translate(1, 1, 1)
+        self.model.unpack()
+        self.assertFalse(self.model.packed)
+        self.assertEqual((self.atoms[0]._x, self.atoms[0]._y, self.atoms[0]._z), (2, 3, 4))
+        self.assertEqual(self.atoms[0]._bfactor, 1.5)
+        for atom in self.atoms: self.assertIsNone(atom._row)
+        self.model.unpack()
+
+
+    def test_adding_and_removing_repacks(self):
+        self.model.pack()
+        atom = Atom("S", 1, 1, 1)
+        self.model.add(atom)
+        self.assertTrue(self.model.packed)
+        self.assertEqual(self.model._coordinates.shape, (4, 3))
+        self.assertIsNotNone(atom._row)
+        self.model.remove(self.atoms[0])
+        self.assertEqual(self.model._coordinates.shape, (3, 3))
+        self.assertIsNone(self.atoms[0]._row)
+        self.assertEqual(self.atoms[0].location, (1, 2, 3))
+
+
+    def test_new_model_releases_packed_atoms(self):
+        self.model.pack()
+        new = Model(self.atoms[0])
+        self.assertFalse(self.model.packed)
+        self.assertIs(self.atoms[0].model, new)
+        self.assertEqual(self.atoms[0].location, (1, 2, 3))
+
+
+    def test_packed_calculated_properties(self):
+        values = [self.model.mass, self.model.charge,
+         self.model.center_of_mass, self.model.radius_of_gyration]
+        self.model.pack()
+        self.assertEqual(self.model.mass, values[0])
+        self.assertEqual(self.model.charge, values[1])
+        for packed, unpacked in zip(self.model.center_of_mass, values[2]):
+            self.assertAlmostEqual(packed, unpacked, delta=0.000001)
+        self.assertAlmostEqual(self.model.radius_of_gyration, values[3], delta=0.000001)
+
+
+    def test_packed_transformations(self):
+        self.model.pack()
+        self.model.translate(1, 1, 1)
+        self.assertEqual(self.atoms[0].location, (2, 3, 4))
+        self.model.translate((0.1234, 0, 0), trim=2)
+        self.assertEqual(self.atoms[0].location, (2.12, 3, 4))
+        self.model.transform([[0, -1, 0], [1, 0, 0], [0, 0, 1]])
+        self.assertEqual(self.atoms[0].location, (-3, 2.12, 4))
+        self.model._spatial_index = "INDEX"
+        self.model.trim(0)
+        self.assertEqual(self.atoms[0].location, (-3, 2, 4))
+        self.assertIsNone(self.model._spatial_index)
+        self.model._coordinates[self.atoms[0]._row] = (2.675, 1.005, 4)
+        self.model.trim(2)
+        self.assertEqual(self.atoms[0].location, (2.67, 1.0, 4))
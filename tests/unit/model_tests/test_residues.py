@@ -10,15 +10,48 @@ class HetCreationTests(TestCase):
 
 
     @patch("atomium.models.molecules.Het.__init__")
-    def test_can_create_residue(self, mock_init):
+    @patch("atomium.models.molecules.invalidate_residue_order")
+    def test_can_create_residue(self, mock_inv, mock_init):
         residue = Residue("a", b="c")
         self.assertIsInstance(residue, Het)
         mock_init.assert_called_with(residue, "a", b="c")
+        mock_inv.assert_called_with(residue)
+
+
+    @patch("atomium.models.molecules.Het._initialise")
+    def test_can_initialise_residue(self, mock_init):
+        residue = Residue.__new__(Residue)
+        residue._initialise(["a"], "A1", "VAL")
+        mock_init.assert_called_with(residue, ["a"], "A1", "VAL")
         self.assertIsNone(residue._next)
         self.assertIsNone(residue._previous)
 
 
 
+class ResidueAddingTests(TestCase):
+
+    @patch("atomium.models.structures.AtomStructure.add")
+    @patch("atomium.models.molecules.invalidate_residue_order")
+    def test_adding_invalidates_residue_order(self, mock_inv, mock_add):
+        residue = Residue()
+        residue.add("obj")
+        mock_add.assert_called_with(residue, "obj")
+        mock_inv.assert_called_with(residue)
+
+
+
+class ResidueRemovingTests(TestCase):
+
+    @patch("atomium.models.structures.AtomStructure.remove")
+    @patch("atomium.models.molecules.invalidate_residue_order")
+    def test_removing_invalidates_residue_order(self, mock_inv, mock_remove):
+        residue = Residue()
+        residue.remove("obj")
+        mock_remove.assert_called_with(residue, "obj")
+        mock_inv.assert_called_with(residue)
+
+
+
 class ResidueFullNameTests(TestCase):
 
     def test_can_get_name(self):
@@ -67,6 +100,14 @@ class ResidueNextTests(TestCase):
         self.assertIs(next_res._previous, res)
 
 
+    @patch("atomium.models.molecules.invalidate_residue_order")
+    def test_assigning_next_invalidates_residue_order(self, mock_inv):
+        res, old_res, next_res = Residue(), Mock(Residue), Mock(Residue)
+        res._next = old_res
+        res.next = next_res
+        mock_inv.assert_called_with(res, old_res, next_res)
+
+
     def test_next_res_cannot_be_self(self):
         res = Residue()
         with self.assertRaises(ValueError):
@@ -92,6 +133,14 @@ class ResiduePreviousTests(TestCase):
         self.assertIs(res.previous, res._previous)
 
 
+    @patch("atomium.models.molecules.invalidate_residue_order")
+    def test_assigning_previous_invalidates_residue_order(self, mock_inv):
+        res, old_res, prev_res = Residue(), Mock(Residue), Mock(Residue)
+        res._previous = old_res
+        res.previous = prev_res
+        mock_inv.assert_called_with(res, old_res, prev_res)
+
+
     def test_can_assign_previous(self):
         res = Residue()
         previous_res = Mock(Residue)
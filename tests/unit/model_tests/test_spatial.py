@@ -0,0 +1,94 @@
+from unittest import TestCase
+from unittest.mock import Mock
+from atomium.models.spatial import CellList
+from atomium.models.atoms import Atom
+
+class CellListTest(TestCase):
+
+    def setUp(self):
+        self.atoms = [
+         Mock(Atom, location=(0, 0, 0)), Mock(Atom, location=(1, 1, 1)),
+         Mock(Atom, location=(4, 4, 4)), Mock(Atom, location=(9, 0, 0)),
+         Mock(Atom, location=(-3, -1, 0)), Mock(Atom, location=(30, 30, 30))
+        ]
+
+
+
+class CellListCreationTests(CellListTest):
+
+    def test_can_create_cell_list(self):
+        cells = CellList(self.atoms)
+        self.assertEqual(cells._atoms, self.atoms)
+        self.assertEqual(cells._cell_size, 5)
+        self.assertEqual(cells._coordinates.shape, (6, 3))
+        self.assertEqual(
+         {k: v.tolist() for k, v in cells._cells.items()},
+         {(0, 0, 0): [0, 1, 2], (1, 0, 0): [3], (-1, -1, 0): [4], (6, 6, 6): [5]}
+        )
+
+
+    def test_can_create_cell_list_with_cell_size(self):
+        cells = CellList(self.atoms, cell_size=2)
+        self.assertEqual(cells._cell_size, 2)
+        self.assertEqual(len(cells._cells), 5)
+
+
+    def test_can_create_empty_cell_list(self):
+        cells = CellList([])
+        self.assertEqual(cells._coordinates.shape, (0, 3))
+        self.assertEqual(cells._cells, {})
+
+
+    def test_cell_list_repr(self):
+        self.assertEqual(repr(CellList(self.atoms)), "<CellList (6 atoms, 4 cells)>")
+
+
+    def test_cell_list_length(self):
+        self.assertEqual(len(CellList(self.atoms)), 6)
+
+
+
+class CellListCandidateTests(CellListTest):
+
+    def test_can_get_candidates_in_nearby_cells(self):
+        cells = CellList(self.atoms, cell_size=2)
+        self.assertEqual(sorted(cells.candidates(1, 1, 1, 0.5).tolist()), [0, 1])
+        self.assertEqual(sorted(cells.candidates(5, 5, 5, 0.5).tolist()), [2])
+        self.assertEqual(cells.candidates(-3, -1, 0, 0.5).tolist(), [4])
+
+
+    def test_can_get_no_candidates(self):
+        cells = CellList(self.atoms, cell_size=2)
+        self.assertEqual(cells.candidates(101, 101, 101, 0.5).tolist(), [])
+
+
+    def test_large_spheres_search_every_atom(self):
+        cells = CellList(self.atoms)
+        self.assertEqual(cells.candidates(0, 0, 0, 50).tolist(), list(range(6)))
+
+
+
+class CellListSphereTests(CellListTest):
+
+    def test_can_get_atoms_in_sphere(self):
+        cells = CellList(self.atoms, cell_size=2)
+        self.assertEqual(
+         cells.atoms_in_sphere(0, 0, 0, 2), {self.atoms[0], self.atoms[1]}
+        )
+        self.assertEqual(
+         cells.atoms_in_sphere(0, 0, 0, 3.2), {self.atoms[0], self.atoms[1], self.atoms[4]}
+        )
+        self.assertEqual(cells.atoms_in_sphere(0, 0, 0, 1), {self.atoms[0]})
+
+
+    def test_sphere_boundary_is_inclusive(self):
+        cells = CellList(self.atoms)
+        self.assertEqual(
+         cells.atoms_in_sphere(9, 0, 1, 1), {self.atoms[3]}
+        )
+
+
+    def test_can_get_no_atoms_in_sphere(self):
+        cells = CellList(self.atoms)
+        self.assertEqual(cells.atoms_in_sphere(100, 0, 0, 1), set())
+        self.assertEqual(CellList([]).atoms_in_sphere(0, 0, 0, 1), set())